@@ -0,0 +1,23 @@
+'''
+Purpose: shared analysis code for the FED scripts (plotmice.py, meals.py,
+meal_bars.py, eating_rate.py). Nothing here opens a window or reads a folder
+at import time, so it can be used from batch jobs as well as from the scripts.
+'''
+
+from .errors import FedError
+from .io import (FedData, parse_fed_bytes, read_fed_csv, convertTime, get_data, csv_files, read_all, read_folder,
+                 ReadResult, ReadFailure)
+from .times import (get_border_times, window_indices, extract_times, extract_windows, get_intervals, reverse_intervals,
+                    get_12h_intervals, get_days_and_nights, LIGHT, DARK, IntervalIndex, interval_index,
+                    locate, cycle_counts)
+from .bins import (get_number_of_bins, fill_bins, mask_coverage, get_sums, get_averages2plot, get_std_err,
+                   BinSummary, bin_summary, tick_counts, BinPyramid, PYRAMID_WIDTHS, times_intervals_for_avg)
+from .meals import (MEAL_DTYPE, gram2pellet, segment_meals, get_segments, night_count, meal_cycle_table,
+                    all_night_pellets, get_avg_night_pellets_per_meal, all_night_meal_pellets_count,
+                    get_avg_night_meal_duration, meal_percent, phase_meal_stats, MealDetector)
+from .rate import get_rate, get_nights_rate
+from .stats import (my_std_err, Comparison, pad, describe, ttest, effect_size, permutation_test, bootstrap_ci, compare,
+                    stars)
+from .schedule import Schedule, schedule_windows, full_windows, window_of
+from .cache import clear_cache
+from .live import FileTail, RollingBins, RollingEvents
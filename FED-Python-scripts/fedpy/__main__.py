@@ -0,0 +1,6 @@
+import sys
+from .cli import main
+
+# the guard keeps the worker processes of --processes from running main again
+if __name__ == '__main__':
+    sys.exit(main())
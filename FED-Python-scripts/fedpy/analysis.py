@@ -0,0 +1,154 @@
+'''
+Purpose: the four analyses of the FED scripts without any window: timeline(plotmice.py),
+meals(meals.py), meal bars(meal_bars.py) and eating rate(eating_rate.py).
+Each function takes the data(result of read_all function) and the same options as the
+options window of the script, and returns a dictionary with everything needed to print,
+plot or save the results. Wrong options or not enough data raise FedError.
+'''
+
+import numpy as np
+from .errors import FedError
+from .times import get_border_times, extract_times, get_days_and_nights
+from .schedule import Schedule, schedule_windows, full_windows
+from .bins import get_number_of_bins, fill_bins, mask_coverage, bin_summary, times_intervals_for_avg
+from .meals import (gram2pellet, segment_meals, get_segments, meal_cycle_table, all_night_pellets, phase_meal_stats,
+                    meal_percent)
+from .rate import get_nights_rate
+from .stats import compare
+from .profiling import stage
+
+# checks the options the same way the options windows do, raises FedError with the message to show
+def check_options(lights_out, lights_on, bin=None, meal_interval=None, meal_size=None, pellet_weight=None):
+    if lights_out < 0 or lights_out >= 24 or lights_on < 0 or lights_on >= 24:
+        raise FedError("Hours in 24hour format")
+    if lights_out == lights_on:
+        raise FedError("Lights out and lights on\nhave to be different hours")
+    if bin is not None and bin <= 0:
+        raise FedError("Time bin has to be more than 0sec")
+    if meal_interval is not None and (meal_interval < 60 or meal_interval > 7400 or meal_size < 0.1 or meal_size > 1
+                                      or pellet_weight < 0.01 or pellet_weight > 1):
+        raise FedError("Meal intervals between 60-7400sec\nMeal and pellets between 0.1-1g")
+
+# returns common data cut to an equal number of full nights and full days, full nights and full days
+def full_cycles(data, lights_out, lights_on):
+    with stage('extract_times') as s:
+        start, end = get_border_times(data)     # get first and last common date from all data
+        common_data = extract_times(data, start, end)
+        s.count(common_data)
+    with stage('full_windows'):
+        full_nights, full_days = full_windows(Schedule(lights_out, lights_on), start, end)
+    with stage('get_days_and_nights') as s:
+        data2plot = get_days_and_nights(common_data, full_nights, full_days)
+        s.count(data2plot)
+    return data2plot, full_nights, full_days
+
+# pellet retrieval of each mouse and average pellet retrieval in time bins(plotmice.py)
+# common: only the time period common to all files(as plotmice.py), otherwise from the first to the last timestamp
+# of all files, a bin outside of the recording of a file is NaN in 'bins' and left out of the average of that bin
+# 'median', 'ci_low', 'ci_high', 'covered': median, bootstrap confidence interval(resamples of the mice, NaN without
+# resamples, seed: random seed) and number of files covering each bin
+def analyze_timeline(data, bin, lights_out, lights_on, common=True, resamples=0, seed=0):
+    check_options(lights_out, lights_on, bin=bin)
+    with stage('extract_times') as s:
+        if common:
+            start, end = get_border_times(data)
+        else:
+            get_border_times(data)      # raises FedError for a file without timestamps
+            start, end = min(el[0] for el in data), max(el[-1] for el in data)
+        plot_data = extract_times(data, start, end)
+        s.count(plot_data)
+    with stage('schedule_windows'):
+        nights = schedule_windows(Schedule(lights_out, lights_on), start, end)[0]
+    with stage('fill_bins') as s:
+        how_many_bins = get_number_of_bins(end, start, bin)
+        all_bin_counts = fill_bins(how_many_bins, plot_data, start, bin)
+        if not common:
+            all_bin_counts = mask_coverage(all_bin_counts, data, start, bin)
+        s.count(plot_data)
+    with stage('bin_stats', rows=all_bin_counts.size, mice=len(all_bin_counts)):
+        summary = bin_summary(all_bin_counts, resamples=resamples, seed=seed)
+    return {'start': start, 'end': end, 'plot_data': plot_data, 'bin': bin,
+            'nights': nights,
+            'bins': all_bin_counts,
+            'coverage': None if common else data,
+            'avg_times': times_intervals_for_avg(how_many_bins, start, bin),
+            'avg': summary.mean,
+            'std_err': summary.sem,
+            'do_std_err': not np.isnan(summary.sem).all(),
+            'median': summary.median, 'ci_low': summary.ci_low, 'ci_high': summary.ci_high, 'covered': summary.n}
+
+# meals of each mouse during full nights and days(meals.py)
+def analyze_meals(data, lights_out, lights_on, meal_interval, meal_size, pellet_weight):
+    check_options(lights_out, lights_on, meal_interval=meal_interval, meal_size=meal_size, pellet_weight=pellet_weight)
+    data2plot, full_nights, full_days = full_cycles(data, lights_out, lights_on)
+    with stage('segment_meals') as s:
+        meals = segment_meals(data2plot, meal_interval, gram2pellet(meal_size, pellet_weight))
+        s.count(data2plot)
+    return {'data2plot': data2plot, 'full_nights': full_nights, 'full_days': full_days, 'meals': meals,
+            'segments': get_segments(meals, len(data2plot))}
+
+# meal statistics of a single phase(nights or days), from one grouped reduction of the meals by mouse and cycle
+# 'mouse_meals', 'mouse_pellets': number of meals and pellets in meals of each mouse in all intervals of the phase
+def _meal_phase(data2plot, meals, intervals):
+    meal_no, pellets, duration = (el.sum(axis=1) for el in meal_cycle_table(meals, intervals, len(data2plot)))
+    phase = phase_meal_stats(meal_no, pellets, duration, len(intervals))
+    phase.update({'mouse_meals': meal_no, 'mouse_pellets': pellets.astype(np.int64)})
+    phase.update(meal_percent(phase['meal_pellets'], phase['meal_pellets_err'], phase['meal_pellets_p'],
+                              all_night_pellets(data2plot, intervals)))
+    return phase
+
+# measures of the four bar charts of meal_bars.py
+MEAL_BARS = ('meal_pellets', 'duration', 'percent', 'meals_per_cycle')
+
+# takes a list of (night, day) meal statistics, all of them are compared(stats.compare) at once
+# resamples, seed, workers: permutation test and bootstrap confidence interval, see stats.compare
+# returns a list with a tuple for each of them: do_stats(False if there was not enough information for std err
+# and significance), dictionary of ttest p values of the four bar charts(empty without stats) and the
+# table(list of Comparison of the four measures, dark is group a)
+# the std err of % pellets is not checked, it is the std err of the pellets in meals divided by all pellets
+def meal_bar_tests(phases, resamples=0, seed=0, workers=None):
+    table = compare([name for pair in phases for name in MEAL_BARS],
+                    [night[name + '_p'] for night, day in phases for name in MEAL_BARS],
+                    [day[name + '_p'] for night, day in phases for name in MEAL_BARS],
+                    resamples=resamples, seed=seed, workers=workers)
+    results = list()
+    for i in range(len(phases)):
+        rows = table[i*len(MEAL_BARS):(i+1)*len(MEAL_BARS)]
+        do_stats = all(row.testable for row in rows if row.measure != 'percent')
+        results.append((do_stats, {row.measure: row.p for row in rows} if do_stats else {}, rows))
+    return results
+
+# meal statistics of full nights and days, and their ttest p values(meal_bars.py)
+# 'do_stats' is False if there was not enough information for std err and significance
+# 'table' is the list of Comparison(stats.py) of the four measures, dark is group a
+# resamples: also permutation test p values and bootstrap confidence intervals(seed, workers: see stats.compare)
+def analyze_meal_bars(data, lights_out, lights_on, meal_interval, meal_size, pellet_weight, resamples=0, seed=0,
+                      workers=None):
+    result = analyze_meals(data, lights_out, lights_on, meal_interval, meal_size, pellet_weight)
+    with stage('meal_stats', rows=len(result['meals']), mice=len(result['data2plot'])):
+        night = _meal_phase(result['data2plot'], result['meals'], result['full_nights'])
+        day = _meal_phase(result['data2plot'], result['meals'], result['full_days'])
+    with stage('ttest'):
+        do_stats, p, table = meal_bar_tests([(night, day)], resamples, seed, workers)[0]
+    result.update({'night': night, 'day': day, 'do_stats': do_stats, 'p': p, 'table': table})
+    return result
+
+# eating rate(pellets per time bin) by full nights and days, and its ttest p value(eating_rate.py)
+# 'do_stats' is False if there was not enough information for std err and significance
+# 'table' is a list with the Comparison(stats.py) of the dark and light rates(of every mouse and cycle)
+# resamples: also permutation test p value and bootstrap confidence interval(seed, workers: see stats.compare)
+def analyze_rate(data, bin, lights_out, lights_on, resamples=0, seed=0, workers=None):
+    check_options(lights_out, lights_on, bin=bin)
+    common_days_nights, full_nights, full_days = full_cycles(data, lights_out, lights_on)
+    with stage('get_nights_rate') as s:
+        night_rate, night_error, night2ttest = get_nights_rate(common_days_nights, full_nights, bin)
+        day_rate, day_error, day2ttest = get_nights_rate(common_days_nights, full_days, bin)
+        s.count(common_days_nights)
+    with stage('ttest'):
+        table = compare(['rate'], [night2ttest], [day2ttest], resamples=resamples, seed=seed, workers=workers)
+    result = {'bin': bin, 'night_rate': night_rate, 'night_error': night_error, 'night_p': night2ttest,
+              'day_rate': day_rate, 'day_error': day_error, 'day_p': day2ttest,
+              'do_stats': table[0].testable, 'table': table}
+    if result['do_stats']:
+        result['p'] = table[0].p
+    return result
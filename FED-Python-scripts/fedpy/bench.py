@@ -0,0 +1,130 @@
+'''
+Purpose: timed benchmarks of the main steps (parsing, extract_times, fill_bins, meal segmentation,
+phase assignment and plotting) on synthetic folders made by synth.py at several scales.
+Scale 1 is 8 devices recording for 7 days, scale 10 is 80 devices, scale 100 is 800 devices.
+Results are saved as JSON, compare() shows the change between two result files(e.g. two commits).
+'''
+
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import numpy as np
+from .io import read_all
+from .cache import clear_cache
+from .times import get_border_times, extract_times, cycle_counts
+from .bins import get_number_of_bins, fill_bins
+from .meals import segment_meals, meal_cycle_table
+from .schedule import schedule_windows
+from .synth import write_folder, DEFAULT_SCHEDULE
+
+DEVICES = 8     # devices at scale 1
+DAYS = 7
+
+# each benchmark: name, function taking the prepared context(dictionary) and returning nothing
+def _parse(context):
+    read_all(context['folder'], cache=False)
+
+def _parse_cached(context):
+    read_all(context['folder'], cache=True)
+
+def _extract_times(context):
+    extract_times(context['data'], context['start'], context['end'])
+
+def _fill_bins(context):
+    fill_bins(context['bins'], context['common'], context['start'], 1800)
+
+def _segment_meals(context):
+    segment_meals(context['common'], 1800, 15)
+
+# pellets and meals of every mouse in every night and day(as analyze_meal_bars)
+def _phase_tables(context):
+    for intervals in (context['nights'], context['days']):
+        cycle_counts(context['common'], intervals)
+        meal_cycle_table(context['meals'], intervals, context['devices'])
+
+def _plot(context):
+    import matplotlib
+    matplotlib.use('Agg')
+    from .analysis import analyze_timeline
+    from .plots import plot_timeline, plt
+    fig = plot_timeline(analyze_timeline(context['data'], 1800, 15, 3))
+    fig.savefig(os.path.join(context['folder'], '..', 'plot.png'))
+    plt.close(fig)
+
+BENCHMARKS = [('parse', _parse), ('parse_cached', _parse_cached), ('extract_times', _extract_times),
+              ('fill_bins', _fill_bins), ('segment_meals', _segment_meals), ('phase_tables', _phase_tables),
+              ('plot_timeline', _plot)]
+
+# writes the synthetic folder of a scale and returns the context of the benchmarks
+def prepare(directory, scale, seed=0):
+    folder = os.path.join(directory, 'scale%d' % scale, 'data')
+    write_folder(folder, DEVICES * scale, DAYS, seed)
+    data = read_all(folder, cache=True)     # also fills the cache for parse_cached
+    start, end = get_border_times(data)
+    nights, days = schedule_windows(DEFAULT_SCHEDULE, start, end)
+    common = extract_times(data, start, end)
+    return {'folder': folder, 'data': data, 'start': start, 'end': end, 'common': common,
+            'bins': get_number_of_bins(end, start, 1800), 'nights': nights, 'days': days,
+            'meals': segment_meals(common, 1800, 15),
+            'devices': len(data), 'rows': int(sum(len(el) for el in data))}
+
+# returns seconds of each of `repeat` runs of a function
+def _time(function, context, repeat):
+    runs = list()
+    for i in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        function(context)
+        runs.append(time.perf_counter() - t)
+    return runs
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+# runs all benchmarks(or the ones named in `only`) at all scales and returns the results as a dictionary
+# directory: where the synthetic folders are written(default: a temporary folder, removed at the end)
+def run(scales=(1, 10, 100), repeat=3, seed=0, only=None, directory=None, verbose=True):
+    results = {'commit': _commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+               'numpy': np.__version__, 'platform': platform.platform(), 'seed': seed, 'benchmarks': list()}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            context = prepare(directory or tmp, scale, seed)
+            for name, function in BENCHMARKS:
+                if only is not None and name not in only:
+                    continue
+                runs = _time(function, context, repeat)
+                results['benchmarks'].append({'name': name, 'scale': scale, 'devices': context['devices'],
+                                              'rows': context['rows'], 'best': min(runs),
+                                              'median': float(np.median(runs)), 'runs': runs})
+                if verbose:
+                    print('%-15s x%-4d %8d rows %10.4fs' % (name, scale, context['rows'], min(runs)), file=sys.stderr)
+            clear_cache(context['folder'])
+    return results
+
+def save(results, filename):
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=1)
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+# returns lines comparing best times of two results(old, new), ratio > 1 means the new one is slower
+def compare(old, new):
+    before = {(el['name'], el['scale']): el['best'] for el in old['benchmarks']}
+    lines = ['%-15s %6s %10s %10s %7s' % ('benchmark', 'scale', 'old', 'new', 'ratio')]
+    for el in new['benchmarks']:
+        key = (el['name'], el['scale'])
+        if key in before:
+            lines.append('%-15s %6d %10.4f %10.4f %7.2f' % (el['name'], el['scale'], before[key], el['best'],
+                                                             el['best'] / before[key] if before[key] else float('nan')))
+    return lines
@@ -0,0 +1,195 @@
+'''
+Purpose: pellet counts in fixed time bins (plotmice.py, eating_rate.py),
+averages, standard errors, medians and confidence intervals of the bins across all mice.
+The counts are a 2-D array (files x bins), all statistics are reductions over the files axis.
+'''
+
+import math
+import warnings
+from collections import namedtuple
+import numpy as np
+from .errors import FedError
+from .times import file_groups, CHUNK_ROWS
+
+# function to find number of bins given 2 times and a desired time interval
+# time difference is converted to seconds and divided by interval in seconds
+def get_number_of_bins(latest, earliest, tinterval):
+    return int(math.floor((latest - earliest) / np.timedelta64(1, 's') / tinterval))
+
+# returns time interval as int seconds(e.g. 1800.0 from an entry of an options window is 1800)
+# raises FedError if it is not a whole number of seconds more than 0
+def bin_seconds(interval):
+    if not interval > 0 or interval != int(interval):
+        raise FedError("Time bin has to be whole seconds\nmore than 0sec")
+    return int(interval)
+
+# fill each bin(number of bins=number of time intervals) according to the data from each file
+# returns 2-D array of counts (files x bins), all files are counted in one np.bincount call
+# takes as arguments number of all intervals(bins calculated from get_number_of_bins function),
+# list of arrays of timestamps (result of extract_times function), earliest common date, and time interval in seconds(any width)
+# files are counted in groups of at most chunk_size timestamps
+def fill_bins(intervalsNo, list_all, earliest, interval, chunk_size=CHUNK_ROWS):
+    interval = bin_seconds(interval)
+    filesNo = len(list_all)
+    if intervalsNo <= 0 or filesNo == 0:
+        return np.zeros((filesNo, max(intervalsNo, 0)))
+    counts = np.zeros((filesNo, intervalsNo))
+    for first, last in file_groups(list_all, chunk_size):
+        group = list_all[first:last]
+        rows = np.repeat(np.arange(len(group)), [len(el) for el in group])
+        offsets = (np.concatenate(group) - earliest).astype('timedelta64[s]').astype(np.int64)
+        # index=tick-1 as in the original scripts, so a timestamp from the first interval(tick=0)
+        # is counted in the last bin(index -1), timestamps after the last bin are not counted
+        index = offsets // interval - 1
+        keep = (index < intervalsNo) & (index >= -intervalsNo)
+        flat = rows[keep] * intervalsNo + index[keep] % intervalsNo
+        counts[first:last] = np.bincount(flat, minlength=len(group) * intervalsNo).reshape(len(group), intervalsNo)
+    return counts
+
+# returns 2-D array of counts(files x ticksNo, int32) of the timestamps in each tick, tick k is the interval
+# starting at earliest + k*interval(not moved like in fill_bins), timestamps before earliest or in later ticks are not counted
+def tick_counts(list_all, earliest, interval, ticksNo, chunk_size=CHUNK_ROWS):
+    interval = bin_seconds(interval)
+    counts = np.zeros((len(list_all), max(ticksNo, 0)), dtype=np.int32)
+    if ticksNo <= 0:
+        return counts
+    for first, last in file_groups(list_all, chunk_size):
+        group = list_all[first:last]
+        rows = np.repeat(np.arange(len(group)), [len(el) for el in group])
+        offsets = (np.concatenate(group) - earliest).astype('timedelta64[s]').astype(np.int64)
+        tick = offsets // interval
+        keep = (tick >= 0) & (tick < ticksNo)
+        flat = rows[keep] * ticksNo + tick[keep]
+        counts[first:last] = np.bincount(flat, minlength=len(group) * ticksNo).reshape(len(group), ticksNo)
+    return counts
+
+# widths in seconds of the levels of BinPyramid: 1 min, 5 min, 30 min, 2 hours, 1 day
+PYRAMID_WIDTHS = (60, 300, 1800, 7200, 86400)
+
+# pellet counts of the same timestamps(result of extract_times function, between earliest and latest) at several
+# bin widths, for zooming in and out of a plot without the timestamps: level `width` is the same 2-D array(int32)
+# as fill_bins(get_number_of_bins(latest, earliest, width), list_all, earliest, width)
+# the timestamps are counted once in ticks of the greatest common divisor of the widths, the levels are sums of them
+# counts, width: counts of fill_bins at one more width(e.g. the bin of the analysis), used as they are
+# coverage: None, or the whole recordings of the files(list of arrays of timestamps), then the levels are masked
+# like mask_coverage(NaN, float) outside of the recording of each file
+class BinPyramid:
+    def __init__(self, list_all, earliest, latest, widths=PYRAMID_WIDTHS, counts=None, width=None, coverage=None):
+        self.earliest = earliest
+        self.latest = latest
+        self.levels = dict()
+        widths = sorted(set(el for el in widths if get_number_of_bins(latest, earliest, el) > 0))
+        if len(widths) != 0:
+            base = math.gcd(*widths)
+            ticks = tick_counts(list_all, earliest, base, get_number_of_bins(latest, earliest, base) + 1)
+            for el in widths:
+                self.levels[el] = self._level(ticks, el // base, get_number_of_bins(latest, earliest, el))
+                if coverage is not None:
+                    self.levels[el] = mask_coverage(self.levels[el], coverage, earliest, el)
+        if counts is not None:
+            self.levels[width] = counts
+        self.widths = sorted(self.levels)
+
+    # fill_bins counts of ticksNo ticks summed by `factor`: bin k holds tick k+1, tick 0 is added to the last bin
+    @staticmethod
+    def _level(ticks, factor, intervalsNo):
+        filesNo, ticksNo = ticks.shape
+        padded = np.zeros((filesNo, -(-ticksNo // factor) * factor), dtype=ticks.dtype)
+        padded[:, :ticksNo] = ticks
+        summed = padded.reshape(filesNo, -1, factor).sum(axis=2, dtype=ticks.dtype)
+        counts = summed[:, 1:intervalsNo + 1].copy()
+        counts[:, -1] += summed[:, 0]
+        return counts
+
+    # returns the finest width that has at most maxbins bins in `seconds`(the coarsest if none has)
+    def width_for(self, seconds, maxbins):
+        for el in self.widths:
+            if seconds / el <= maxbins:
+                return el
+        return self.widths[-1]
+
+    # returns a tuple: times to plot(see times_intervals_for_avg) and counts(files x bins, float) of the bins
+    # of a level between two times(datetime64), with one more bin on each side
+    def window(self, width, left, right):
+        counts = self.levels[width]
+        first = max(0, int((left - self.earliest) // np.timedelta64(width, 's')) - 1)
+        last = min(counts.shape[1], int((right - self.earliest) // np.timedelta64(width, 's')) + 2)
+        last = max(first, last)
+        times = self.earliest + np.arange(first, last) * np.timedelta64(width, 's')
+        return times, counts[:, first:last].astype(float)
+
+# bins of a file outside of its own first-last timestamp are not covered by that file
+# (bin index i holds the interval tick=i+1, see fill_bins)
+# returns a copy of the 2-D array of counts(result of fill_bins function) with NaN in these bins
+# takes as arguments the counts, list of arrays of timestamps, earliest date, and time interval in seconds
+def mask_coverage(all_bin_lists, list_all, earliest, interval):
+    masked = np.array(all_bin_lists, dtype=float)
+    bin_starts = (np.arange(masked.shape[1]) + 1) * interval
+    for i, el in enumerate(list_all):
+        if len(el) == 0:
+            masked[i] = np.nan
+            continue
+        first, last = ((el[[0, -1]] - earliest).astype('timedelta64[s]').astype(np.int64))
+        masked[i, (bin_starts + interval <= first) | (bin_starts > last)] = np.nan
+    return masked
+
+# return array of sums from all mice for each time interval(helper function), NaN bins are skipped
+# takes as an argument 2-D array of counts(result of fill_bins function), and number of intervals(from get_number_of_bins function)
+def get_sums(all_bin_lists, intervalsNo):
+    return np.nansum(np.asarray(all_bin_lists, dtype=float)[:, :intervalsNo], axis=0)
+
+# return array of averages to plot, averaged over the mice that cover each bin(NaN if none does)
+# takes as an argument 2-D array of counts(result of fill_bins function), and number of intervals(from get_number_of_bins function)
+def get_averages2plot(all_bin_lists, intervalsNo):
+    counts = np.asarray(all_bin_lists, dtype=float)[:, :intervalsNo]
+    covered = (~np.isnan(counts)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(covered > 0, get_sums(counts, intervalsNo) / covered, np.nan)
+
+# return standard error of each bin(NaN where less than 2 mice cover the bin)
+# note: ddof=1 introduces Bessel's correction (divides by N-1) yielding unbiased stdev estimator
+# (important for small samples size)
+def get_std_err(all_bin_lists):
+    counts = np.asarray(all_bin_lists, dtype=float)
+    covered = (~np.isnan(counts)).sum(axis=0)
+    std_err = np.full(counts.shape[1], np.nan)
+    enough = covered >= 2
+    if enough.any():
+        std_err[enough] = np.nanstd(counts[:, enough], axis=0, ddof=1) / np.sqrt(covered[enough])
+    return std_err
+
+# mean, standard error, median and bootstrap confidence interval of each bin, NaN bins are skipped
+BinSummary = namedtuple('BinSummary', ['mean', 'sem', 'median', 'ci_low', 'ci_high', 'n'])
+
+# returns BinSummary of a 2-D array of counts(result of fill_bins or mask_coverage function)
+# the confidence interval comes from resampling the mice with replacement(resamples times, with the given seed),
+# resamples are done in chunks of at most chunk_size values to keep the memory use flat
+def bin_summary(all_bin_lists, ci=0.95, resamples=1000, seed=0, chunk_size=2**22):
+    counts = np.asarray(all_bin_lists, dtype=float)
+    filesNo, intervalsNo = counts.shape
+    n = (~np.isnan(counts)).sum(axis=0)
+    mean = get_averages2plot(counts, intervalsNo)
+    std_err = get_std_err(counts)
+    median = np.full(intervalsNo, np.nan)
+    low = np.full(intervalsNo, np.nan)
+    high = np.full(intervalsNo, np.nan)
+    covered = n > 0
+    if covered.any() and resamples > 0:
+        median[covered] = np.nanmedian(counts[:, covered], axis=0)
+        rng = np.random.default_rng(seed)
+        boot = np.empty((resamples, intervalsNo))
+        step = max(1, chunk_size // max(1, filesNo * intervalsNo))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)     # resamples made only of NaN bins
+            for first in range(0, resamples, step):
+                picks = rng.integers(0, filesNo, size=(min(step, resamples - first), filesNo))
+                boot[first:first + len(picks)] = np.nanmean(counts[picks], axis=1)
+            alpha = (1 - ci) / 2 * 100
+            low[covered], high[covered] = np.nanpercentile(boot[:, covered], [alpha, 100 - alpha], axis=0)
+    elif covered.any():
+        median[covered] = np.nanmedian(counts[:, covered], axis=0)
+    return BinSummary(mean, std_err, median, low, high, n)
+
+# make an array of times to plot(for Xaxis values)
+def times_intervals_for_avg(intervalsNo, earliest, interval):
+    return earliest + np.arange(intervalsNo) * np.timedelta64(interval, 's')
@@ -0,0 +1,195 @@
+'''
+Purpose: on-disk cache of parsed FED files, in the cache folder of the user(e.g. ~/.cache/fedpy, or the
+FEDPY_CACHE environment variable), one folder per data folder, so nothing is written next to the raw data and
+read only data folders are cached too.
+Each csv file is stored once as .npz (timestamps, pellet counts and delays of read_fed_csv) and
+found again by its name, size, modification time and content hash(the file is hashed again on every read,
+much faster than parsing it, so a file edited within the same second without changing its size is parsed again).
+The index keeps the length in bytes and the content hash of the parsed part of the file: a file that still starts
+with the same bytes(only the modification time changed, or rows were appended, like the FED_DATA.csv
+the firmware writes during the whole experiment) is read from that offset only. A file changed
+anywhere else is parsed again and replaces its old entry. The least recently used entries are removed
+when the cache is bigger than its size cap.
+For read_all(..., mmap=True) the pellet timestamps of a file are also kept as int64 seconds since 1970 in a .npy
+file, which is memory-mapped instead of read: only the pages of the windows that are used are loaded.
+'''
+
+import os
+import sys
+import json
+import time
+import hashlib
+import numpy as np
+
+INDEX = 'index.json'
+MAX_BYTES = 256 * 2**20     # size cap of a single cache folder
+HASH_BLOCK = 2**20          # bytes hashed at a time by file_hash
+
+# returns the folder of the cache folders of all data folders: the FEDPY_CACHE environment variable,
+# or the cache folder of the user
+def cache_root():
+    root = os.environ.get('FEDPY_CACHE')
+    if root:
+        return root
+    if os.name == 'nt':
+        return os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), 'fedpy', 'cache')
+    if sys.platform == 'darwin':
+        return os.path.expanduser(os.path.join('~', 'Library', 'Caches', 'fedpy'))
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')), 'fedpy')
+
+# returns path of the cache folder of a data folder(named by the hash of its absolute path)
+def cache_dir(path):
+    return os.path.join(cache_root(), hashlib.blake2b(os.path.abspath(path).encode(), digest_size=8).hexdigest())
+
+# returns content hash of raw bytes of a file
+def content_hash(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+# returns content hash(the same as content_hash) of the first `length` bytes of a file, read in blocks
+# so a long recording is not loaded into memory, None if the file can not be read or is shorter
+def file_hash(filename, length):
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(filename, 'rb') as f:
+            while length > 0:
+                block = f.read(min(length, HASH_BLOCK))
+                if len(block) == 0:
+                    return None
+                digest.update(block)
+                length -= len(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+# returns the index of the cache folder: a dictionary {file name: entry}
+# entry: {'size', 'mtime', 'offset'(bytes parsed: the file up to its last newline), 'hash'(of the parsed bytes),
+# 'bytes'(size of the .npz file), 'pellets_bytes'(size of the .npy file, only if it was saved: see store_pellets),
+# 'used'(time of the last use)}
+def load_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return dict()
+    return index if isinstance(index, dict) else dict()
+
+# saves the index, the old one is replaced only when the new one is completely written
+def save_index(directory, index):
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, INDEX + '.%d.tmp' % os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp, os.path.join(directory, INDEX))
+
+def _entry_path(directory, digest):
+    return os.path.join(directory, digest + '.npz')
+
+def _pellets_path(directory, digest):
+    return os.path.join(directory, digest + '.pellets.npy')
+
+# returns a tuple of arrays(times, pellets, delays) of the entry or None if the .npz file is missing or broken
+def load_entry(directory, entry):
+    try:
+        with np.load(_entry_path(directory, entry['hash'])) as npz:
+            return npz['times'].astype('datetime64[s]'), npz['pellets'], npz['delays']
+    except (OSError, KeyError, ValueError):
+        return None
+
+# True if the entry was made from the file as it is now(same size and modification time, completely parsed)
+def _up_to_date(entry, stat):
+    return (entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns
+            and entry.get('offset') == stat.st_size)
+
+# True if the file still has the content hash of the entry(checked last, after the size and modification time)
+def _same_content(entry, filename):
+    return file_hash(filename, entry['offset']) == entry['hash']
+
+# returns a tuple of arrays(times, pellets, delays) of a file if its size, modification time and content hash
+# are the same as in the index and the whole file was parsed, otherwise None
+# takes the cache folder, its index, file name, os.stat result of the file and its path
+def lookup(directory, index, name, stat, filename):
+    entry = index.get(name)
+    if not _up_to_date(entry, stat) or not _same_content(entry, filename):
+        return None
+    fed = load_entry(directory, entry)
+    if fed is not None:
+        entry['used'] = time.time()
+    return fed
+
+# returns a read only memory-mapped datetime64[s] array with the pellet timestamps of a file(see store_pellets)
+# if the entry of the file is up to date(see lookup) and they were saved, otherwise None
+def lookup_pellets(directory, index, name, stat, filename):
+    entry = index.get(name)
+    if not _up_to_date(entry, stat) or entry.get('pellets_bytes') is None or not _same_content(entry, filename):
+        return None
+    try:
+        pellets = np.load(_pellets_path(directory, entry['hash']), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    entry['used'] = time.time()
+    return pellets.view('datetime64[s]')
+
+# saves the pellet timestamps(sorted datetime64[s] array, result of get_data) of a file of the index as a .npy file
+# of int64 seconds since 1970, the file has to be in the index(store function) and completely parsed
+def store_pellets(directory, index, name, times):
+    entry = index[name]
+    target = _pellets_path(directory, entry['hash'])
+    if not os.path.exists(target):
+        tmp = os.path.join(directory, entry['hash'] + '.%d.tmp.npy' % os.getpid())
+        np.save(tmp, np.ascontiguousarray(times).astype(np.int64))
+        os.replace(tmp, target)
+    entry['pellets_bytes'] = os.path.getsize(target)
+
+# adds parsed columns of a file(FedData or a tuple of times, pellets, delays) to the cache
+# digest and offset: content hash and length of the parsed bytes of the file
+# the index is changed in place, the old entry of the file is replaced, its pellet timestamps are kept
+# if the content is the same(e.g. only the modification time changed) or another file has the same content
+def store(directory, index, name, stat, fed, digest, offset):
+    times, pellets, delays = fed
+    os.makedirs(directory, exist_ok=True)
+    old = index.pop(name, None)
+    if old is not None and old['hash'] != digest:
+        _remove_unused(directory, index, old['hash'])
+    target = _entry_path(directory, digest)
+    if not os.path.exists(target):
+        tmp = os.path.join(directory, digest + '.%d.tmp.npz' % os.getpid())
+        np.savez(tmp, times=times.astype(np.int64), pellets=pellets, delays=delays)
+        os.replace(tmp, target)
+    index[name] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'offset': offset, 'hash': digest,
+                   'bytes': os.path.getsize(target), 'used': time.time()}
+    if os.path.exists(_pellets_path(directory, digest)):
+        index[name]['pellets_bytes'] = os.path.getsize(_pellets_path(directory, digest))
+
+# removes the .npz(and .npy) file of a hash, unless another file of the index has the same content
+def _remove_unused(directory, index, digest):
+    if all(el['hash'] != digest for el in index.values()):
+        for path in (_entry_path(directory, digest), _pellets_path(directory, digest)):
+            try:
+                os.remove(path)
+            except OSError:     # e.g. not saved, or still memory-mapped on Windows
+                pass
+
+# removes the least recently used entries until the cache is not bigger than max_bytes
+# entries of files that are not in the data folder anymore are removed first(keep: names of existing files)
+def evict(directory, index, max_bytes=MAX_BYTES, keep=None):
+    if keep is not None:
+        for name in [el for el in index if el not in keep]:
+            _remove_unused(directory, index, index.pop(name)['hash'])
+    sizes = {el['hash']: el['bytes'] + (el.get('pellets_bytes') or 0) for el in index.values()}
+    total = sum(sizes.values())
+    for name in sorted(index, key=lambda el: index[el]['used']):
+        if total <= max_bytes:
+            break
+        digest = index.pop(name)['hash']
+        if all(el['hash'] != digest for el in index.values()):
+            total -= sizes[digest]
+            _remove_unused(directory, index, digest)
+
+# removes the cache folder of a data folder
+def clear_cache(path):
+    directory = cache_dir(path)
+    if not os.path.isdir(directory):
+        return
+    for file in os.listdir(directory):
+        os.remove(os.path.join(directory, file))
+    os.rmdir(directory)
@@ -0,0 +1,425 @@
+'''
+Purpose: command line version of the four scripts, without any window, e.g. to reprocess
+many experiment folders at once on a computer without a display:
+    python -m fedpy analyze rate --bin 3600 --lights-out 15 --lights-on 3 --out results folder1 folder2
+or to follow the files of a folder during the experiment(live timeline, needs a display):
+    python -m fedpy live --hours 24 folder
+or to follow many devices and print their eating rate and meals(--simulate adds simulated devices):
+    python -m fedpy watch folder1 folder2 file.csv
+benchmarks on synthetic data(see bench.py):
+    python -m fedpy bench --out results.json --compare old_results.json
+to export folders into a Parquet store(see store.py, needs pyarrow) and analyze cohorts of the store:
+    python -m fedpy store archive folder1 folder2 --cohort 2016_males
+    python -m fedpy analyze rate --store archive 2016_males --start 2016-01-02 --end 2016-01-09
+to compute the meal bar statistics for many meal criteria at once(see sweep.py):
+    python -m fedpy sweep folder --meal-intervals 600 900 1800 --meal-sizes 0.1 0.2 0.3 --out sweep.csv
+or to check that the package gives the same results as the original scripts(see golden.py):
+    python -m fedpy golden folder1 folder2
+For each folder a figure and a table(csv) are saved in its own subfolder of --out.
+Exit status is 0 if all folders were analyzed, 1 if any of them failed(the others are still analyzed)
+and 2 for wrong options.
+'''
+
+import os, sys
+import argparse
+import asyncio
+import csv
+import numpy as np
+from . import profiling
+from .errors import FedError
+from .io import read_all, csv_files
+from .schedule import Schedule
+from .meals import gram2pellet
+from .stats import Comparison
+from .watch import Watcher, simulate_device
+from .analysis import check_options, analyze_timeline, analyze_meals, analyze_meal_bars, analyze_rate
+
+# same defaults as the options windows of the scripts
+DEFAULTS = {'lights_out': 15, 'lights_on': 3, 'meal_interval': 1800, 'meal_size': 0.3, 'pellet_weight': 0.02}
+DEFAULT_BINS = {'timeline': 1800, 'rate': 3600}
+
+# table of pellet retrieval in time bins: one row per bin(start time), average, std err and one column per file
+# median, ci_low, ci_high: median and bootstrap confidence interval(only with --resamples) of the mice,
+# mice: number of mice covering the bin(all of them, but with --all-data), a mouse column is nan outside of its recording
+def _write_timeline(writer, result):
+    bins = result['bins']
+    writer.writerow(['time', 'average', 'std_err', 'median', 'ci_low', 'ci_high', 'mice'] +
+                    ['mouse%d' % (i+1) for i in range(len(bins))])
+    for i, time in enumerate(result['avg_times']):
+        writer.writerow([time, result['avg'][i], result['std_err'][i], result['median'][i], result['ci_low'][i],
+                         result['ci_high'][i], result['covered'][i]] + list(bins[:, i]))
+
+# table of meals: one row per meal
+def _write_meals(writer, result):
+    writer.writerow(['mouse', 'start', 'end', 'pellets'])
+    for meal in result['meals']:
+        writer.writerow([meal['mouse'] + 1, meal['start'], meal['end'], meal['pellets']])
+
+# table of the four bar charts: one row per chart, '' where there was not enough data for the stats
+def _write_meal_bars(writer, result):
+    night, day = result['night'], result['day']
+    writer.writerow(['measure', 'dark', 'dark_err', 'light', 'light_err', 'p'])
+    for name in ('meal_pellets', 'duration', 'percent', 'meals_per_cycle'):
+        writer.writerow([name, night[name], night[name + '_err'], day[name], day[name + '_err'],
+                         result['p'].get(name, '')])
+
+# statistics table(stats.Comparison rows) of the dark(a) and light(b) comparisons of meal bars and rate
+def _write_comparisons(writer, table):
+    writer.writerow(Comparison._fields)
+    for row in table:
+        writer.writerow(row)
+
+# table of a sweep of meal criteria: the rows of _write_meal_bars for each combination
+def _write_sweep(writer, rows):
+    writer.writerow(['meal_interval', 'meal_size', 'pellet_weight', 'min_pellets',
+                     'measure', 'dark', 'dark_err', 'light', 'light_err', 'p'])
+    for row in rows:
+        for name in ('meal_pellets', 'duration', 'percent', 'meals_per_cycle'):
+            writer.writerow([row.meal_interval, row.meal_size, row.pellet_weight, row.min_pellets, name,
+                             row.night[name], row.night[name + '_err'], row.day[name], row.day[name + '_err'],
+                             row.p.get(name, '')])
+
+def _write_rate(writer, result):
+    writer.writerow(['bin', 'dark', 'dark_err', 'light', 'light_err', 'p'])
+    writer.writerow([result['bin'], result['night_rate'], result['night_error'], result['day_rate'],
+                     result['day_error'], result.get('p', '')])
+
+# analysis name: (function computing the result, table writer, name of the plot function)
+ANALYSES = {'timeline': (lambda data, a: analyze_timeline(data, a.bin, a.lights_out, a.lights_on, not a.all_data,
+                                                          a.resamples, a.seed),
+                         _write_timeline, 'plot_timeline'),
+            'meals': (lambda data, a: analyze_meals(data, a.lights_out, a.lights_on, a.meal_interval,
+                                                    a.meal_size, a.pellet_weight),
+                      _write_meals, 'plot_meals'),
+            'mealbars': (lambda data, a: analyze_meal_bars(data, a.lights_out, a.lights_on, a.meal_interval,
+                                                           a.meal_size, a.pellet_weight, a.resamples, a.seed,
+                                                           a.resample_workers),
+                         _write_meal_bars, 'plot_meal_bars'),
+            'rate': (lambda data, a: analyze_rate(data, a.bin, a.lights_out, a.lights_on, a.resamples, a.seed,
+                                                  a.resample_workers),
+                     _write_rate, 'plot_rate')}
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m fedpy', description='Analyze folders of FED csv files without the GUI.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    analyze = commands.add_parser('analyze', help='analyze one or more folders')
+    analyze.add_argument('analysis', choices=sorted(ANALYSES))
+    analyze.add_argument('folders', nargs='+', help='folders with csv files, one experiment each(cohorts with --store)')
+    analyze.add_argument('--bin', type=int, help='time bin in seconds (timeline: 1800, rate: 3600)')
+    analyze.add_argument('--lights-out', type=float, default=DEFAULTS['lights_out'], help='lights out hour')
+    analyze.add_argument('--lights-on', type=float, default=DEFAULTS['lights_on'], help='lights on hour')
+    analyze.add_argument('--meal-interval', type=int, default=DEFAULTS['meal_interval'], help='time between meals in sec')
+    analyze.add_argument('--meal-size', type=float, default=DEFAULTS['meal_size'], help='meal in grams')
+    analyze.add_argument('--pellet-weight', type=float, default=DEFAULTS['pellet_weight'], help='pellet in grams')
+    analyze.add_argument('--out', default='.', help='folder for the results (default: current folder)')
+    analyze.add_argument('--format', default='png', help='figure format, e.g. png, pdf, svg (default: png)')
+    analyze.add_argument('--no-plot', action='store_true', help='save the tables only')
+    analyze.add_argument('--workers', type=int, help='number of csv files read at the same time (1: one after another)')
+    analyze.add_argument('--processes', action='store_true', help='read the csv files in processes instead of threads')
+    analyze.add_argument('--no-cache', action='store_true', help='do not use nor write the cache of parsed files')
+    analyze.add_argument('--mmap', action='store_true', help='keep the timestamps in cache files mapped into '
+                                                             'memory instead of loading them (very long recordings)')
+    analyze.add_argument('--store', help='read the cohorts from this store instead of folders of csv files')
+    analyze.add_argument('--start', help='with --store: first time read, e.g. 2016-01-02 or 2016-01-02T15:00')
+    analyze.add_argument('--end', help='with --store: last time read')
+    analyze.add_argument('--resamples', type=int, default=0, help='mealbars and rate: permutation test and bootstrap '
+                                                                  'confidence interval with this many resamples, '
+                                                                  'timeline: bootstrap confidence interval of each bin')
+    analyze.add_argument('--all-data', action='store_true', help='timeline: from the first to the last timestamp of '
+                                                                 'all files instead of their common time period, a bin '
+                                                                 'is averaged over the files recording at that time')
+    analyze.add_argument('--seed', type=int, default=0, help='random seed of the resamples (default: 0)')
+    analyze.add_argument('--resample-workers', type=int, help='number of processes for the resamples')
+    analyze.add_argument('--profile', action='store_true', help='print time, memory, rows and mice of each step '
+                                                                '(also on with the FEDPY_PROFILE environment variable)')
+    analyze.add_argument('--trace', help='with --profile: JSON file for the steps in the Chrome trace format')
+    analyze.add_argument('--cprofile', help='with --profile: folder for a cProfile dump of each step')
+    live = commands.add_parser('live', help='plot the timeline of a folder while FED writes the files (needs a display)')
+    live.add_argument('folder', help='folder with csv files')
+    live.add_argument('--bin', type=int, default=DEFAULT_BINS['timeline'], help='time bin in seconds (default: 1800)')
+    live.add_argument('--lights-out', type=float, default=DEFAULTS['lights_out'], help='lights out hour')
+    live.add_argument('--lights-on', type=float, default=DEFAULTS['lights_on'], help='lights on hour')
+    live.add_argument('--hours', type=float, default=24, help='hours shown (default: 24)')
+    live.add_argument('--fps', type=float, default=2, help='frames per second (default: 2)')
+    watch = commands.add_parser('watch', help='follow many devices(csv files or folders) and print their statistics')
+    watch.add_argument('sources', nargs='*', help='csv files or folders with csv files')
+    watch.add_argument('--bin', type=int, default=DEFAULT_BINS['rate'], help='time bin in seconds (default: 3600)')
+    watch.add_argument('--hours', type=float, default=24, help='hours kept in the rolling bins (default: 24)')
+    watch.add_argument('--lights-out', type=float, default=DEFAULTS['lights_out'], help='lights out hour')
+    watch.add_argument('--lights-on', type=float, default=DEFAULTS['lights_on'], help='lights on hour')
+    watch.add_argument('--meal-interval', type=int, default=DEFAULTS['meal_interval'], help='time between meals in sec')
+    watch.add_argument('--meal-size', type=float, default=DEFAULTS['meal_size'], help='meal in grams')
+    watch.add_argument('--pellet-weight', type=float, default=DEFAULTS['pellet_weight'], help='pellet in grams')
+    watch.add_argument('--poll', type=float, default=1.0, help='seconds between polls (default: 1)')
+    watch.add_argument('--duration', type=float, help='stop after this many seconds (default: run until Ctrl+C)')
+    watch.add_argument('--simulate', type=int, default=0, help='number of simulated devices to add')
+    watch.add_argument('--sim-dir', default='.', help='folder for the files of the simulated devices')
+    watch.add_argument('--speed', type=float, default=600, help='simulated seconds per second (default: 600)')
+    synth = commands.add_parser('synth', help='write a folder of synthetic FED csv files')
+    synth.add_argument('folder')
+    synth.add_argument('--devices', type=int, default=8, help='number of files (default: 8)')
+    synth.add_argument('--days', type=float, default=7, help='days recorded (default: 7)')
+    synth.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    bench = commands.add_parser('bench', help='time the main steps on synthetic data, save the results as JSON')
+    bench.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='scales (default: 1 10 100)')
+    bench.add_argument('--repeat', type=int, default=3, help='runs of each benchmark (default: 3)')
+    bench.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    bench.add_argument('--only', nargs='+', help='names of the benchmarks to run')
+    bench.add_argument('--out', help='JSON file for the results')
+    bench.add_argument('--compare', help='JSON file of earlier results to compare with')
+    store = commands.add_parser('store', help='export folders into a Parquet store partitioned by cohort and date '
+                                              '(needs pyarrow), without folders: list the cohorts of the store')
+    store.add_argument('root', help='folder of the store')
+    store.add_argument('folders', nargs='*', help='folders with csv files')
+    store.add_argument('--cohort', help='cohort of all the folders (default: the name of each folder)')
+    store.add_argument('--workers', type=int, help='number of csv files read at the same time')
+    sweep = commands.add_parser('sweep', help='meal bar statistics of a folder for every combination of meal criteria')
+    sweep.add_argument('folder', help='folder with csv files')
+    sweep.add_argument('--meal-intervals', type=int, nargs='+', default=[DEFAULTS['meal_interval']],
+                       help='times between meals in sec, e.g. 600 900 1800')
+    sweep.add_argument('--meal-sizes', type=float, nargs='+', default=[DEFAULTS['meal_size']], help='meals in grams')
+    sweep.add_argument('--pellet-weights', type=float, nargs='+', default=[DEFAULTS['pellet_weight']],
+                       help='pellets in grams')
+    sweep.add_argument('--lights-out', type=float, default=DEFAULTS['lights_out'], help='lights out hour')
+    sweep.add_argument('--lights-on', type=float, default=DEFAULTS['lights_on'], help='lights on hour')
+    sweep.add_argument('--out', help='csv file for the table (default: printed)')
+    sweep.add_argument('--workers', type=int, help='number of meal intervals done at the same time')
+    sweep.add_argument('--processes', action='store_true', help='in processes instead of threads')
+    golden = commands.add_parser('golden', help='compare the results with the original scripts on synthetic and given folders')
+    golden.add_argument('folders', nargs='*', help='folders with recorded csv files')
+    golden.add_argument('--seeds', type=int, nargs='*', default=[0, 1, 2], help='seeds of the synthetic folders (default: 0 1 2)')
+    golden.add_argument('--all', action='store_true', help='also list the steps without reference(the scripts failed)')
+    return parser
+
+def _synth(args):
+    from .synth import write_folder
+    for el in write_folder(args.folder, args.devices, args.days, args.seed):
+        print(el)
+    return 0
+
+def _bench(args):
+    from . import bench
+    results = bench.run(args.scales, args.repeat, args.seed, args.only)
+    if args.out is not None:
+        bench.save(results, args.out)
+    if args.compare is not None:
+        print('\n'.join(bench.compare(bench.load(args.compare), results)))
+    return 0
+
+# exit status is 1 if any folder failed
+def _store(args):
+    from . import store
+    if len(args.folders) == 0:
+        for el in store.cohorts(args.root):
+            print(el)
+        return 0
+    failed = 0
+    for folder in args.folders:
+        try:
+            result = store.export_folder(folder, args.root, args.cohort, args.workers)
+        except FedError as e:
+            failed += 1
+            print('%s: %s' % (folder, str(e).replace('\n', ' ')), file=sys.stderr)
+            continue
+        print('%s: %d rows of %d files in cohort %s' % (folder, result.rows, len(result.devices), result.cohort))
+        for el in result.failures:
+            print('    %s: %s' % el, file=sys.stderr)
+        failed += len(result.failures) != 0
+    return 1 if failed else 0
+
+# exit status is 1 if the folder could not be analyzed
+def _sweep(parser, args):
+    from .sweep import sweep_meals
+    try:
+        for interval in args.meal_intervals:
+            for size in args.meal_sizes:
+                for weight in args.pellet_weights:
+                    check_options(args.lights_out, args.lights_on, meal_interval=interval, meal_size=size,
+                                  pellet_weight=weight)
+    except FedError as e:
+        parser.error(str(e).replace('\n', ' '))
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers has to be at least 1')
+    try:
+        rows = sweep_meals(read_all(args.folder), args.lights_out, args.lights_on, args.meal_intervals,
+                           args.meal_sizes, args.pellet_weights, args.workers, args.processes)
+    except (FedError, OSError) as e:
+        print('%s: %s' % (args.folder, str(e).replace('\n', '\n    ')), file=sys.stderr)
+        return 1
+    if args.out is None:
+        _write_sweep(csv.writer(sys.stdout), rows)
+    else:
+        with open(args.out, 'w', newline='') as f:
+            _write_sweep(csv.writer(f), rows)
+    return 0
+
+# exit status is 1 if any step differs
+def _golden(args):
+    from . import golden
+    checks = golden.run(args.folders, args.seeds)
+    print('\n'.join(golden.report(checks, args.all)))
+    return 1 if any(el.equal is False for el in checks) else 0
+
+# prints the statistics of a device
+def _print_device(device):
+    stats = device.stats
+    print('%s: %d pellets, last %s, %.2f pellets/bin, %d meals(%d dark, %d light), %.1f pellets/meal, %.0f s/meal'
+          % (device.filename, stats.pellets, stats.last, stats.rate, stats.meals, stats.dark_meals, stats.light_meals,
+             stats.pellets_per_meal, stats.meal_duration))
+
+async def _watch(args):
+    stop = asyncio.Event()
+    sources = list(args.sources)
+    tasks = list()
+    for i in range(args.simulate):
+        filename = os.path.join(args.sim_dir, 'SIM%d.csv' % i)
+        sources.append(filename)
+        tasks.append(asyncio.ensure_future(simulate_device(filename, args.speed, seed=i, stop=stop)))
+    watcher = Watcher(sources, args.bin, int(args.hours * 3600), meal_interval=args.meal_interval,
+                      min_pellets=gram2pellet(args.meal_size, args.pellet_weight),
+                      schedule=Schedule(args.lights_out, args.lights_on), poll=args.poll,
+                      on_update=_print_device)
+    running = asyncio.ensure_future(watcher.run(stop))
+    try:
+        await asyncio.wait_for(asyncio.shield(running), args.duration)
+    except asyncio.TimeoutError:
+        pass
+    stop.set()
+    await asyncio.gather(running, *tasks)
+
+# follows devices until Ctrl+C or --duration, returns exit status
+def _run_watch(parser, args):
+    try:
+        check_options(args.lights_out, args.lights_on, bin=args.bin, meal_interval=args.meal_interval,
+                      meal_size=args.meal_size, pellet_weight=args.pellet_weight)
+    except FedError as e:
+        parser.error(str(e).replace('\n', ' '))
+    if len(args.sources) == 0 and args.simulate <= 0:
+        parser.error('give csv files or folders to watch, or --simulate')
+    try:
+        asyncio.run(_watch(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+# live timeline of a folder, returns exit status
+def _live(parser, args):
+    try:
+        check_options(args.lights_out, args.lights_on, bin=args.bin)
+    except FedError as e:
+        parser.error(str(e).replace('\n', ' '))
+    if args.hours <= 0 or args.fps <= 0:
+        parser.error('--hours and --fps have to be more than 0')
+    try:
+        files = csv_files(args.folder)
+    except OSError:
+        files = []
+    if len(files) == 0:
+        print('%s: No file was read' % args.folder, file=sys.stderr)
+        return 1
+    import matplotlib.pyplot as plt
+    from .plots import live_timeline
+    fig = live_timeline([os.path.join(args.folder, el) for el in files], args.bin,
+                        Schedule(args.lights_out, args.lights_on), int(args.hours * 3600), args.fps)
+    plt.show()
+    return 0
+
+# returns a name of the output subfolder for each folder, unique even if two folders have the same name
+def _output_names(folders):
+    names = list()
+    for folder in folders:
+        name = os.path.basename(os.path.normpath(folder)) or 'data'
+        base, i = name, 2
+        while name in names:
+            name = '%s_%d' % (base, i)
+            i += 1
+        names.append(name)
+    return names
+
+# analyze a single folder and save the results in out_dir
+def _run_folder(folder, out_dir, args, plots):
+    analyze, write_table, plot_name = ANALYSES[args.analysis]
+    if args.store is not None:
+        from .store import read_store
+        data = read_store(args.store, folder, args.start, args.end).data
+    else:
+        data = read_all(folder, args.workers, args.processes, not args.no_cache, args.mmap)
+    result = analyze(data, args)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, args.analysis + '.csv'), 'w', newline='') as f:
+        write_table(csv.writer(f), result)
+    if 'table' in result:
+        with open(os.path.join(out_dir, args.analysis + '_stats.csv'), 'w', newline='') as f:
+            _write_comparisons(csv.writer(f), result['table'])
+    if plots is not None:
+        fig = getattr(plots, plot_name)(result)
+        with profiling.stage('savefig'):    # matplotlib draws the figure here
+            fig.savefig(os.path.join(out_dir, args.analysis + '.' + args.format))
+        plots.plt.close(fig)
+
+# returns exit status
+def main(argv=None):
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command == 'live':
+        return _live(parser, args)
+    if args.command == 'watch':
+        return _run_watch(parser, args)
+    if args.command == 'synth':
+        return _synth(args)
+    if args.command == 'bench':
+        return _bench(args)
+    if args.command == 'golden':
+        return _golden(args)
+    if args.command == 'store':
+        return _store(args)
+    if args.command == 'sweep':
+        return _sweep(parser, args)
+    if args.bin is None:
+        args.bin = DEFAULT_BINS.get(args.analysis)
+    try:
+        if args.analysis in ('meals', 'mealbars'):
+            check_options(args.lights_out, args.lights_on, meal_interval=args.meal_interval,
+                          meal_size=args.meal_size, pellet_weight=args.pellet_weight)
+        else:
+            check_options(args.lights_out, args.lights_on, bin=args.bin)
+    except FedError as e:
+        parser.error(str(e).replace('\n', ' '))
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers has to be at least 1')
+    if args.resamples < 0 or (args.resample_workers is not None and args.resample_workers < 1):
+        parser.error('--resamples can not be negative and --resample-workers has to be at least 1')
+    if args.mmap and (args.no_cache or args.store is not None):
+        parser.error('--mmap needs the cache of the folders(not with --no-cache or --store)')
+    if (args.start is not None or args.end is not None) and args.store is None:
+        parser.error('--start and --end need --store')
+    for el in (args.start, args.end):
+        try:
+            if el is not None:
+                np.datetime64(el, 's')
+        except ValueError:
+            parser.error('wrong time: %s' % el)
+    if args.profile or args.trace is not None or args.cprofile is not None:
+        profiling.enable(args.trace, args.cprofile, at_exit=False)
+    plots = None
+    if not args.no_plot:
+        # no display needed
+        import matplotlib
+        matplotlib.use('Agg')
+        from . import plots
+    failed = 0
+    for folder, name in zip(args.folders, _output_names(args.folders)):
+        try:
+            _run_folder(folder, os.path.join(args.out, name), args, plots)
+        except (FedError, OSError) as e:
+            failed += 1
+            print('%s: %s' % (folder, str(e).replace('\n', '\n    ')), file=sys.stderr)
+        else:
+            print('%s: saved in %s' % (folder, os.path.join(args.out, name)))
+    if profiling.enabled():
+        profiling.report()
+    if failed:
+        print('%d of %d folders failed' % (failed, len(args.folders)), file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,8 @@
+'''
+Purpose: exceptions raised by fedpy. The package never opens a window or exits,
+the scripts catch FedError and show it to the user (popup_msg).
+'''
+
+# raised when the data can not be read or there is not enough of it for the analysis
+class FedError(Exception):
+    pass
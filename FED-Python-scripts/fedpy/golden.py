@@ -0,0 +1,257 @@
+'''
+Purpose: golden output check of the package against the original functions of the scripts (legacy.py).
+Both run the same steps on the same folders, synthetic ones written with a seed and recorded ones,
+and every result(timestamps, intervals, bin counts, meals, night counts, rates) is compared element by element:
+timestamps and counts have to be equal, rates and errors equal up to rounding(1e-12 relative).
+The edge folders put many pellets exactly on whole hours, so the quirks of the scripts are hit on purpose:
+pellets on the edges of the nights and days(both ends included), at the common start(fill_bins index tick-1
+counts them in the last bin) and repeated timestamps at the end of a window(list.index in extract_times).
+A step where both raise an exception(e.g. no full night) counts as equal, the steps using its result are skipped.
+A step where only the scripts fail has no reference: e.g. get_nights_rate, where the scripts raise IndexError if a pellet
+of another mouse is before the common start of a night(tick-1 below -number of bins), or full_windows when the scripts
+made a night ending before it starts(lights out before noon and the data starting after lights on).
+'''
+
+import os
+import sys
+import tempfile
+from collections import namedtuple
+import numpy as np
+import matplotlib.dates as md
+from . import legacy
+from .io import read_all, format_fed_rows
+from .cache import clear_cache
+from .times import get_border_times, extract_times, get_intervals, reverse_intervals, get_12h_intervals, get_days_and_nights
+from .schedule import Schedule, full_windows
+from .bins import get_number_of_bins, fill_bins
+from .meals import gram2pellet, segment_meals, night_count
+from .rate import get_nights_rate
+from .synth import write_folder, generate_device
+
+# lights out and lights on hours(lights out before and after noon), time bins in seconds,
+# meal criteria(meal interval in seconds, meal size and pellet weight in grams)
+LIGHTS = ((15, 3), (19, 7), (7, 19))
+BINS = (900, 3600)
+MEALS = ((1800, 0.3, 0.02), (600, 0.02, 0.02))
+RTOL = 1e-12
+
+# result of a single step on a single folder
+# equal: True, False, or None if there is no reference(the scripts failed), detail: where the results differ
+Check = namedtuple('Check', ['dataset', 'step', 'equal', 'detail'])
+
+_EPOCH = md.date2num(np.datetime64('1970-01-01T00:00:00'))
+
+# returns seconds since 1970(int64 array) of timestamps of the scripts(datetime, date numbers) or of the package(datetime64)
+def _seconds(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[s]').astype(np.int64)
+    if values.dtype.kind == 'O':
+        return np.array([round(el.timestamp()) for el in values.ravel()], dtype=np.int64).reshape(values.shape)
+    return np.round((values - _EPOCH) * 86400).astype(np.int64)
+
+# returns where two arrays differ('' if they are the same), floats are compared with RTOL
+def _diff(old, new):
+    old, new = np.asarray(old), np.asarray(new)
+    if old.shape != new.shape:
+        return 'shape %s != %s' % (old.shape, new.shape)
+    if old.dtype.kind == 'f' or new.dtype.kind == 'f':
+        same = np.isclose(old, new, rtol=RTOL, atol=0, equal_nan=True)
+    else:
+        same = old == new
+    if same.all():
+        return ''
+    where = tuple(int(el) for el in np.argwhere(~same)[0])
+    return 'at %s: %s != %s(%d elements differ)' % (where, old[where], new[where], (~same).sum())
+
+# compares lists of arrays(e.g. one per file), returns '' or where they differ
+def _diff_lists(old, new, convert=np.asarray):
+    if len(old) != len(new):
+        return 'length %d != %d' % (len(old), len(new))
+    for i, (a, b) in enumerate(zip(old, new)):
+        detail = _diff(convert(a), convert(b))
+        if detail:
+            return '[%d] %s' % (i, detail)
+    return ''
+
+def _times(old, new):
+    return _diff_lists(old, new, _seconds)
+
+def _intervals(old, new):
+    return _diff(_seconds(old).reshape(-1, 2), _seconds(new).reshape(-1, 2))
+
+# bins of the scripts are a list of arrays, of the package a 2-D array
+def _bins(old, new):
+    return _diff(np.array(old).reshape(len(old), -1), new)
+
+# meals of the scripts(result of get_by_meal_size: sizes and timestamps of each meal, per mouse)
+# against segment_meals(structured array of all mice)
+def _meals(old, new):
+    sizes, intervals = old
+    if len(sizes) != len(new[1]):
+        return 'mice %d != %d' % (len(sizes), len(new[1]))
+    meals = new[0]
+    for i in range(len(sizes)):
+        mine = meals[meals['mouse'] == i]
+        starts = [el[0] for el in intervals[i]]
+        ends = [el[-1] for el in intervals[i]]
+        for name, a, b in (('pellets', sizes[i], mine['pellets']), ('start', _seconds(starts), _seconds(mine['start'])),
+                           ('end', _seconds(ends), _seconds(mine['end']))):
+            detail = _diff(a, b)
+            if detail:
+                return 'mouse %d %s %s' % (i, name, detail)
+    return ''
+
+# night_count: meal sizes and durations of each mouse
+def _night_count(old, new):
+    return _diff_lists(old[0], new[0]) or _diff_lists(old[1], new[1])
+
+# get_nights_rate: average, std err and the rates of every mouse and night
+def _rate(old, new):
+    return _diff(old[:2], new[:2]) or _diff(old[2], new[2])
+
+# runs a step of the scripts and of the package, adds its Check to checks and returns a tuple of both results,
+# or None if they differ or raised(the steps using the results are skipped)
+def _step(checks, dataset, step, old, new, compare):
+    results, errors = [], []
+    for function in (old, new):
+        try:
+            results.append(function())
+            errors.append(None)
+        except Exception as e:
+            results.append(None)
+            errors.append('%s: %s' % (type(e).__name__, str(e).replace('\n', ' ')))
+    if errors[0] is not None and errors[1] is not None:
+        checks.append(Check(dataset, step, True, 'both raised(%s; %s)' % tuple(errors)))
+        return None
+    if errors[0] is not None:
+        checks.append(Check(dataset, step, None, 'no reference, scripts raised %s' % errors[0]))
+        return None
+    if errors[1] is not None:
+        checks.append(Check(dataset, step, False, 'package raised %s' % errors[1]))
+        return None
+    detail = compare(*results)
+    checks.append(Check(dataset, step, not detail, detail))
+    return None if detail else tuple(results)
+
+# compares all steps of the scripts and of the package on a single folder, returns list of Check
+# dataset: name in the checks(default: the folder), lights, bins, meals: cases to run(see LIGHTS, BINS, MEALS)
+def check_folder(folder, dataset=None, lights=LIGHTS, bins=BINS, meals=MEALS):
+    dataset = dataset or folder
+    checks = list()
+    data = _step(checks, dataset, 'read_all', lambda: legacy.read_all(folder), lambda: read_all(folder, cache=False), _times)
+    if data is None:
+        return checks
+    # the cache(filled by the first read, used by the second) has to give the same timestamps
+    read_all(folder, cache=True)
+    _step(checks, dataset, 'read_all(cached)', lambda: data[0], lambda: read_all(folder, cache=True), _times)
+    borders = _step(checks, dataset, 'get_border_times', lambda: legacy.get_border_times(data[0]),
+                    lambda: get_border_times(data[1]), _times)
+    if borders is None:
+        return checks
+    (start, end), (start2, end2) = borders
+    common = _step(checks, dataset, 'extract_times', lambda: legacy.extract_times(data[0], start, end),
+                   lambda: extract_times(data[1], start2, end2), _times)
+    if common is None:
+        return checks
+    for bin in bins:
+        _step(checks, dataset, 'fill_bins(bin=%d)' % bin,
+              lambda: legacy.fill_bins(legacy.get_number_of_bins(end, start, bin), common[0], start, bin),
+              lambda: fill_bins(get_number_of_bins(end2, start2, bin), common[1], start2, bin), _bins)
+    for lights_out, lights_on in lights:
+        case = 'lights %d-%d' % (lights_out, lights_on)
+        nights = _step(checks, dataset, 'get_intervals(%s)' % case,
+                       lambda: legacy.get_intervals(common[0][0], lights_out, lights_on, start, end),
+                       lambda: get_intervals(common[1][0], lights_out, lights_on, start2, end2), _intervals)
+        if nights is None:
+            continue
+        days = _step(checks, dataset, 'reverse_intervals(%s)' % case, lambda: legacy.reverse_intervals(start, end, nights[0]),
+                     lambda: reverse_intervals(start2, end2, nights[1]), _intervals)
+        if days is None:
+            continue
+        full_nights = (legacy.get_12h_intervals(nights[0]), get_12h_intervals(nights[1]))
+        full_days = (legacy.get_12h_intervals(days[0]), get_12h_intervals(days[1]))
+        if any(el[0] > el[1] for el in nights[0]):
+            checks.append(Check(dataset, 'full_windows(%s)' % case, None, 'no reference, scripts made a night ending before it starts'))
+        else:
+            _step(checks, dataset, 'full_windows(%s)' % case, lambda: full_nights[0] + full_days[0],
+                  lambda: sum(full_windows(Schedule(lights_out, lights_on), start2, end2), []), _intervals)
+        cycles = _step(checks, dataset, 'get_days_and_nights(%s)' % case,
+                       lambda: legacy.get_days_and_nights(common[0], full_nights[0], full_days[0]),
+                       lambda: get_days_and_nights(common[1], full_nights[1], full_days[1]), _times)
+        if cycles is None:
+            continue
+        # both trim the longer list in place(del full_days[-1])
+        for name, old, new in (('nights', full_nights[0], full_nights[1]), ('days', full_days[0], full_days[1])):
+            detail = _intervals(old, new)
+            checks.append(Check(dataset, 'full %s after get_days_and_nights(%s)' % (name, case), not detail, detail))
+        for bin in bins:
+            for name, old, new in (('nights', full_nights[0], full_nights[1]), ('days', full_days[0], full_days[1])):
+                legacy.bin = bin
+                _step(checks, dataset, 'get_nights_rate(%s, %s, bin=%d)' % (name, case, bin),
+                      lambda: legacy.get_nights_rate(cycles[0], old), lambda: get_nights_rate(cycles[1], new, bin), _rate)
+        for interval, meal_size, pellet_weight in meals:
+            meal_case = '%s, interval=%d, meal=%gg' % (case, interval, meal_size)
+            found = _step(checks, dataset, 'meals(%s)' % meal_case,
+                          lambda: legacy.get_by_meal_size(legacy.get_by_meal_interval(cycles[0], interval), meal_size, pellet_weight),
+                          lambda: (segment_meals(cycles[1], interval, gram2pellet(meal_size, pellet_weight)), cycles[1]),
+                          _meals)
+            if found is None:
+                continue
+            for name, old, new in (('nights', full_nights[0], full_nights[1]), ('days', full_days[0], full_days[1])):
+                _step(checks, dataset, 'night_count(%s, %s)' % (name, meal_case),
+                      lambda: legacy.night_count(found[0][0], found[0][1], old),
+                      lambda: night_count(found[1][0], new, len(cycles[1])), _night_count)
+    return checks
+
+# writes a synthetic folder(like synth.write_folder) where the first pellet of each file and about `snap` of all pellets
+# are moved to the nearest whole hour: the common start, the window edges and the bin edges all get pellets on them
+def write_edge_folder(path, devices=8, days=7, seed=0, snap=0.1):
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok=True)
+    for i in range(devices):
+        first = np.datetime64('2016-01-01T09:00:00', 's') + np.timedelta64(3600 * int(rng.integers(0, 6)), 's')
+        times, pellets, delays = generate_device(rng, first, days)
+        seconds = times.astype(np.int64)
+        snapped = rng.random(len(seconds)) < snap
+        snapped[0] = True
+        seconds[snapped] = (seconds[snapped] + 1800) // 3600 * 3600
+        with open(os.path.join(path, 'FED%d.csv' % i), 'wb') as f:
+            f.write(format_fed_rows(np.sort(seconds).astype('datetime64[s]'), pellets, delays, header=True))
+
+# checks synthetic folders(for each seed a folder of synth.write_folder and an edge folder) and recorded folders
+# returns list of Check, directory: where the synthetic folders are written(default: a temporary folder)
+def run(folders=(), seeds=(0, 1, 2), lights=LIGHTS, bins=BINS, meals=MEALS, directory=None, verbose=True):
+    checks = list()
+    with tempfile.TemporaryDirectory() as tmp:
+        datasets = list()
+        for seed in seeds:
+            path = os.path.join(directory or tmp, 'synth%d' % seed)
+            write_folder(path, seed=seed)
+            datasets.append(('synthetic seed %d' % seed, path))
+            path = os.path.join(directory or tmp, 'edges%d' % seed)
+            write_edge_folder(path, seed=seed)
+            datasets.append(('edges seed %d' % seed, path))
+        synthetic = len(datasets)
+        datasets.extend((folder, folder) for folder in folders)
+        for i, (name, path) in enumerate(datasets):
+            found = check_folder(path, name, lights, bins, meals)
+            if i < synthetic:
+                clear_cache(path)   # the cache of a synthetic folder is not used again
+            if verbose:
+                print('%s: %s' % (name, _counts(found)), file=sys.stderr)
+            checks.extend(found)
+    return checks
+
+def _counts(checks):
+    return '%d steps equal, %d differ, %d without reference' % (sum(el.equal is True for el in checks),
+                                                                  sum(el.equal is False for el in checks),
+                                                                  sum(el.equal is None for el in checks))
+
+# returns lines describing the steps that differ, and the totals
+# all: also list the steps without reference
+def report(checks, all=False):
+    lines = ['%s: %s: %s' % (el.dataset, el.step, el.detail) for el in checks
+             if el.equal is False or (all and el.equal is None)]
+    lines.append(_counts(checks))
+    return lines
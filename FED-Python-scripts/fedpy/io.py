@@ -0,0 +1,228 @@
+'''
+Purpose: columnar reader for the csv files written by FED's SD card
+(Time,Pellet Count,Pellet Drop Delay). The whole file is matched in a single
+pass and the timestamps are built as one numpy datetime64[s] array, instead of
+calling strptime on every row.
+'''
+
+import os
+import re
+import fnmatch
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+from .errors import FedError
+from .profiling import stage
+from .cache import (cache_dir, content_hash, load_index, save_index, load_entry, lookup, lookup_pellets, store,
+                    store_pellets, evict, MAX_BYTES)
+
+# parsed columns of a single FED file
+# times: datetime64[s] array, pellets: pellet count, delays: pellet drop delay (-1 if the column is missing)
+FedData = namedtuple('FedData', ['times', 'pellets', 'delays'])
+
+# timestamp as written by the firmware: %m/%d/%Y %H:%M:%S (fields are not zero padded)
+_TIME = rb'(\d{1,2})/(\d{1,2})/(\d{4}) (\d{1,2}):(\d{1,2}):(\d{1,2})'
+
+# one data row: timestamp,pellet count[,pellet drop delay[,...]]
+# header, empty and broken rows simply do not match, so they are skipped in the same pass
+_ROW = re.compile(rb'^' + _TIME + rb',[ \t]*([+-]?\d+)[ \t]*(?:,[ \t]*([+-]?\d+)?[^\r\n]*)?\r?$', re.M)
+
+_DATE = re.compile(rb'^' + _TIME + rb'$')
+
+HEADER = b'Time,Pellet Count,Pellet Drop Delay\r\n'
+
+# builds datetime64[s] timestamps from integer columns: month, day, year, hour, minute, second
+# returns a tuple: timestamps and a boolean array, False for rows strptime would have rejected
+def _assemble_times(month, day, year, hour, minute, second):
+    # months since 1970 -> first day of the month -> add days, then seconds
+    months = ((year - 1970) * 12 + (month - 1)).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    seconds = (hour * 3600 + minute * 60 + second).astype('timedelta64[s]')
+    times = days.astype('datetime64[s]') + seconds
+    # e.g. 13/01/2016 or 02/30/2016
+    valid = ((month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)
+             & (days.astype('datetime64[M]') == months))
+    return times, valid
+
+# returns FedData built from the raw bytes of a FED csv file
+def parse_fed_bytes(raw):
+    rows = _ROW.findall(raw)
+    fields = np.array(rows, dtype=bytes).reshape(len(rows), 8)
+    numbers = fields[:, :7].astype(np.int64)
+    delays = np.where(fields[:, 7] == b'', b'-1', fields[:, 7]).astype(np.int64)
+    times, valid = _assemble_times(*numbers[:, :6].T)
+    pellets = numbers[:, 6]
+    if not valid.all():
+        return FedData(times[valid], pellets[valid], delays[valid])
+    return FedData(times, pellets, delays)
+
+# returns rows of a FED csv file as bytes, the way the firmware writes them(fields not zero padded, \r\n)
+# takes datetime64 timestamps, pellet counts and pellet drop delays, header=True adds the header row first
+def format_fed_rows(times, pellets, delays, header=False):
+    fields = np.asarray(times, dtype='datetime64[s]').astype(object)
+    rows = ['%d/%d/%d %d:%d:%d,%d,%d\r\n' % (t.month, t.day, t.year, t.hour, t.minute, t.second, p, d)
+            for t, p, d in zip(fields, pellets, delays)]
+    return (HEADER if header else b'') + ''.join(rows).encode()
+
+# returns FedData with all rows of a single FED csv file
+# takes a path to the csv file as an argument
+def read_fed_csv(filename):
+    with open(filename, 'rb') as csvfile:
+        return parse_fed_bytes(csvfile.read())
+
+# converts timestamps in FED format(%m/%d/%Y %H:%M:%S) into datetime64[s]
+# takes a single string or a list of strings, returns a scalar or an array(NaT where the string is not a valid date)
+def convertTime(date):
+    single = isinstance(date, (str, bytes))
+    dates = [date] if single else list(date)
+    fields = np.zeros((len(dates), 6), dtype=np.int64)
+    matched = np.zeros(len(dates), dtype=bool)
+    for i, el in enumerate(dates):
+        found = _DATE.match(el.strip().encode() if isinstance(el, str) else el.strip())
+        if found:
+            fields[i] = found.groups()
+            matched[i] = True
+    times, valid = _assemble_times(*fields.T)
+    times[~(matched & valid)] = np.datetime64('NaT')
+    return times[0] if single else times
+
+# returns a sorted datetime64[s] array with timestamps of all rows of FedData where pellet count is not 0
+def _pellet_times(fed):
+    return np.sort(fed.times[fed.pellets != 0], kind='stable')
+
+# get data from a file (only the first column=date)
+# takes a csv file as an argument
+# returns a sorted datetime64[s] array with timestamps of all rows where pellet count is not 0
+def get_data(filename):
+    return _pellet_times(read_fed_csv(filename))
+
+# returns names of the csv files of a folder in the os.listdir order, which is the row order in the plots
+def csv_files(path):
+    return [file for file in os.listdir(path) if fnmatch.fnmatch(file, '*.csv')]
+
+# result of read_folder function
+# files: names of the files that were read, data: their arrays of timestamps(same order),
+# failures: list of ReadFailure of the files that could not be read
+ReadResult = namedtuple('ReadResult', ['files', 'data', 'failures'])
+ReadFailure = namedtuple('ReadFailure', ['file', 'reason'])
+
+# returns FedData with the rows of both FedData
+def _join(first, second):
+    return FedData(*(np.concatenate((a, b)) for a, b in zip(first, second)))
+
+# returns a tuple: FedData of the whole file(None if the file failed), the reason of the failure
+# and a tuple to cache: FedData of the complete rows(the file up to its last newline), their content hash
+# and their length in bytes
+# cached: None, or a tuple of the cache folder and the cache entry of the file, if the file still starts with
+# the bytes of the entry(e.g. FED_DATA.csv growing during the experiment) only the new rows are parsed
+def _parse_file(filename, cached=None):
+    try:
+        with open(filename, 'rb') as csvfile:
+            raw = csvfile.read()
+    except OSError as e:
+        return None, e.strerror or str(e), None
+    offset = raw.rfind(b'\n') + 1      # a row that is still being written is parsed, but not cached
+    complete = None
+    entry = cached[1] if cached is not None else None
+    if entry is not None and entry.get('offset') is not None and entry['offset'] <= offset \
+            and content_hash(raw[:entry['offset']]) == entry['hash']:
+        old = load_entry(*cached)
+        if old is not None:
+            complete = _join(FedData(*old), parse_fed_bytes(raw[entry['offset']:offset]))
+            digest = entry['hash'] if entry['offset'] == offset else content_hash(raw[:offset])
+    if complete is None:
+        complete = parse_fed_bytes(raw[:offset])
+        digest = content_hash(raw[:offset])
+    fed = complete if offset == len(raw) else _join(complete, parse_fed_bytes(raw[offset:]))
+    return fed, None, (complete, digest, offset)
+
+# reads all csv files from the folder, several files at a time, and returns ReadResult
+# files are kept in the os.listdir order, which is the row order in the plots, whatever file is parsed first
+# workers: number of files read at the same time(None: as many as the pool decides, 1: one after another)
+# processes: use a process pool instead of a thread pool(the calling script needs an if __name__ == '__main__' guard
+# on Windows), threads are enough as the parsing is done by re and numpy on whole files
+# cache: keep the parsed files in the cache folder of the data folder(in the cache folder of the user, see cache.py),
+# only new and changed files are parsed(only the new rows of files that grew), cache_bytes is the size cap of the
+# cache folder
+# mmap: return the timestamps as read only memory-mapped arrays of the cache folder(needs cache), unchanged files are
+# only hashed, not loaded, e.g. for recordings too long to keep in memory(files still being written, or a cache
+# folder that can not be written, give arrays in memory as usual)
+def read_folder(path, workers=None, processes=False, cache=True, cache_bytes=MAX_BYTES, mmap=False):
+    files = csv_files(path)
+    paths = [os.path.join(path, file) for file in files]
+    directory = cache_dir(path)
+    index = load_index(directory) if cache else dict()
+    parsed = [None] * len(files)
+    mapped = [None] * len(files)
+    stats = [None] * len(files)
+    for i in range(len(files)):
+        try:
+            stats[i] = os.stat(paths[i])
+        except OSError:
+            continue    # reported by _parse_file
+        if cache and mmap:
+            mapped[i] = lookup_pellets(directory, index, files[i], stats[i], paths[i])
+            if mapped[i] is not None:
+                parsed[i] = (None, None, None)
+                continue
+        if cache:
+            columns = lookup(directory, index, files[i], stats[i], paths[i])
+            if columns is not None:
+                parsed[i] = (FedData(*columns), None, None)
+    todo = [i for i in range(len(files)) if parsed[i] is None]
+    cached = [(directory, index.get(files[i])) if cache else None for i in todo]
+    if workers == 1 or len(todo) < 2:
+        results = [_parse_file(paths[i], el) for i, el in zip(todo, cached)]
+    else:
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            results = list(executor.map(_parse_file, [paths[i] for i in todo], cached))   # in the order of todo
+    for i, result in zip(todo, results):
+        parsed[i] = result
+    if cache:
+        try:    # e.g. the cache folder can not be written, the files were read anyway
+            for i, (fed, reason, complete) in zip(todo, results):
+                if reason is None and stats[i] is not None:
+                    store(directory, index, files[i], stats[i], *complete)
+            if mmap:
+                for i in range(len(files)):
+                    if mapped[i] is None and parsed[i][1] is None and stats[i] is not None \
+                            and index.get(files[i], {}).get('offset') == stats[i].st_size:
+                        store_pellets(directory, index, files[i], _pellet_times(parsed[i][0]))
+                        mapped[i] = lookup_pellets(directory, index, files[i], stats[i], paths[i])
+            evict(directory, index, cache_bytes, keep=set(files))
+            save_index(directory, index)
+        except OSError:
+            pass
+    read, failures = list(), list()
+    for file, (fed, reason, complete), pellets in zip(files, parsed, mapped):
+        if pellets is not None:
+            data = pellets
+        else:
+            data = _pellet_times(fed) if reason is None else None
+        if reason is None and len(data) == 0:
+            reason = "no pellets"
+        if reason is None:
+            read.append((file, data))
+        else:
+            failures.append(ReadFailure(file, reason))
+    return ReadResult([el[0] for el in read], [el[1] for el in read], failures)
+
+# returns a list of arrays
+# each array contains all timestamps from a single csv file from the folder (e.g. 8files=8arrays within returned list)
+# files are read in the os.listdir order, which is the row order in the plots
+# it takes a path to the folder as an argument, and the workers, processes, cache and mmap options of read_folder function
+# raises FedError if any file gave no data, the message lists the files that failed
+def read_all(path, workers=None, processes=False, cache=True, mmap=False):
+    try:        # if user manually points to nonexistent folder
+        with stage('read_all') as s:
+            result = read_folder(path, workers, processes, cache, mmap=mmap)
+            s.count(result.data)
+    except OSError:
+        raise FedError("No file was read")
+    # check if any data was read
+    if len(result.data) == 0 and len(result.failures) == 0:
+        raise FedError("No file was read")
+    if len(result.failures) != 0:
+        raise FedError("Some files were not read\n" + "\n".join("%s: %s" % el for el in result.failures))
+    return result.data
@@ -0,0 +1,365 @@
+'''
+Purpose: the original functions of the four scripts, copied unchanged (only tabs replaced with spaces),
+as the reference for golden.py. They work on lists of datetime timestamps and date numbers, like
+before the fedpy package, and are slow on purpose: do not use them for analysis, and do not "fix" them,
+the quirks(e.g. fill_bins index tick-1, inclusive window ends) are what the package has to reproduce.
+popup_msg raises FedError instead of opening a window, and bin is the module global that
+get_nights_rate uses(set from the options window in eating_rate.py).
+'''
+
+import math, csv, os, fnmatch
+import datetime as dt
+import numpy as np
+import matplotlib.dates as md
+from .errors import FedError
+
+bin = 3600      # time bin of get_nights_rate in seconds
+
+def popup_msg(msg):
+    raise FedError(msg)
+
+# Converts timestamp into a number
+def convertTime(date):
+    return md.date2num(dt.datetime.strptime(date, "%m/%d/%Y %H:%M:%S"))
+
+# get data from a file (only the first column=date)
+# takes a csv file as an argument
+# returns a list of datetime elements( all timestamps) from this file
+def get_data(filename):
+    my_cols = list()
+    with open(filename) as csvfile:
+        the_data = csv.reader(csvfile, delimiter=',')
+        for line in the_data:
+            try:
+                if int(line[1]) != 0:
+                    my_cols.append(md.num2date(convertTime(line[0]), tz=None))
+            except:
+                continue
+    return my_cols
+
+# returns a list of lists
+# each list contains all timestamps from a single csv file from the folder (e.g. 8files=8lists within returned list)
+# it takes a path to the folder as an argument
+def read_all(path):
+    try:        # if user manually points to nonexistent folder
+        # os.listdir(path) lists all files in the directory form the given path
+        directory = os.listdir(path)
+        list_all = list()
+        for file in directory:
+            # search only those that are csv files
+            if fnmatch.fnmatch(file, '*.csv'):
+                # get_data(filename) function will now read all of the timestamps from one fille
+                # and add it in the form of list to the list_all
+                list_all.append(get_data(os.path.join(path, file)))
+    except:
+        popup_msg("No file was read")
+    # check if any data was read
+    if len(list_all) == 0:
+        popup_msg("No file was read")
+    else:
+        for i in range(len(list_all)):
+            if len(list_all[i]) == 0:
+                popup_msg("Some files were not read")
+    return list_all
+
+# returns the earliest common date and latest common date
+# we are interested only in the common time period
+# takes a list of lists of timestamps as an argument (result of read_all function)
+def get_border_times(list_all):
+    # append only the first timestamps from each file
+    all_start_dates = [min(file) for file in list_all]
+    # append only the last timestamps from each file
+    all_end_dates = [max(file) for file in list_all]
+
+    # the latest date in all_start_dates will be the earliest common date
+    earliest = max(all_start_dates)     # find the earliest common
+
+    # the earliest date in all_end_dates will be the latest common date
+    latest = min(all_end_dates)     # find the latest common
+
+    return earliest, latest
+
+# returns data from start to end date only (a list of lists of timestamps)
+# takes as an argument a list of lists of timestamps (result of read_all function)
+# and the earliest and latest common dates we want to plot (results of get_border_times function)
+def extract_times(list_all, start_date, end_date):
+    extracted_data = list()
+    for el in list_all:
+        start_index = 0
+        end_index = 0
+        for timestamp in el:
+            # as soon as it finds start date, it stops iterating further
+            if timestamp >= start_date and timestamp <= end_date:
+                # get the index for the start date in that list
+                start_index = el.index(timestamp)
+                break
+        for timestamp in reversed(el):
+            # as soon as it finds end date, it stops iterating
+            if timestamp <= end_date and timestamp >= start_date:
+                # get the index for the end date in that list
+                end_index = el.index(timestamp) + 1     # add 1 for the list slicing to include that index
+                break
+        # append only lists from start to end date
+        extracted_data.append(el[start_index:end_index])
+    return extracted_data
+
+# returns list of start-end tuples representing given interval of nighttime hours (number format)
+# takes as an argument: a single list of timestamps(one sample file), start_hour=beginning of nighttime,
+# end_hour=end of nighttime(24hours:1-00), and start and end time of a whole plot(data from: get_border_times(list_all))
+def get_intervals(list_of_timestamps, start_hour, end_hour, earliest, latest):
+    dates_from_file = list()
+    interval = list()
+    date2num_begin = md.date2num(earliest)      # beginning of plot
+    date2num_end = md.date2num(latest)          # end of plot
+    # check how many dates(calendar days) are in the fed
+    for el in list_of_timestamps:
+        if el.date() not in dates_from_file:
+            dates_from_file.append(el.date())
+    # for each date in fed, create start_hour-end_hour pair of night interval (datetime, number format)
+    if start_hour >= 12:
+        for i in range(len(dates_from_file)):
+            # start interval
+            date2num = md.date2num(dt.datetime.combine(dates_from_file[i], dt.time(hour=start_hour)))
+            if (i+1) < len(dates_from_file):        # makes sure it is not the last inteval
+                # end interval
+                date2num_next = md.date2num(dt.datetime.combine(dates_from_file[i+1], dt.time(hour=end_hour)))
+            else:       ## it means it is the last interval
+                # if there is only one day on the list check if the start interval is later than beginning
+                if len(dates_from_file) == 1:
+                    temp0 = date2num if date2num >= date2num_begin else date2num_begin
+                    interval.append((temp0, date2num_end))
+                    break
+                else:
+                    if date2num <= date2num_end:
+                        interval.append((date2num, date2num_end))
+                    break
+            # if the start interval hour is later than first timestamp, set the beginning of interval to beginning of plot
+            if date2num >= date2num_begin:
+                temp0 = date2num
+                # if the next date is in the list, set it to the end of nighttime, if not set the end of plot to be the end of nighttime
+                temp1 = date2num_next if date2num_next <= date2num_end else date2num_end
+            # if the start hour on that date  was earlier than the plot, set the first available to be the beginning of nighttime
+            else:
+                temp0 = date2num_begin
+                temp1 = date2num_next if date2num_next <= date2num_end else date2num_end
+            interval.append((temp0,temp1))
+    else:   # lights out hour before noon
+        for i in range(len(dates_from_file)):
+            # start interval
+            date2num = md.date2num(dt.datetime.combine(dates_from_file[i], dt.time(hour=start_hour)))
+            # end interval
+            date2num_next = md.date2num(dt.datetime.combine(dates_from_file[i], dt.time(hour=end_hour)))
+            if (i == len(dates_from_file) - 1) or i == 0:   # for the last interval or if it is the only one
+                # if the start interval hour is later than first timestamp, set the beginning of interval to beginning of plot
+                if date2num >= date2num_begin:
+                    temp0 = date2num
+                    # if the next date is in the list, set it to the end of nighttime, if not set the end of plot to be the end of nighttime
+                    temp1 = date2num_next if date2num_next <= date2num_end else date2num_end
+                # if the start hour on that date  was earlier than the plot, set the first available to be the beginning of nighttime
+                else:
+                    temp0 = date2num_begin
+                    temp1 = date2num_next if date2num_next <= date2num_end else date2num_end
+                interval.append((temp0,temp1))
+
+            else:   # if it is not the last or first interval
+                interval.append((date2num,date2num_next))
+
+    return interval
+
+# returns daytime intervals based on nights
+# it takes as arguments start and end time of a whole plot(data from: get_border_times(list_all))=earliesr, latest
+# and nighttime intervals(result of get_intervals)
+def reverse_intervals(earliest, latest, interval):
+    daytime = list()
+    earliest = md.date2num(earliest)      # beginning of plot, convert to date
+    latest = md.date2num(latest)
+    for i in range(len(interval)):
+        if (i+1) < len(interval):   # if it is not the last interval and there are more than 1 intervals
+            if i == 0:      # if it is the first one
+                if earliest < interval[i][0]:
+                    daytime.append((earliest, interval[i][0]))
+                    daytime.append((interval[i][1],interval[i+1][0]))
+                else:
+                    daytime.append((interval[i][1],interval[i+1][0]))
+            else:
+                daytime.append((interval[i][1], interval[i+1][0]))
+        else:   # it is last one
+            if len(interval) == 1:  # if there was only one
+                if earliest < interval[i][0]:
+                    daytime.append((earliest, interval[i][0]))
+                if interval[i][1] < latest:
+                    daytime.append((interval[i][1], latest))
+            else:   # last but there were more than one
+                if interval[i][1] < latest:
+                    daytime.append((interval[i][1], latest))
+    return daytime
+
+# look for full 12 hour night periods
+def get_12h_intervals(interval):
+    my_intervals = list()
+    for el in interval:
+        # convert time number to date in order to compare, 43200sec=12hours
+        if (md.num2date(el[1]) - md.num2date(el[0])).total_seconds() == 43200:
+            my_intervals.append(el)
+    return my_intervals
+
+# returns full 12hour nights and days timestamps, where number of days = number of nights
+def get_days_and_nights(extracted_data, full_nights, full_days):
+    # make full nights equal full days
+    while (len(full_days) != len(full_nights)):
+        if len(full_days) > len(full_nights):
+            del full_days[-1]
+        else:
+            del full_nights[-1]
+
+    start = full_nights[0][0] if full_nights[0][0] < full_days[0][0] else full_days[0][0]
+    end = full_nights[-1][1] if full_nights[-1][1] > full_days[-1][1] else full_days[-1][1]
+    return extract_times(extracted_data, md.num2date(start), md.num2date(end))
+
+# function to find number of bins given 2 times and a desired time interval
+# time difference is a timedelta type, it is first converted to seconds and divided by interval in seconds
+def get_number_of_bins (latest, earliest, tinterval):
+    return int(math.floor((latest-earliest).total_seconds()/tinterval))
+
+# fill each bin(number of bins=number of time intervals) according to the data from each file
+# returns list of lists of bins (number of lists=number of files)
+# takes as arguments number of all intervals(bins calculated from get_number_of_bins function),
+# list of lists of timestamps (result of extract_times function), earliest common date, and time interval(e.g. 30min=1800sec) in seconds
+def fill_bins(intervalsNo, list_all, earliest, interval):
+    # create empty bins accorcing to the number of intervals
+    list_of_bins = [np.zeros(intervalsNo) for i in range(len(list_all))]
+    # fill the empty bins with timestamp count
+    for i in range(len(list_all)):
+        for j in range(len(list_all[i])):
+            tick = get_number_of_bins(list_all[i][j], earliest, interval)
+            if tick-1 < intervalsNo:
+                # subtract 1 from index=tick, because indexes start from 0
+                list_of_bins[i][tick-1] += 1
+    return list_of_bins
+
+# map meal size in grams to pellets number
+# takes as arguments defined size of the meal in grams and pellet weight
+# returns minimum number of pellets of defined size to be considered a meal according to the given meal size
+def gram2pellet(grams, pellet):
+    return math.ceil(grams/pellet)
+
+# takes as an argument data(list of lists=e.g.8mice with list of timestamps for each one)
+# is a result of extract_times finction(common times for all mice). Second argument is a defined interval
+# for meal in seconds(e.g. 30 min=1800sec)
+# returns a tuple of two lists(meals and durartions) that are candidates for meals and relevant time intervals
+def get_by_meal_interval(data, interval):
+    # initial all meals without checking the grams of meals
+    init_meals = []
+    # initial all time intervals for the above candidate meals
+    init_intervals = []
+    # for each of 8 mice
+    for el in data:
+        single_mouse_meals = []
+        single_mouse_intervals = []
+        temp_meal = []
+        temp_interval = []
+        for i in range(len(el)):    # for all timestamps in a mouse file
+            if (i+1) < len(el):     # check if this is not the last timestamp
+                if (el[i+1]-el[i]).total_seconds() <= interval:         # if interval between the timestamps is less than e.g. 30 min, its a meal
+                    temp_meal.append(1)             # add one pellet to the meal candidate
+                    temp_interval.append(el[i])     # add a timestamp to temp interval
+                else:       # if interval is greater than e.g. 30 min the i+1 will not be the same meal
+                    temp_meal.append(1)             # add the last pellet of the meal
+                    temp_interval.append(el[i])     # add the last timestamp to the meal
+                    single_mouse_meals.append(temp_meal)    # add a candidate meal to the single mouse meals
+                    single_mouse_intervals.append(temp_interval)
+                    temp_meal = []          # clear before the next meal
+                    temp_interval = []
+            else:       # if it is the last timestamp
+                temp_meal.append(1)             # add one pellet to the meal candidate
+                temp_interval.append(el[i])     # add a timestamp to temp interval
+                single_mouse_meals.append(temp_meal)    # add a candidate meal to the single mouse meals
+                single_mouse_intervals.append(temp_interval)
+        # end of iterating single mouse, so add data to common candidates
+        init_meals.append(single_mouse_meals)
+        init_intervals.append(single_mouse_intervals)
+    return init_meals, init_intervals
+
+# function to extract a proper meal by the defined size of the meal
+# it takes as arguments the result of get_by_meal_interval function, and meal size in grams, and size of pellet in grams
+# it returns a tuple, two lists one with proper meals and one with meal durations
+def get_by_meal_size(candidates, meal_grams, pellet_grams):
+    init_meals, init_intervals = candidates
+    extracted_meals = list()
+    extracted_intervals = list()
+    min_pellets = gram2pellet(meal_grams, pellet_grams)     # what is the min ammount of pellets for a meal
+    for i in range(len(init_meals)):
+        single_mouse_meals = []     # meals of each mouse
+        single_mouse_intervals = []
+        for j in range(len(init_meals[i])):
+            meal = sum(init_meals[i][j])
+            if meal >= min_pellets:
+                single_mouse_meals.append(meal)
+                single_mouse_intervals.append(init_intervals[i][j])
+        extracted_meals.append(single_mouse_meals)      # add all mouse meals to extracted meals
+        extracted_intervals.append(single_mouse_intervals)
+    return extracted_meals, extracted_intervals
+
+# count pellets eaten during night meals, count time of night meals
+# returns list of night meal sizes for each mouse and list of night meal durations
+def night_count(total_meals, total_intervals, intervals):
+    # e.g.8 lists of lists of night meal sizes(in pellets)/intervals of night meals
+    night_meal_count = list()
+    night_meal_duration = list()
+    for i in range(len(total_intervals)):       # e.g.8 mice
+        temp_m = list()
+        temp_i = list()
+        for j in range(len(total_intervals[i])):
+            meal_start, meal_end = total_intervals[i][j][0],total_intervals[i][j][-1]
+            for val in intervals:
+                start, end = val  # it is in number format, needs to be converted to time
+                start = md.num2date(start)
+                end = md.num2date(end)
+                if meal_start >= start and meal_start <= end:
+                    temp_m.append(total_meals[i][j])
+                    temp_i.append((meal_end - meal_start).total_seconds())
+        if temp_m != 0:
+            night_meal_count.append(temp_m)
+            night_meal_duration.append(temp_i)
+    return night_meal_count, night_meal_duration
+
+# returns  a tuple of average rate and data to calculate std error
+def get_rate(list_of_bins):
+    individual_rates = [sum(list_of_bins[i])/len(list_of_bins[i]) for i in range(len(list_of_bins))]
+    return sum(individual_rates)/len(individual_rates), individual_rates
+
+# returns average eating rate and standard error, and data to error(for ttest)
+# takes as argument extracted data(list of common timestamps for all files) and result of get_12h_intervals function
+def get_nights_rate(extracted_data, full_nights):
+    only_nights = []    # divide extracted data into single night (or day) intervals
+    for el in full_nights:
+        start, end = el
+        only_nights.append(extract_times(extracted_data, md.num2date(start), md.num2date(end)))
+    all_bins = []   # fill the bins for each night (or day) separately
+    for el in only_nights:
+        the_oldest, the_newest = get_border_times(el)
+        how_many_bins = get_number_of_bins(the_newest, the_oldest,  bin)
+        all_bins.append(fill_bins(how_many_bins, el, the_oldest, bin))
+    # calculate rates for each night/day
+    rates_per_night = [get_rate(all_bins[i]) for i in range(len(all_bins))]
+    # extract from the above tuples only rates
+    rates = [rates_per_night[i][0] for i in range(len(rates_per_night))]
+    avg = sum(rates)/len(rates_per_night)   # calculate total average rate
+    # concatenate all data (from all nights or days) for std error and ttest
+    data2err = []
+    for el in rates_per_night:
+        data2err.extend(el[1])
+    return avg, my_std_err(data2err), data2err
+
+# my std error function to calculate standard errors from given list
+def my_std_err(my_list):
+    temp = 0
+    average = sum(my_list)/len(my_list)
+    for i in range(len(my_list)):
+        temp = temp + math.pow((my_list[i]-average), 2)
+    try:
+        std_dev = math.sqrt(temp)/math.sqrt(len(my_list)-1)
+        std_err = std_dev/math.sqrt(len(my_list))
+    except:
+        std_err = -1
+    return std_err
@@ -0,0 +1,157 @@
+'''
+Purpose: following csv files while FED is still writing them (live plots, watchers).
+A FileTail returns only the rows added since its last read, RollingBins keeps pellet counts
+of the last N time bins of every file and RollingEvents the timestamps of the last N seconds,
+so memory and the cost of an update stay the same however long the experiment runs.
+'''
+
+import os
+import numpy as np
+from .errors import FedError
+from .io import parse_fed_bytes
+
+_EMPTY = parse_fed_bytes(b'')
+
+# reads a growing csv file piece by piece: read() returns FedData of the complete rows written since the last read
+# a row without its newline yet is kept for the next read, a file that got shorter(replaced, new experiment)
+# is read again from the beginning and counted in resets
+class FileTail:
+    def __init__(self, filename, offset=0):
+        self.filename = filename
+        self.offset = offset    # bytes of the file already read
+        self.resets = 0
+        self._rest = b''        # row that is still being written
+
+    def read(self):
+        try:
+            size = os.path.getsize(self.filename)
+            if size < self.offset:
+                self.offset = 0
+                self._rest = b''
+                self.resets += 1
+            if size == self.offset:
+                return _EMPTY
+            with open(self.filename, 'rb') as f:
+                f.seek(self.offset)
+                raw = f.read()
+        except OSError:     # e.g. the file is not there yet
+            return _EMPTY
+        self.offset += len(raw)
+        raw = self._rest + raw
+        cut = raw.rfind(b'\n') + 1
+        self._rest = raw[cut:]
+        return parse_fed_bytes(raw[:cut]) if cut != 0 else _EMPTY
+
+    # returns timestamps of the new rows where pellet count is not 0(like get_data, in file order)
+    def read_pellets(self):
+        fed = self.read()
+        return fed.times[fed.pellets != 0]
+
+# pellet counts of the last binsNo time bins of each file, in a ring buffer(files x binsNo)
+# bins are interval seconds long and start at origin, tick k(the bin starting at origin + k*interval) is what
+# fill_bins(..., origin, interval) counts in its bin k-1, so the counts of the window are the same as of fill_bins
+# (a tick that leaves the window is dropped, tick 0 is not moved to the last bin)
+class RollingBins:
+    def __init__(self, filesNo, origin, interval, binsNo):
+        self.origin = np.datetime64(origin, 's')
+        self.interval = interval
+        self.binsNo = binsNo
+        self.counts = np.zeros((filesNo, binsNo))
+        self.last_tick = None   # newest tick seen
+        self.first_tick = None  # oldest tick seen, older ticks of the window are NaN
+
+    # returns tick of each timestamp
+    def ticks(self, timestamps):
+        return (timestamps - self.origin).astype('timedelta64[s]').astype(np.int64) // self.interval
+
+    # moves the window so that it ends with the given tick, bins leaving the window are cleared
+    def advance(self, tick):
+        if self.last_tick is None:
+            self.last_tick = self.first_tick = tick
+            return
+        if tick <= self.last_tick:
+            return
+        if tick - self.last_tick >= self.binsNo:
+            self.counts[:] = 0
+        else:
+            self.counts[:, np.arange(self.last_tick + 1, tick + 1) % self.binsNo] = 0
+        self.last_tick = tick
+
+    # counts timestamps of file i, returns True if the window moved
+    def add(self, i, timestamps):
+        if len(timestamps) == 0:
+            return False
+        ticks = self.ticks(timestamps)
+        last = self.last_tick
+        self.advance(int(ticks.max()))
+        self.first_tick = min(self.first_tick, int(ticks.min()))
+        ticks = ticks[ticks > self.last_tick - self.binsNo]
+        self.counts[i] += np.bincount(ticks % self.binsNo, minlength=self.binsNo)
+        return self.last_tick != last
+
+    # forget all counts of file i(e.g. the file was replaced and is read again)
+    def clear(self, i):
+        self.counts[i] = 0
+
+    # returns a tuple: times to plot(bin k-1 of fill_bins starts at origin + (k-1)*interval) and counts(files x bins)
+    # from the oldest to the newest bin of the window, bins before the first timestamp are NaN
+    def window(self):
+        if self.last_tick is None:
+            return np.zeros(0, dtype='datetime64[s]'), np.zeros((len(self.counts), 0))
+        ticks = np.arange(self.last_tick - self.binsNo + 1, self.last_tick + 1)
+        counts = self.counts[:, ticks % self.binsNo]
+        counts[:, ticks < self.first_tick] = np.nan
+        return self.origin + (ticks - 1) * np.timedelta64(self.interval, 's'), counts
+
+# timestamps of the last `seconds` seconds of each file(sorted), for the event rows of the plot
+class RollingEvents:
+    def __init__(self, filesNo, seconds):
+        self.seconds = np.timedelta64(seconds, 's')
+        self.events = [np.zeros(0, dtype='datetime64[s]') for i in range(filesNo)]
+        self.latest = None
+
+    # adds timestamps of file i and drops the ones older than the window of all files
+    def add(self, i, timestamps):
+        if len(timestamps) == 0:
+            return
+        newest = timestamps.max()
+        self.latest = newest if self.latest is None else max(self.latest, newest)
+        self.events[i] = np.sort(np.concatenate((self.events[i], timestamps)), kind='stable')
+        self.trim()
+
+    def trim(self):
+        if self.latest is None:
+            return
+        start = self.latest - self.seconds
+        self.events = [el[np.searchsorted(el, start, side='left'):] for el in self.events]
+
+    def clear(self, i):
+        self.events[i] = self.events[i][:0]
+
+# the last `capacity` pellet timestamps of a device, oldest are overwritten
+# raises FedError if capacity is less than 1
+class RingBuffer:
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise FedError("Capacity has to be at least 1 pellet")
+        self.buffer = np.zeros(capacity, dtype='datetime64[s]')
+        self.size = 0
+        self.total = 0      # all timestamps ever added
+
+    def add(self, timestamps):
+        capacity = len(self.buffer)
+        skipped = max(0, len(timestamps) - capacity)
+        self.total += skipped
+        timestamps = timestamps[skipped:]
+        positions = (self.total + np.arange(len(timestamps))) % capacity
+        self.buffer[positions] = timestamps
+        self.total += len(timestamps)
+        self.size = min(capacity, self.size + len(timestamps))
+
+    # returns timestamps from the oldest to the newest(a copy)
+    def values(self):
+        capacity = len(self.buffer)
+        return self.buffer[(self.total - self.size + np.arange(self.size)) % capacity]
+
+    def __len__(self):
+        return self.size
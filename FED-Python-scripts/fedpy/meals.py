@@ -0,0 +1,269 @@
+'''
+Purpose: meals from pellet timestamps (meals.py, meal_bars.py). A meal is a run
+of pellets where the time between consecutive pellets is not longer than the
+given interval, and which is at least as big as the given meal size.
+'''
+
+import math
+import numpy as np
+from .errors import FedError
+from .stats import my_std_err
+from .times import interval_index, locate, cycle_counts, file_groups, LIGHT, DARK, CHUNK_ROWS
+from .schedule import window_of
+
+# map meal size in grams to pellets number
+# takes as arguments defined size of the meal in grams and pellet weight
+# returns minimum number of pellets of defined size to be considered a meal according to the given meal size
+def gram2pellet(grams, pellet):
+    return math.ceil(grams/pellet)
+
+# one row per meal: mouse(index of the file), start and end(first and last pellet), pellets in the meal
+MEAL_DTYPE = np.dtype([('mouse', np.int32), ('start', 'datetime64[s]'), ('end', 'datetime64[s]'), ('pellets', np.int64)])
+
+# takes as an argument data(list of arrays=e.g.8mice with an array of timestamps for each one)
+# a result of get_days_and_nights, a defined interval for meal in seconds(e.g. 30 min=1800sec)
+# and minimum number of pellets in a meal(result of gram2pellet function)
+# returns a structured array of meals(MEAL_DTYPE) of all mice, ordered by mouse and start,
+# mice are segmented together(in groups of at most chunk_size timestamps) from the gaps between consecutive pellets
+def segment_meals(data, interval, min_pellets=1, chunk_size=CHUNK_ROWS):
+    if sum(len(el) for el in data) == 0:
+        return np.zeros(0, dtype=MEAL_DTYPE)
+    return np.concatenate([_segment(data[first:last], first, interval, min_pellets)
+                           for first, last in file_groups(data, chunk_size)])
+
+# meals of a group of mice, the first one has index `offset`
+def _segment(data, offset, interval, min_pellets):
+    lengths = [len(el) for el in data]
+    if sum(lengths) == 0:
+        return np.zeros(0, dtype=MEAL_DTYPE)
+    times = np.concatenate(data)
+    mouse = np.repeat(np.arange(offset, offset + len(data), dtype=np.int32), lengths)
+    # a meal starts with the first pellet of each mouse and after every gap longer than e.g.30 min
+    new_meal = np.ones(len(times), dtype=bool)
+    new_meal[1:] = (np.diff(times) > np.timedelta64(interval, 's')) | (mouse[1:] != mouse[:-1])
+    first = np.flatnonzero(new_meal)
+    last = np.append(first[1:], len(times)) - 1
+    pellets = last - first + 1
+    keep = pellets >= min_pellets
+    meals = np.zeros(int(keep.sum()), dtype=MEAL_DTYPE)
+    meals['mouse'] = mouse[first[keep]]
+    meals['start'] = times[first[keep]]
+    meals['end'] = times[last[keep]]
+    meals['pellets'] = pellets[keep]
+    return meals
+
+# create a dictionary with meal segments(start, end) for each mouse to plot, key starts with 1
+# takes meals(result of segment_meals function) and number of mice
+def get_segments(meals, filesNo):
+    segs = dict()
+    for i in range(filesNo):
+        mine = meals[meals['mouse'] == i]
+        segs[i+1] = list(zip(mine['start'], mine['end']))
+    return segs
+
+# count pellets eaten during night meals, count time of night meals
+# a meal belongs to the interval its first pellet falls in(both interval ends included)
+# takes meals(result of segment_meals function), nighttime/daytime intervals and number of mice
+# returns list of night meal sizes for each mouse and list of night meal durations in seconds
+def night_count(meals, intervals, filesNo):
+    counted = meals[locate(interval_index(intervals), meals['start']) >= 0]
+    durations = (counted['end'] - counted['start']) / np.timedelta64(1, 's')
+    # meals are ordered by mouse, so each mouse is one slice
+    bounds = np.searchsorted(counted['mouse'], np.arange(filesNo + 1))
+    night_meal_count = [counted['pellets'][bounds[i]:bounds[i+1]] for i in range(filesNo)]
+    night_meal_duration = [durations[bounds[i]:bounds[i+1]] for i in range(filesNo)]
+    return night_meal_count, night_meal_duration
+
+# per mouse and per interval(cycle) meal statistics, built with one grouped reduction
+# returns a tuple of three 2-D arrays (mice x intervals): number of meals, pellets in meals, meal duration in seconds
+# takes meals(result of segment_meals function), nighttime/daytime intervals and number of mice
+def meal_cycle_table(meals, intervals, filesNo):
+    cycle = locate(interval_index(intervals), meals['start'])
+    counted = cycle >= 0
+    group = meals['mouse'][counted].astype(np.int64) * len(intervals) + cycle[counted]
+    size = filesNo * len(intervals)
+    shape = (filesNo, len(intervals))
+    meal_no = np.bincount(group, minlength=size).reshape(shape)
+    pellets = np.bincount(group, weights=meals['pellets'][counted], minlength=size).reshape(shape)
+    durations = (meals['end'][counted] - meals['start'][counted]) / np.timedelta64(1, 's')
+    duration = np.bincount(group, weights=durations, minlength=size).reshape(shape)
+    return meal_no, pellets, duration
+
+# returns a total pellets by given intervals, divided by number of interval
+# to get a count per one night/day
+def all_night_pellets(list_of_timestamps, intervals):
+    total_count = cycle_counts(list_of_timestamps, intervals).sum(axis=1)
+    # count average from all mice and divide it by the number of nights
+    return (total_count.sum()/len(total_count))/float(len(intervals))
+
+# returns average of all night pellets retrieved during meals and average number of meals per cycle,
+# std error of meals per cycle and the per mouse values(for ttest)
+# it takes as argument meals list(first element of the result of night_count function), and nighttime/daytime intervals
+# mice without any meal in these intervals are skipped
+def get_avg_night_pellets_per_meal(night_meal_count, intervals):
+    eating = [el for el in night_meal_count if el.sum() != 0]
+    individual_mealNo = np.array([len(el) for el in eating])
+    avg_mealNo_in_cycle = float(individual_mealNo.mean())/len(intervals) if len(eating) != 0 else 0
+    data2err = list(individual_mealNo/len(intervals))
+    err_meals = my_std_err(data2err)
+    # average meal of each mouse, and average from all averages
+    individual_avg = [el.sum()/len(el) for el in eating]
+    pellet_avg = float(np.mean(individual_avg)) if len(individual_avg) != 0 else 0
+    return pellet_avg, avg_mealNo_in_cycle, err_meals, data2err
+
+# how many total pellets on average during night meals were retrieved,
+# divide it by the number of nights to have the result per one cycle
+# returns the count, its std error and the per mouse values(for ttest)
+def all_night_meal_pellets_count(night_meal_count, intervals):
+    individual_meal_sums = [el.sum() for el in night_meal_count if el.sum() != 0]
+    data2err = [float(el.sum())/len(intervals) for el in night_meal_count]
+    error = my_std_err(data2err)
+    count = float(np.mean(individual_meal_sums)) if len(individual_meal_sums) != 0 else 0
+    return count/float(len(intervals)), error, data2err
+
+# returns average meal duration in minutes(according to the given list: either nighttime, or daytime), std err
+# and the per mouse values in minutes(for ttest)
+def get_avg_night_meal_duration(night_meal_duration):
+    # average meal duration of each mouse that had any meal
+    individual_time_avg = [el.sum()/len(el) for el in night_meal_duration if el.sum() != 0]
+    data2err = [float(el/60) for el in individual_time_avg]
+    std_err_dur = my_std_err(data2err)
+    duration_avg = float(np.mean(individual_time_avg)) if len(individual_time_avg) != 0 else 0
+    # return duration in minutes (divide seconds/60)
+    return round(duration_avg/60), std_err_dur, data2err
+
+# returns a dictionary with the pellets eaten during meals(%) of a phase: 'total_pellets', 'percent', 'percent_err'
+# and 'percent_p'(per mouse values), takes pellets in meals, its std error and per mouse values(result of
+# all_night_meal_pellets_count) and all pellets(result of all_night_pellets)
+# raises FedError if no pellet was retrieved in the phase(e.g. a mouse eating only at night)
+def meal_percent(meal_pellets, meal_pellets_err, meal_pellets_p, total_pellets):
+    if total_pellets == 0:
+        raise FedError("Not enough data\nno pellet was retrieved in a phase")
+    return {'total_pellets': total_pellets,
+            'percent': meal_pellets*100/float(total_pellets),
+            'percent_err': meal_pellets_err*100/total_pellets,
+            'percent_p': [el/float(total_pellets) for el in meal_pellets_p]}
+
+# meal statistics of one phase(nights or days) from per mouse totals over its intervals
+# takes 1-D arrays(one value per mouse) of number of meals, pellets in meals and meal duration in seconds
+# (e.g. sums over axis 1 of meal_cycle_table, or MealDetector.cycle_table of each mouse), and number of intervals
+# returns a dictionary with the same values as get_avg_night_pellets_per_meal, all_night_meal_pellets_count
+# and get_avg_night_meal_duration
+def phase_meal_stats(meal_no, pellets, duration, intervalsNo):
+    meal_no, pellets, duration = (np.asarray(el) for el in (meal_no, pellets, duration))
+    eating = pellets != 0
+    meals_p = list(meal_no[eating]/intervalsNo)
+    counts_p = [float(el)/intervalsNo for el in pellets]
+    timed = duration != 0
+    individual_time_avg = duration[timed]/meal_no[timed]
+    return {'pellets_per_meal': float(np.mean(pellets[eating]/meal_no[eating])) if eating.any() else 0,
+            'meals_per_cycle': float(meal_no[eating].mean())/intervalsNo if eating.any() else 0,
+            'meals_per_cycle_err': my_std_err(meals_p), 'meals_per_cycle_p': meals_p,
+            'meal_pellets': (float(np.mean(pellets[eating])) if eating.any() else 0)/float(intervalsNo),
+            'meal_pellets_err': my_std_err(counts_p), 'meal_pellets_p': counts_p,
+            'duration': round((float(np.mean(individual_time_avg)) if timed.any() else 0)/60),
+            'duration_err': my_std_err([float(el/60) for el in individual_time_avg]),
+            'duration_p': [float(el/60) for el in individual_time_avg]}
+
+# streaming version of segment_meals for a single device: pellets are added as they come and the state is
+# only the open meal(first pellet, last pellet, pellets), a meal is finished as soon as a pellet comes more than
+# interval seconds after the last one, or with flush when the time(e.g. now) is that late
+# finished meals of at least min_pellets pellets are counted in the window of the schedule their first pellet
+# falls in(number of meals, pellets, duration) and in the totals of its phase, so phase statistics need no
+# timestamps, only the last two windows with meals are kept(see cycle_table), as meals finish in the order they start
+class MealDetector:
+    def __init__(self, interval, min_pellets=1, schedule=None, mouse=0):
+        self.interval = interval
+        self.min_pellets = min_pellets
+        self.schedule = schedule
+        self.mouse = mouse
+        self.start = None   # first and last pellet of the open meal(seconds since 1970)
+        self.last = None
+        self.count = 0      # pellets in the open meal
+        self.totals = np.zeros(3)   # all finished meals: number, pellets, duration
+        self.phases = {DARK: np.zeros(3), LIGHT: np.zeros(3)}  # the same by phase
+        # window start: [number, pellets, duration] of meals starting in the window and of those starting
+        # exactly at the window start, of the last two windows with meals
+        self.windows = dict()
+        self.dropped = None     # start of the newest window that is not kept anymore
+
+    # adds sorted pellet timestamps(datetime64), returns finished meals(MEAL_DTYPE array)
+    def add(self, timestamps):
+        seconds = np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+        if len(seconds) == 0:
+            return np.zeros(0, dtype=MEAL_DTYPE)
+        # runs of pellets, the first run continues the open meal if the gap is short enough
+        first = np.concatenate(([0], np.flatnonzero(np.diff(seconds) > self.interval) + 1))
+        last = np.append(first[1:], len(seconds)) - 1
+        starts, ends, pellets = seconds[first], seconds[last], last - first + 1
+        finished = list()
+        if self.last is not None:
+            if seconds[0] - self.last > self.interval:
+                finished.append((self.start, self.last, self.count))
+            else:
+                starts[0] = self.start
+                pellets[0] += self.count
+        finished.extend(zip(starts[:-1], ends[:-1], pellets[:-1]))
+        self.start, self.last, self.count = int(starts[-1]), int(ends[-1]), int(pellets[-1])
+        return self._finish(finished)
+
+    # finishes the open meal if the time(datetime64, None: end of the recording) is more than interval after
+    # its last pellet, returns finished meals(MEAL_DTYPE array)
+    def flush(self, now=None):
+        if self.last is None:
+            return np.zeros(0, dtype=MEAL_DTYPE)
+        if now is not None and np.datetime64(now, 's').astype(np.int64) - self.last <= self.interval:
+            return np.zeros(0, dtype=MEAL_DTYPE)
+        finished = [(self.start, self.last, self.count)]
+        self.start = self.last = None
+        self.count = 0
+        return self._finish(finished)
+
+    def _finish(self, finished):
+        meals = np.array([el for el in finished if el[2] >= self.min_pellets], dtype=np.int64).reshape(-1, 3)
+        result = np.zeros(len(meals), dtype=MEAL_DTYPE)
+        result['mouse'] = self.mouse
+        result['start'] = meals[:, 0].astype('datetime64[s]')
+        result['end'] = meals[:, 1].astype('datetime64[s]')
+        result['pellets'] = meals[:, 2]
+        values = np.stack((np.ones(len(meals)), meals[:, 2], meals[:, 1] - meals[:, 0]), axis=1)
+        self.totals += values.sum(axis=0)
+        if self.schedule is not None and len(meals) != 0:
+            phase, window = window_of(self.schedule, meals[:, 0])
+            for start, window_phase, window_start, value in zip(meals[:, 0], phase, window, values):
+                self.phases[window_phase] += value
+                window_start = int(window_start)
+                if window_start not in self.windows:
+                    if len(self.windows) == 2:
+                        self.dropped = min(self.windows)
+                        del self.windows[self.dropped]
+                    self.windows[window_start] = np.zeros((2, 3))
+                self.windows[window_start][0] += value
+                if start == window_start:
+                    self.windows[window_start][1] += value
+        return result
+
+    # returns a tuple of two arrays: number of meals, pellets in meals and meal duration of all dark and of all light windows
+    def phase_totals(self):
+        return self.phases[DARK].copy(), self.phases[LIGHT].copy()
+
+    # returns 2-D array(intervals x 3): number of meals, pellets in meals and meal duration in seconds of each interval
+    # (one row of each array of meal_cycle_table), takes full nighttime/daytime intervals of the same schedule
+    # both interval ends are included like in night_count, a meal starting on an edge shared by two intervals
+    # goes to the later one
+    # rows of intervals starting in a window that is not kept anymore are NaN, the row of an interval can only
+    # change until a meal of a window after its end is finished, so reading the table after every add and
+    # keeping the last row that is not NaN gives the whole table
+    def cycle_table(self, intervals):
+        starts = [int(np.datetime64(el[0], 's').astype(np.int64)) for el in intervals]
+        ends = [int(np.datetime64(el[1], 's').astype(np.int64)) for el in intervals]
+        empty = np.zeros((2, 3))
+        table = np.zeros((len(intervals), 3))
+        for i in range(len(intervals)):
+            if self.dropped is not None and starts[i] <= self.dropped:
+                table[i] = np.nan
+                continue
+            table[i] = self.windows.get(starts[i], empty)[0]
+            if ends[i] not in starts:
+                table[i] += self.windows.get(ends[i], empty)[1]
+        return table
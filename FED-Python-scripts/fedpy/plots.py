@@ -0,0 +1,304 @@
+'''
+Purpose: figures of the four analyses (results of the fedpy.analysis functions).
+Each function draws a new figure and returns it, showing or saving it is up to the caller
+(plt.show() in the scripts, savefig in the command line tool).
+'''
+
+import datetime as dt
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.dates as md
+import matplotlib.cm as cm
+from .bins import get_averages2plot, get_std_err, BinPyramid
+from .schedule import schedule_windows
+from .live import FileTail, RollingBins, RollingEvents
+from .raster import EventRaster, meal_lines
+from .stats import stars
+from .profiling import stage, timed, enabled
+
+x_tick_hours = 0 # hour displayed on the X axis(24hours format)
+
+# for each file, plot timestamps(events) in the same order as
+# the files were read from the folder (starts at the bottom)
+# take row colors from the colormap(cm.prism), all rows are a single EventRaster(see raster.py)
+def _plot_events(ax, data, linelengths):
+    color_distancer = 5    ## in order to distance the colors from eachother (i is to small to see the difference)
+    colors = [cm.prism(color_distancer + 15*i) for i in range(len(data))]
+    ax.event_raster = EventRaster(ax, data, colors, linelengths)
+
+# shade night intervals
+def _shade(ax, intervals):
+    for t0, t1 in intervals:
+        ax.axvspan(t0, t1, alpha=0.2, facecolor='gray')
+
+# pellet retrieval events by individual mice(upper plot), average pellet retrieval and its
+# standard error(lower plot), takes the result of analyze_timeline function
+# zoom: the average is recomputed from a BinPyramid when the time axis is zoomed(see _zoom_average)
+@timed('plot_timeline')
+def plot_timeline(result, zoom=True):
+    fig = plt.figure(facecolor='w')
+    ax1 = plt.subplot2grid((2,1),(0,0), fig=fig)
+    ax1.set_title('Pellet retrieval events by individual mice')
+    ax1.set_frame_on(False)
+    ax1.axes.get_yaxis().set_visible(False)
+    ax1.axes.get_xaxis().set_visible(False)
+    _plot_events(ax1, result['plot_data'], 1)
+    _shade(ax1, result['nights'])
+    # format of date displayed on the x axis, and what hour ticks will be visible (byhour)
+    ax1.xaxis.set_major_formatter(md.DateFormatter('%H:%M\n%m-%d-%y'))
+    ax1.xaxis.set_major_locator(md.HourLocator(byhour=x_tick_hours, interval=1))
+
+    # add second subplot to plot average intake(shares the same Xaxis timeline)
+    ax2 = plt.subplot2grid((2,1),(1,0), sharex=ax1, fig=fig)
+    ax2.set_ylabel('Average pellet retrieval')
+    avg = result['avg']
+    line, = ax2.plot(result['avg_times'], avg, color='k', linewidth=2.0)
+    band = None
+    if result['do_std_err']:
+        band = _std_err_band(ax2, result['avg_times'], avg, result['std_err'])
+        ax2.legend()
+    _shade(ax2, result['nights'])
+    # adjust positions between subplots
+    fig.subplots_adjust(left=0.11, bottom=0.11, right=0.90, top=0.90, wspace=0, hspace=0)
+    if zoom and len(avg) != 0:
+        _zoom_average(ax2, line, band, result)
+    return fig
+
+def _std_err_band(ax, times, avg, std_err):
+    return ax.fill_between(times, avg + std_err, avg - std_err, alpha=0.2, facecolor='gray', edgecolor="gray",
+                           linewidth=0.0, hatch='|||', label='Standard error')
+
+# the average line(and standard error band) of plot_timeline follows the zoom: when the time axis changes,
+# the finest level of a BinPyramid of the counts that has at most as many bins in view as the first view(the
+# whole plot at the chosen bin) had is taken, and only the bins in view are averaged again
+# the pyramid is ax.bin_pyramid, the width of the bins shown is ax.bin_width
+def _zoom_average(ax, line, band, result):
+    bin = result['bin']
+    with stage('bin_pyramid', mice=len(result['plot_data'])):
+        pyramid = BinPyramid(result['plot_data'], result['start'], result['end'], counts=result['bins'], width=bin,
+                             coverage=result.get('coverage'))
+    ax.bin_pyramid = pyramid
+    ax.bin_width = bin
+    state = {'band': band, 'view': None, 'maxbins': None}
+
+    def update(*args):
+        left, right = (np.datetime64(md.num2date(el).replace(tzinfo=None), 's') for el in ax.get_xlim())
+        seconds = (right - left) / np.timedelta64(1, 's')
+        if state['maxbins'] is None:     # the first view is drawn as it is
+            state['maxbins'] = seconds / bin
+            state['view'] = (bin, left, right)
+            return
+        width = pyramid.width_for(seconds, state['maxbins'])
+        if (width, left, right) == state['view']:
+            return
+        state['view'] = (width, left, right)
+        times, counts = pyramid.window(width, left, right)
+        avg = get_averages2plot(counts, counts.shape[1])
+        line.set_data(md.date2num(times), avg)
+        if state['band'] is not None:
+            std_err = get_std_err(counts)
+            state['band'].remove()
+            state['band'] = _std_err_band(ax, md.date2num(times), avg, std_err)
+            avg = np.concatenate((avg + std_err, avg - std_err))
+        if width != ax.bin_width:
+            ax.bin_width = width
+            ax.set_ylabel('Average pellet retrieval' + ('' if width == bin else ' (per %s)' % _bin_name(width)))
+        found = avg[np.isfinite(avg)]
+        if len(found) != 0 and found.max() > found.min():
+            margin = 0.05 * (found.max() - found.min())
+            ax.set_ylim(found.min() - margin, found.max() + margin)
+
+    ax.callbacks.connect('xlim_changed', update)
+
+# pellet retrieval events by individual mice with lines connecting the pellets of each meal
+# takes the result of analyze_meals function
+@timed('plot_meals')
+def plot_meals(result):
+    fig = plt.figure(facecolor='w')
+    ax1 = plt.subplot2grid((1,1),(0,0), fig=fig)
+    _plot_events(ax1, result['data2plot'], 0.5)
+    _shade(ax1, result['full_nights'])
+    ax1.xaxis.set_major_formatter(md.DateFormatter('%H:%M\n%m-%d-%y'))
+    # plot meal segments as lines connecting timestamps that are considered a meal
+    meal_lines(ax1, result['meals'])
+    return fig
+
+# dark and light bar with standard errors, and '*' for p < 0.05, '**' for p < 0.01
+# comparison: row of the table of the result(stats.Comparison), None if there was not enough data for the stats,
+# top is how far above the bars the significance bar is
+def _bars(ax, ylabel, y, err, comparison, top=1.1):
+    x = np.arange(2)    # arrange columns(dark and light)
+    ax.set_ylabel(ylabel)
+    ax.set_frame_on(False)
+    if comparison is not None:
+        drk, lght = ax.bar(x, y, width=0.7, align='edge', edgecolor='k', yerr=[(err[0],err[1]),(err[0],err[1])], ecolor='k')
+    else:
+        drk, lght = ax.bar(x, y, width=0.7, align='edge', edgecolor='k')
+    centers = x + 0.5*drk.get_width()     # align labels in the center
+    ax.set_xticks(centers)
+    drk.set_facecolor('0.85')   # shade of gray
+    lght.set_facecolor('w')
+    ax.set_xticklabels(['Dark', 'Light'])
+    # check p < 0.01(**), p < 0.05(*)
+    text = stars(comparison.p) if comparison is not None else ''
+    if text:
+        b = top*max(y[0],y[1])
+        dx = abs(centers[0]-centers[1])
+        props = {'connectionstyle':'bar','arrowstyle':'-', 'shrinkA':20,'shrinkB':20,'lw':1}
+        # position the text in the middle on the top of the bar
+        ax.annotate(text, xy=(centers[0]+(dx/2.2),1.5*b), zorder=10)
+        ax.annotate('', xy=(centers[0],b), xytext=(centers[1],b), arrowprops=props)
+        ax.set_ylim(top=b+(0.6*b))
+
+# four bar charts: pellets in meals, meal duration, pellets eaten during meals(%), meals per cycle
+# takes the result of analyze_meal_bars function
+@timed('plot_meal_bars')
+def plot_meal_bars(result):
+    night, day = result['night'], result['day']
+    table = {row.measure: row for row in result['table']} if result['do_stats'] else {}
+    fig = plt.figure(facecolor='w')
+    _bars(plt.subplot2grid((2,2),(0,0), fig=fig), 'Pellets in meals',
+          [night['meal_pellets'], day['meal_pellets']], [night['meal_pellets_err'], day['meal_pellets_err']],
+          table.get('meal_pellets'), top=1.05)
+    _bars(plt.subplot2grid((2,2),(0,1), fig=fig), 'Meal duration(min)',
+          [night['duration'], day['duration']], [night['duration_err'], day['duration_err']], table.get('duration'))
+    _bars(plt.subplot2grid((2,2),(1,0), fig=fig), 'Pellets eaten during meals(%)',
+          [night['percent'], day['percent']], [night['percent_err'], day['percent_err']], table.get('percent'))
+    _bars(plt.subplot2grid((2,2),(1,1), fig=fig), 'Meals per cycle',
+          [night['meals_per_cycle'], day['meals_per_cycle']],
+          [night['meals_per_cycle_err'], day['meals_per_cycle_err']], table.get('meals_per_cycle'))
+    # adjust positions between subplots
+    fig.subplots_adjust(left=0.11, bottom=0.11, right=0.90, top=0.90, wspace=0.3, hspace=0.3)
+    return fig
+
+# dark and light eating rate bar chart, takes the result of analyze_rate function
+@timed('plot_rate')
+def plot_rate(result):
+    fig = plt.figure(facecolor='w')
+    _bars(plt.subplot2grid((1,1),(0,0), fig=fig), 'Eating rate (pellets/%s)' % _bin_name(result['bin']),
+          [result['night_rate'], result['day_rate']], [result['night_error'], result['day_error']],
+          result['table'][0] if result['do_stats'] else None, top=1.05)
+    return fig
+
+# shows the figures(plt.show), when profiling is on they are first drawn once in a 'render' stage,
+# as matplotlib draws a figure only when it is shown
+def show():
+    if enabled():
+        for number in plt.get_fignums():
+            with stage('render'):
+                plt.figure(number).canvas.draw()
+    plt.show()
+
+# live version of plot_timeline: follows the csv files while FED writes them and shows the last `window` seconds
+# takes csv file paths(one row each, from the bottom), time bin in seconds, Schedule and frames per second
+# new rows are read and counted at every frame, only the events, average and standard error are redrawn(blitting),
+# the whole figure is drawn again only when the time axis moves on(by a quarter of the window) or the average
+# does not fit anymore, memory and time of a frame do not grow with the length of the experiment
+# returns the figure, its timer is fig.live_timer(started), one frame can also be drawn with fig.live_update()
+def live_timeline(filenames, bin, schedule, window=86400, fps=2):
+    tails = [FileTail(el) for el in filenames]
+    binsNo = max(1, window // bin)
+    new = [tail.read_pellets() for tail in tails]
+    found = [el.min() for el in new if len(el) != 0]
+    first = min(found) if len(found) != 0 else np.datetime64(dt.datetime.now(), 's')
+    # bins start at midnight of the first pellet, so they are aligned with the clock
+    bins = RollingBins(len(tails), first.astype('datetime64[D]'), bin, binsNo)
+    events = RollingEvents(len(tails), binsNo * bin)
+    step = np.timedelta64(max(bin, window // 4), 's')
+    fig = plt.figure(facecolor='w')
+    ax1 = plt.subplot2grid((2,1),(0,0), fig=fig)
+    ax1.set_title('Pellet retrieval events by individual mice')
+    ax1.set_frame_on(False)
+    ax1.axes.get_yaxis().set_visible(False)
+    ax1.axes.get_xaxis().set_visible(False)
+    ax1.set_ylim(0, len(tails) + 1)
+    ax2 = plt.subplot2grid((2,1),(1,0), sharex=ax1, fig=fig)
+    ax2.set_ylabel('Average pellet retrieval')
+    ax2.xaxis_date()
+    ax2.xaxis.set_major_formatter(md.DateFormatter('%H:%M\n%m-%d-%y'))
+    ax2.xaxis.set_major_locator(md.AutoDateLocator(maxticks=6))
+    fig.subplots_adjust(left=0.11, bottom=0.11, right=0.90, top=0.90, wspace=0, hspace=0)
+    color_distancer = 5
+    rows = list()
+    for i in range(len(tails)):
+        rows.append(ax1.eventplot(np.zeros(0), colors=[cm.prism(color_distancer)], lineoffsets=i+1,
+                                  linelengths=1, animated=True)[0])
+        color_distancer += 15
+    line, = ax2.plot([], [], color='k', linewidth=2.0, animated=True)
+    state = {'background': None, 'band': None, 'right': None, 'top': 1.0, 'nights': list()}
+
+    def draw_animated():
+        for artist in rows + [line] + ([state['band']] if state['band'] is not None else []):
+            artist.axes.draw_artist(artist)
+
+    def on_draw(event):
+        state['background'] = fig.canvas.copy_from_bbox(fig.bbox)
+        draw_animated()
+
+    # time axis and night shading, the whole figure is drawn again
+    def move_axes(latest):
+        right = latest + step
+        left = right - np.timedelta64(binsNo * bin, 's') - step
+        state['right'] = right
+        ax2.set_xlim(md.date2num(left), md.date2num(right))
+        ax2.set_ylim(0, state['top'])
+        for el in state['nights']:
+            el.remove()
+        state['nights'] = list()
+        for t0, t1 in schedule_windows(schedule, left, right)[0]:
+            state['nights'].append(ax1.axvspan(t0, t1, alpha=0.2, facecolor='gray'))
+            state['nights'].append(ax2.axvspan(t0, t1, alpha=0.2, facecolor='gray'))
+        fig.canvas.draw_idle()
+
+    def update():
+        for i, tail in enumerate(tails):
+            resets = tail.resets
+            timestamps = tail.read_pellets()
+            if tail.resets != resets:   # the file was replaced
+                bins.clear(i)
+                events.clear(i)
+            bins.add(i, timestamps)
+            events.add(i, timestamps)
+        times, counts = bins.window()
+        if len(times) == 0:
+            return
+        for row, el in zip(rows, events.events):
+            row.set_positions(md.date2num(el))
+        avg = get_averages2plot(counts, binsNo)
+        std_err = get_std_err(counts)
+        x = md.date2num(times)
+        line.set_data(x, avg)
+        if state['band'] is not None:
+            state['band'].remove()
+        state['band'] = ax2.fill_between(x, avg + std_err, avg - std_err, alpha=0.2, facecolor='gray',
+                                         edgecolor='gray', linewidth=0.0, hatch='|||', animated=True)
+        highest = np.nanmax(avg + np.nan_to_num(std_err)) if not np.isnan(avg).all() else 0
+        latest = events.latest if events.latest is not None else times[-1]
+        if state['right'] is None or latest > state['right'] or highest > state['top']:
+            state['top'] = max(state['top'], 1.5 * highest)
+            move_axes(latest)   # draw_event redraws the animated artists
+        elif state['background'] is not None:
+            fig.canvas.restore_region(state['background'])
+            draw_animated()
+            fig.canvas.blit(fig.bbox)
+
+    fig.canvas.mpl_connect('draw_event', on_draw)
+    for i, el in enumerate(new):
+        bins.add(i, el)
+        events.add(i, el)
+    fig.live_update = update
+    fig.live_timer = fig.canvas.new_timer(interval=int(1000 / fps))
+    fig.live_timer.add_callback(update)
+    fig.live_timer.start()
+    update()
+    return fig
+
+# name of the time bin for labels, e.g. 3600 -> 'hour'
+def _bin_name(bin):
+    if bin == 3600:
+        return 'hour'
+    if bin % 3600 == 0:
+        return '%d hours' % (bin // 3600)
+    if bin % 60 == 0:
+        return 'min' if bin == 60 else '%d min' % (bin // 60)
+    return '%d sec' % bin
@@ -0,0 +1,188 @@
+'''
+Purpose: optional timing of the steps of an analysis (reading the files, cutting the windows, bins,
+meals, rates, plotting and rendering). Off by default, then a stage costs one function call.
+Turned on by the FEDPY_PROFILE environment variable(any value but 0, also for the four scripts)
+or by the --profile option of the command line. Each stage records wall time, CPU time, peak memory
+allocated during the stage (tracemalloc, which makes pure Python code a few times slower) and the number
+of rows(timestamps) and mice it processed.
+At the end a summary table is printed, FEDPY_TRACE(or --trace) names a JSON file in the Chrome trace
+format (chrome://tracing, https://ui.perfetto.dev) and FEDPY_CPROFILE(or --cprofile) a folder where a
+cProfile dump(.prof, e.g. for snakeviz or pstats) of every stage is saved.
+'''
+
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import cProfile
+import tracemalloc
+from collections import namedtuple
+
+# a finished stage, start: seconds since enable(), wall, cpu: seconds, peak: bytes allocated at most during
+# the stage above what was allocated at its start, rows, mice: None if the stage did not count them,
+# depth: number of stages it ran in
+Record = namedtuple('Record', ['name', 'start', 'wall', 'cpu', 'peak', 'rows', 'mice', 'depth'])
+
+_enabled = False
+_records = list()
+_stack = list()         # running stages
+_origin = 0.0
+_trace = None           # file name of the Chrome trace
+_cprofile = None        # folder of the cProfile dumps
+_reported = False
+
+# stage that records nothing, returned by stage() when profiling is off
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, data):
+        pass
+
+_NO_STAGE = _NoStage()
+
+# a running stage, count(data) sets its rows and mice from a list of arrays of timestamps(one per mouse)
+class _Stage:
+    def __init__(self, name, rows, mice):
+        self.name = name
+        self.rows = rows
+        self.mice = mice
+        self.profile = None
+
+    def count(self, data):
+        self.mice = len(data)
+        self.rows = int(sum(len(el) for el in data))
+
+    def __enter__(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if len(_stack) != 0:    # keep the peak of the outer stage before it is reset
+            _stack[-1].peak = max(_stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.base = self.peak = current
+        # a single profiler can run at a time, inner stages are in the dump of the outer one
+        if _cprofile is not None and all(el.profile is None for el in _stack):
+            self.profile = cProfile.Profile()
+        _stack.append(self)
+        self.start = time.perf_counter()
+        self.cpu = time.process_time()
+        if self.profile is not None:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        _stack.pop()
+        if len(_stack) != 0:
+            _stack[-1].peak = max(_stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        _records.append(Record(self.name, self.start - _origin, wall, cpu, peak - self.base, self.rows, self.mice,
+                               len(_stack)))
+        if self.profile is not None:
+            os.makedirs(_cprofile, exist_ok=True)
+            self.profile.dump_stats(os.path.join(_cprofile, '%03d_%s.prof' % (len(_records), self.name)))
+        return False
+
+# returns a context manager timing the code in its block, e.g.
+#     with stage('fill_bins', mice=len(data)) as s:
+#         ...
+#         s.count(data)
+def stage(name, rows=None, mice=None):
+    if not _enabled:
+        return _NO_STAGE
+    return _Stage(name, rows, mice)
+
+# decorator running the whole function as a stage
+def timed(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enabled():
+    return _enabled
+
+# turns profiling on, trace: JSON file for the Chrome trace, cprofile: folder for the cProfile dumps
+# at_exit: print the summary(and write the trace) when the program ends
+def enable(trace=None, cprofile=None, at_exit=True):
+    global _enabled, _origin, _trace, _cprofile
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not _enabled:
+        _origin = time.perf_counter()
+    _enabled = True
+    _trace = trace or _trace
+    _cprofile = cprofile or _cprofile
+    if at_exit:
+        atexit.unregister(_report_at_exit)
+        atexit.register(_report_at_exit)
+
+def disable():
+    global _enabled
+    _enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+# forgets all records
+def reset():
+    del _records[:]
+
+# returns list of Record of the finished stages, in the order they finished
+def records():
+    return list(_records)
+
+# returns lines of a table with one row per stage name(in the order they first ran): number of runs, total wall
+# and CPU time, the highest peak memory, and the total rows and the most mice processed
+def summary(records=None):
+    records = _records if records is None else records
+    stages = dict()
+    for el in records:
+        stages.setdefault(el.name, list()).append(el)
+    lines = ['%-24s %5s %10s %10s %10s %10s %5s' % ('stage', 'runs', 'wall s', 'cpu s', 'peak MB', 'rows', 'mice')]
+    for name, runs in stages.items():
+        rows = [el.rows for el in runs if el.rows is not None]
+        mice = [el.mice for el in runs if el.mice is not None]
+        lines.append('%-24s %5d %10.4f %10.4f %10.2f %10s %5s' % (
+            '  ' * runs[0].depth + name, len(runs), sum(el.wall for el in runs), sum(el.cpu for el in runs),
+            max(el.peak for el in runs) / 2.0**20, sum(rows) if rows else '', max(mice) if mice else ''))
+    return lines
+
+# writes the records as complete events of the Chrome trace format(times in microseconds)
+def write_trace(filename, records=None):
+    records = _records if records is None else records
+    events = [{'name': el.name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0, 'ts': el.start * 1e6, 'dur': el.wall * 1e6,
+               'args': {'cpu_s': el.cpu, 'peak_bytes': el.peak, 'rows': el.rows, 'mice': el.mice}}
+              for el in records]
+    with open(filename, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+# prints the summary to stderr and writes the trace, once
+def report():
+    global _reported
+    _reported = True
+    if len(_records) == 0:
+        return
+    print('\n'.join(summary()), file=sys.stderr)
+    if _trace is not None:
+        write_trace(_trace)
+        print('trace saved in %s' % _trace, file=sys.stderr)
+    if _cprofile is not None:
+        print('cProfile dumps saved in %s' % _cprofile, file=sys.stderr)
+
+def _report_at_exit():
+    if _enabled and not _reported:
+        report()
+
+if os.environ.get('FEDPY_PROFILE', '0') not in ('', '0'):
+    enable(os.environ.get('FEDPY_TRACE'), os.environ.get('FEDPY_CPROFILE'))
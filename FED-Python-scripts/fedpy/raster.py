@@ -0,0 +1,70 @@
+'''
+Purpose: fast drawing of the pellet events of many mice (plot_timeline, plot_meals).
+All ticks of all mice are a single LineCollection instead of one eventplot per mouse, and all meals are another
+one instead of one line per meal, so building, panning and zooming the figure do not slow down with tens of
+thousands of artists. A row with more ticks in the visible time range than the axes is wide in pixels is
+decimated to the first tick of every pixel column(the screen shows the same), the ticks are chosen again when
+the time axis is zoomed or panned and when the window is resized.
+'''
+
+import numpy as np
+import matplotlib as mpl
+import matplotlib.dates as md
+from matplotlib.collections import LineCollection
+
+# ticks of timestamps of many mice, row i(from 0) is drawn at y=i+1 as eventplot(lineoffsets=i+1) did
+# takes the axes, list of datetime64 arrays(sorted, one per mouse), one color per row and length of the ticks
+class EventRaster:
+    def __init__(self, ax, data, colors, linelength=1):
+        self.ax = ax
+        self.rows = [md.date2num(np.asarray(el)) for el in data]
+        self.colors = mpl.colors.to_rgba_array(colors)
+        self.half = linelength / 2.0
+        self.collection = LineCollection(np.zeros((0, 2, 2)), linewidths=mpl.rcParams['lines.linewidth'])
+        ax.add_collection(self.collection, autolim=False)
+        found = [el for el in self.rows if len(el) != 0]
+        if len(found) != 0:
+            ax.update_datalim([(min(el[0] for el in found), 1 - self.half),
+                               (max(el[-1] for el in found), len(self.rows) + self.half)])
+        ax.xaxis_date()
+        ax.autoscale_view()
+        ax.callbacks.connect('xlim_changed', self.update)
+        self.resize = ax.figure.canvas.mpl_connect('resize_event', self.update)
+        self.update()
+
+    # number of ticks drawn
+    def __len__(self):
+        return len(self.collection.get_segments())
+
+    # chooses the ticks of the visible time range
+    def update(self, *args):
+        left, right = self.ax.get_xlim()
+        columns = max(1, int(self.ax.bbox.width))
+        width = (right - left) / columns
+        xs, counts = list(), list()
+        for x in self.rows:
+            x = x[np.searchsorted(x, left):np.searchsorted(x, right, 'right')]
+            if len(x) > columns and width > 0:
+                column = ((x - left) / width).astype(np.int64)
+                x = x[np.flatnonzero(np.diff(column, prepend=-1))]
+            xs.append(x)
+            counts.append(len(x))
+        x = np.concatenate(xs) if len(xs) != 0 else np.zeros(0)
+        y = np.repeat(np.arange(1, len(self.rows) + 1, dtype=float), counts)
+        segments = np.empty((len(x), 2, 2))
+        segments[:, 0, 0] = segments[:, 1, 0] = x
+        segments[:, 0, 1] = y - self.half
+        segments[:, 1, 1] = y + self.half
+        self.collection.set_segments(segments)
+        self.collection.set_color(np.repeat(self.colors, counts, axis=0))
+
+# draws meals(structured array of MEAL_DTYPE, result of segment_meals) as horizontal lines from the first
+# to the last pellet, at y=mouse+1, returns the LineCollection
+def meal_lines(ax, meals, color='k'):
+    segments = np.empty((len(meals), 2, 2))
+    segments[:, 0, 0] = md.date2num(meals['start'])
+    segments[:, 1, 0] = md.date2num(meals['end'])
+    segments[:, :, 1] = (meals['mouse'] + 1.0)[:, np.newaxis]
+    lines = LineCollection(segments, colors=color, linewidths=mpl.rcParams['lines.linewidth'])
+    ax.add_collection(lines, autolim=False)
+    return lines
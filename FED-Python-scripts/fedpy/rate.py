@@ -0,0 +1,36 @@
+'''
+Purpose: eating rate(pellets per time bin) by night and by day (eating_rate.py).
+'''
+
+from .errors import FedError
+from .bins import get_number_of_bins, fill_bins
+from .stats import my_std_err
+from .times import extract_windows, get_border_times
+
+# returns a tuple of average rate and the rate of each mouse
+# raises FedError if there is no mouse or no bin(e.g. a night shorter than one bin)
+def get_rate(list_of_bins):
+    if len(list_of_bins) == 0 or any(len(el) == 0 for el in list_of_bins):
+        raise FedError("Not enough data\nfor one time bin")
+    individual_rates = [float(el.sum())/len(el) for el in list_of_bins]
+    return sum(individual_rates)/len(individual_rates), individual_rates
+
+# returns average eating rate, standard error, and data to error(for ttest)
+# takes as argument extracted data(list of common timestamps for all files), result of get_12h_intervals function
+# and time bin in seconds
+# raises FedError if there is no night or a night is shorter than one bin
+def get_nights_rate(extracted_data, full_nights, interval):
+    rates = []
+    data2err = []
+    # cut all nights (or days) at once, then fill the bins for each night separately
+    for only_night in extract_windows(extracted_data, full_nights):
+        the_oldest, the_newest = get_border_times(only_night)
+        how_many_bins = get_number_of_bins(the_newest, the_oldest, interval)
+        rate, individual_rates = get_rate(fill_bins(how_many_bins, only_night, the_oldest, interval))
+        rates.append(rate)
+        # concatenate all data (from all nights or days) for std error and ttest
+        data2err.extend(individual_rates)
+    if len(rates) == 0:
+        raise FedError("Not enough data\nfor a full night and day")
+    avg = sum(rates)/len(rates)     # calculate total average rate
+    return avg, my_std_err(data2err), data2err
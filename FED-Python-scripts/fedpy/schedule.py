@@ -0,0 +1,91 @@
+'''
+Purpose: light/dark schedule of an experiment. Nighttime(dark) and daytime(light)
+windows are generated arithmetically from the lights out/on hours for any time range,
+without looking at the pellet data, and cached per (schedule, start, end).
+'''
+
+from collections import namedtuple
+from functools import lru_cache
+import datetime as dt
+import numpy as np
+from .errors import FedError
+from .times import LIGHT, DARK
+
+DAY = 86400     # seconds
+
+# lights_out, lights_on: hours in 24hour format, may be fractional(e.g. 19.5) and the photoperiod does not have to be 12 hours
+# tz: None, or a time zone name(e.g. 'America/New_York') if the lights follow local time with daylight saving time,
+# timestamps are always local wall clock time as written by FED
+Schedule = namedtuple('Schedule', ['lights_out', 'lights_on', 'tz'], defaults=[None])
+
+# returns real length in seconds of wall clock windows in the given time zone
+# takes arrays of window starts and ends in seconds(wall clock time as if it was UTC)
+# raises FedError if there is no such time zone
+def _real_lengths(starts, ends, tz):
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):     # ValueError: not a time zone name, e.g. a path
+        raise FedError("Unknown time zone %s" % tz)
+    epoch = dt.datetime(1970, 1, 1)
+    def offset(seconds):
+        return (epoch + dt.timedelta(seconds=int(seconds))).replace(tzinfo=zone).utcoffset().total_seconds()
+    return np.array([(end - start) - (offset(end) - offset(start)) for start, end in zip(starts, ends)])
+
+# returns dark and light windows between start and end(seconds since 1970) as read only arrays:
+# dark(n x 2), dark_full(n), light(m x 2), light_full(m)
+# windows are cut to start-end, *_full marks the windows that were not cut and last the whole photoperiod
+@lru_cache(maxsize=64)
+def _windows(schedule, start, end):
+    lights_out = int(round(schedule.lights_out * 3600))
+    lights_on = int(round(schedule.lights_on * 3600))
+    if not (0 <= lights_out < DAY and 0 <= lights_on < DAY):
+        raise FedError("Hours in 24hour format")
+    dark_length = (lights_on - lights_out) % DAY
+    if dark_length == 0:
+        raise FedError("Lights out and lights on\nhave to be different hours")
+    # one dark and one light window starts every calendar day
+    days = np.arange(start // DAY - 1, end // DAY + 1) * DAY
+    dark_starts = days + lights_out
+    dark = np.stack((dark_starts, dark_starts + dark_length), axis=1)
+    light = np.stack((dark_starts + dark_length, dark_starts + DAY), axis=1)
+    result = []
+    for windows, length in ((dark, dark_length), (light, DAY - dark_length)):
+        windows = windows[(windows[:, 0] < end) & (windows[:, 1] > start)]
+        full = (windows[:, 0] >= start) & (windows[:, 1] <= end)
+        if schedule.tz is not None:
+            # e.g. a 12 hour night with a daylight saving time change lasts 11 or 13 hours
+            full &= _real_lengths(windows[:, 0], windows[:, 1], schedule.tz) == length
+        windows = np.clip(windows, start, end)
+        windows.flags.writeable = False
+        full.flags.writeable = False
+        result.extend((windows, full))
+    return tuple(result)
+
+def _seconds(date):
+    return int(np.datetime64(date, 's').astype(np.int64))
+
+def _as_intervals(windows):
+    dates = windows.astype('datetime64[s]')
+    return [(start, end) for start, end in dates]
+
+# returns a tuple of two lists of (start, end) intervals: nighttime and daytime, cut to start-end
+# (like get_intervals and reverse_intervals), takes a Schedule and start and end of the plot
+def schedule_windows(schedule, start, end):
+    dark, dark_full, light, light_full = _windows(schedule, _seconds(start), _seconds(end))
+    return _as_intervals(dark), _as_intervals(light)
+
+# returns a tuple of two lists of (start, end) intervals: full nights and full days between start and end
+# (like get_12h_intervals, for any photoperiod), takes a Schedule and start and end of the data
+def full_windows(schedule, start, end):
+    dark, dark_full, light, light_full = _windows(schedule, _seconds(start), _seconds(end))
+    return _as_intervals(dark[dark_full]), _as_intervals(light[light_full])
+
+# returns a tuple of arrays: phase(DARK or LIGHT) and start of the window(seconds since 1970) of each time
+# takes a Schedule and an array of times in seconds since 1970, windows include their start, not their end
+def window_of(schedule, seconds):
+    lights_out = int(round(schedule.lights_out * 3600))
+    dark_length = (int(round(schedule.lights_on * 3600)) - lights_out) % DAY
+    since = (np.asarray(seconds, dtype=np.int64) - lights_out) % DAY     # seconds since the last lights out
+    dark = since < dark_length
+    return np.where(dark, DARK, LIGHT), np.where(dark, seconds - since, seconds - since + dark_length)
@@ -0,0 +1,259 @@
+'''
+Purpose: summary statistics shared by the bar chart scripts (meal_bars.py, eating_rate.py).
+Two groups(e.g. dark and light) are compared for many measures at once: each group is a 2-D array with one
+row per measure and one value per column(mouse, night...), rows with fewer values are padded with NaN(see pad).
+Means, standard errors, t-tests, effect sizes, permutation tests and bootstrap confidence intervals of all rows
+are computed together and returned as a table, a list of Comparison(one per measure), which also decides the
+significance stars of the plots. Resamples of all rows are drawn at once as 3-D index arrays(resamples x rows x
+values), in blocks of a capped size, each with its own random generator spawned from a fixed seed, so the results
+do not depend on how the blocks are spread over processes.
+'''
+
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.stats import t as t_distribution
+
+# my std error function to calculate standard errors from given list
+# returns -1 if there is not enough data (less than 2 values)
+def my_std_err(my_list):
+    values = np.asarray(my_list, dtype=float)
+    if len(values) < 2:
+        return -1
+    return float(np.std(values, ddof=1) / math.sqrt(len(values)))
+
+# one row of the table of compare function, a: first group(e.g. dark), b: second group(e.g. light)
+# n: number of values, sem: standard error(NaN for less than 2 values), t, df, p: t-test,
+# d: Cohen's d(d_z of the differences for paired groups), g: Hedges' g(bias corrected d),
+# p_perm: permutation test p value, ci_low, ci_high: bootstrap confidence interval of mean_a - mean_b(both NaN
+# if not done), testable: both groups have at least 2 values and a standard error that is not 0, as the scripts
+# require for std errors and significance
+Comparison = namedtuple('Comparison', ['measure', 'n_a', 'mean_a', 'sem_a', 'n_b', 'mean_b', 'sem_b',
+                                       't', 'df', 'p', 'd', 'g', 'p_perm', 'ci_low', 'ci_high', 'testable'])
+
+# returns a 2-D float array(rows x longest row) of a list of rows of different lengths, padded with NaN
+def pad(rows):
+    rows = [np.asarray(el, dtype=float).ravel() for el in rows]
+    values = np.full((len(rows), max([len(el) for el in rows] + [0])), np.nan)
+    for i, el in enumerate(rows):
+        values[i, :len(el)] = el
+    return values
+
+# returns a tuple of arrays(one value per row): number of values, mean, variance(ddof=1) of a 2-D array,
+# NaN values are skipped, mean is NaN without values and variance for less than 2 values
+def _moments(values):
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n = (~np.isnan(values)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(values, axis=1) / n
+        var = np.nansum((values - mean[:, np.newaxis])**2, axis=1) / (n - 1)
+    var[n < 2] = np.nan
+    return n, mean, var
+
+# returns a tuple of arrays(one value per row): number of values, mean and standard error of a 2-D array
+def describe(values):
+    n, mean, var = _moments(values)
+    with np.errstate(invalid='ignore'):
+        return n, mean, np.sqrt(var / n)
+
+# pairs of a paired comparison: differences a-b of the columns where both groups have a value
+def _differences(a, b):
+    a, b = np.atleast_2d(np.asarray(a, dtype=float)), np.atleast_2d(np.asarray(b, dtype=float))
+    width = max(a.shape[1], b.shape[1])
+    a = np.pad(a, ((0, 0), (0, width - a.shape[1])), constant_values=np.nan)
+    b = np.pad(b, ((0, 0), (0, width - b.shape[1])), constant_values=np.nan)
+    return a - b
+
+# returns a tuple of arrays(one value per row): t statistic, degrees of freedom and two-sided p value
+# of the rows of a and b(2-D arrays with the same number of rows), NaN where the test can not be done
+# equal_var: Student's t-test(as scipy.stats.ttest_ind, used by the scripts), False: Welch's t-test
+# paired: one sample t-test of the differences of the columns(e.g. mice) where both groups have a value
+# the degrees of freedom are as scipy.stats.ttest_ind/ttest_rel, also where t is NaN, e.g. Welch's 1 for
+# groups without variance, and a group without values has NaN
+def ttest(a, b, equal_var=True, paired=False):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if paired:
+            n, mean, var = _moments(_differences(a, b))
+            t = mean / np.sqrt(var / n)
+            df = np.where(n > 0, n - 1.0, np.nan)
+        else:
+            n_a, mean_a, var_a = _moments(a)
+            n_b, mean_b, var_b = _moments(b)
+            if equal_var:
+                # a group with one value adds nothing to the pooled variance
+                df = n_a + n_b - 2.0
+                pooled = (_squares(n_a, var_a) + _squares(n_b, var_b)) / df
+                t = (mean_a - mean_b) / np.sqrt(pooled * (1.0 / n_a + 1.0 / n_b))
+            else:
+                se_a, se_b = var_a / n_a, var_b / n_b
+                df = (se_a + se_b)**2 / (se_a**2 / (n_a - 1) + se_b**2 / (n_b - 1))
+                df[np.isnan(df)] = 1.0
+                t = (mean_a - mean_b) / np.sqrt(se_a + se_b)
+            df[(n_a == 0) | (n_b == 0)] = np.nan
+        p = 2 * t_distribution.sf(np.abs(t), df)
+    return t, df, p
+
+# sums of the squared deviations from the mean(0 for one value) of rows with n values and variance var
+def _squares(n, var):
+    return np.where(n == 1, 0.0, (n - 1) * var)
+
+# returns a tuple of arrays(one value per row): Cohen's d(pooled standard deviation) and Hedges' g of a and b,
+# paired: d_z, the mean of the differences divided by their standard deviation
+def effect_size(a, b, paired=False):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if paired:
+            n, mean, var = _moments(_differences(a, b))
+            d = mean / np.sqrt(var)
+            df = n - 1.0
+        else:
+            n_a, mean_a, var_a = _moments(a)
+            n_b, mean_b, var_b = _moments(b)
+            df = n_a + n_b - 2.0
+            d = (mean_a - mean_b) / np.sqrt((_squares(n_a, var_a) + _squares(n_b, var_b)) / df)
+        g = d * (1 - 3 / (4 * df - 1))
+    return d, g
+
+# values drawn at a time by the resampling(permutation_test, bootstrap_ci), this keeps the memory use flat
+BLOCK_VALUES = 2**20
+
+# the resamples are done in blocks of at most BLOCK_VALUES values(at least one resample), every block has its own
+# random generator spawned from the seed, so the same seed gives the same results with any chunk_size and any
+# number of workers: a chunk(the work of a process) is a run of whole blocks of at most chunk_size values
+# returns list of chunks, each a list of (resamples, SeedSequence) of its blocks
+def _chunks(resamples, values, seed, chunk_size):
+    step = max(1, BLOCK_VALUES // max(1, values))
+    counts = [min(step, resamples - el) for el in range(0, resamples, step)]
+    blocks = list(zip(counts, np.random.SeedSequence(seed).spawn(len(counts))))
+    per_chunk = max(1, chunk_size // max(1, step * values))
+    return [blocks[el:el + per_chunk] for el in range(0, len(blocks), per_chunk)]
+
+# returns list of the results of function(prepared, resamples, seed) of all blocks, in the order of the blocks
+# workers: number of processes the chunks are spread over(None or 1: no processes)
+def _map_chunks(function, prepared, chunks, workers):
+    if workers is None or workers == 1 or len(chunks) < 2:
+        results = [_run_blocks(function, prepared, el) for el in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_blocks, [function] * len(chunks), [prepared] * len(chunks), chunks))
+    return [el for chunk in results for el in chunk]
+
+def _run_blocks(function, prepared, blocks):
+    return [function(prepared, count, seed) for count, seed in blocks]
+
+# values of each row moved to the left(NaN at the end), and the number of values of each row
+def _packed(values):
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    valid = ~np.isnan(values)
+    values = np.take_along_axis(values, np.argsort(~valid, axis=1, kind='stable'), axis=1)
+    return np.nan_to_num(values), valid.sum(axis=1)
+
+# number of shuffles(count of them) with an absolute difference of means at least as big as observed, per row
+def _permutation_hits(prepared, count, seed):
+    paired, values, n_a, n_b, total, observed = prepared
+    rng = np.random.default_rng(seed)
+    rows, width = values.shape
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if paired:
+            signs = np.where(rng.random((count, rows, width)) < 0.5, -1.0, 1.0)
+            shuffled = np.abs((values * signs).sum(axis=2) / n_a)
+        else:
+            # rows with the same number of values in each group are shuffled together, only their values
+            sum_a = np.zeros((count, rows))
+            groups = np.unique(np.stack((n_a, n_b), axis=1), axis=0)
+            for first, second in groups:
+                mine = np.flatnonzero((n_a == first) & (n_b == second))
+                picked = rng.permuted(np.broadcast_to(values[mine, :first + second], (count, len(mine), first + second)),
+                                      axis=2)
+                sum_a[:, mine] = picked[:, :, :first].sum(axis=2)
+            shuffled = np.abs(sum_a / n_a - (total - sum_a) / n_b)
+        return (shuffled >= observed).sum(axis=0)
+
+# returns two-sided permutation test p values(one per row) of the difference of the means of a and b:
+# the values of a row are shuffled between the groups resamples times, p = (shuffles with a difference at least
+# as big + 1) / (resamples + 1), paired: the signs of the differences of the columns are flipped instead
+# seed, chunk_size, workers: see _chunks and _map_chunks
+def permutation_test(a, b, resamples=10000, seed=0, paired=False, chunk_size=2**22, workers=None):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if paired:
+            values, n_a = _packed(_differences(a, b))
+            observed = np.abs(values.sum(axis=1) / n_a)
+            total = n_b = None
+        else:
+            a, b = np.atleast_2d(np.asarray(a, dtype=float)), np.atleast_2d(np.asarray(b, dtype=float))
+            values = _packed(np.concatenate((a, b), axis=1))[0]
+            n_a, n_b = (~np.isnan(a)).sum(axis=1), (~np.isnan(b)).sum(axis=1)
+            total = values.sum(axis=1)
+            observed = np.abs(np.nansum(a, axis=1) / n_a - np.nansum(b, axis=1) / n_b)
+    # a little tolerance, so shuffles giving the same difference are counted despite rounding
+    prepared = (paired, values, n_a, n_b, total, observed * (1 - 1e-12))
+    hits = sum(_map_chunks(_permutation_hits, prepared, _chunks(resamples, values.size, seed, chunk_size), workers),
+               np.zeros(len(values)))
+    p = (hits + 1) / (resamples + 1)
+    p[~np.isfinite(observed)] = np.nan
+    return p
+
+# means of count resamples(with replacement) of the packed values of each row, shape count x rows
+def _resampled_means(rng, values, n, count):
+    rows, width = values.shape
+    with np.errstate(invalid='ignore', divide='ignore'):
+        picks = (rng.random((count, rows, width), dtype=np.float32) * n[:, np.newaxis].astype(np.float32)).astype(np.intp)
+        np.minimum(picks, np.maximum(n - 1, 0)[:, np.newaxis], out=picks)   # float32 rounding up to n
+        picked = np.take_along_axis(values[np.newaxis], picks, axis=2)
+        if (n < width).any():   # only the first n picks of a shorter row are its resample
+            picked *= np.arange(width) < n[:, np.newaxis]
+        return picked.sum(axis=2) / n
+
+def _bootstrap_chunk(prepared, count, seed):
+    (values_a, n_a), other = prepared
+    rng = np.random.default_rng(seed)
+    means = _resampled_means(rng, values_a, n_a, count)
+    if other is not None:
+        means -= _resampled_means(rng, other[0], other[1], count)
+    return means
+
+# returns a tuple of arrays(one value per row): low and high end of the percentile bootstrap confidence interval
+# of the mean of the rows of a, or with b of the difference of the means(a - b, groups resampled separately),
+# paired: of the mean of the differences of the columns(resampled together), NaN for rows without values
+# resamples, ci: number of resamples and confidence level, seed, chunk_size, workers: see _chunks and _map_chunks
+def bootstrap_ci(a, b=None, resamples=10000, ci=0.95, seed=0, paired=False, chunk_size=2**22, workers=None):
+    if b is not None and paired:
+        prepared = (_packed(_differences(a, b)), None)
+    else:
+        prepared = (_packed(a), _packed(b) if b is not None else None)
+    size = prepared[0][0].size + (prepared[1][0].size if prepared[1] is not None else 0)
+    means = _map_chunks(_bootstrap_chunk, prepared, _chunks(resamples, size, seed, chunk_size), workers)
+    means = np.concatenate(means) if len(means) != 0 else np.full((0, len(prepared[0][0])), np.nan)
+    low, high = np.full(means.shape[1], np.nan), np.full(means.shape[1], np.nan)
+    found = np.isfinite(means).all(axis=0) & (len(means) != 0)
+    alpha = (1 - ci) / 2 * 100
+    if found.any():
+        low[found], high[found] = np.percentile(means[:, found], [alpha, 100 - alpha], axis=0)
+    return low, high
+
+# returns the table(list of Comparison, one per row) comparing the rows of a and b(2-D arrays, or lists of rows
+# of different lengths), measures: name of each row, resamples: resamples of the permutation test and of the
+# bootstrap confidence interval of mean_a - mean_b at the ci level(0: not done), seed, workers: see _map_chunks
+def compare(measures, a, b, paired=False, equal_var=True, resamples=0, seed=0, ci=0.95, workers=None):
+    a = a if isinstance(a, np.ndarray) else pad(a)
+    b = b if isinstance(b, np.ndarray) else pad(b)
+    n_a, mean_a, sem_a = describe(a)
+    n_b, mean_b, sem_b = describe(b)
+    t, df, p = ttest(a, b, equal_var, paired)
+    d, g = effect_size(a, b, paired)
+    if resamples > 0:
+        p_perm = permutation_test(a, b, resamples, seed, paired, workers=workers)
+        ci_low, ci_high = bootstrap_ci(a, b, resamples, ci, seed, paired, workers=workers)
+    else:
+        p_perm = ci_low = ci_high = np.full(len(a), np.nan)
+    testable = (n_a >= 2) & (n_b >= 2) & (sem_a > 0) & (sem_b > 0)
+    return [Comparison(*row) for row in zip(measures, n_a.tolist(), mean_a.tolist(), sem_a.tolist(), n_b.tolist(),
+                                            mean_b.tolist(), sem_b.tolist(), t.tolist(), df.tolist(), p.tolist(),
+                                            d.tolist(), g.tolist(), p_perm.tolist(), ci_low.tolist(),
+                                            ci_high.tolist(), testable.tolist())]
+
+# significance stars of a p value: '**' for p < 0.01, '*' for p < 0.05, otherwise ''
+def stars(p):
+    if p is None or not p < 0.05:
+        return ''
+    return '*' if p >= 0.01 else '**'
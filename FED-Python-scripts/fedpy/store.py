@@ -0,0 +1,183 @@
+'''
+Purpose: columnar store of many experiments, so that an analysis does not parse the csv files again.
+Folders of FED csv files are exported once into Parquet files partitioned by cohort and date:
+    store/cohort=<cohort>/date=<YYYY-MM-DD>/<folder tag>.parquet
+with the columns device(<folder name>/<file name without .csv>), time, pellets and delays, sorted by device and time.
+Reading a cohort loads only the time and device columns of the pellets(pellet count not 0) between two
+times: whole date folders outside of the time range are skipped, and inside a file the time filter is
+pushed down to the Parquet row groups. Needs pyarrow(optional, only for this module).
+The firmware names every file FED_DATA.csv, so the device names start with the name of the folder(e.g. the SD card
+copied into mouse1/, mouse2/), exporting a folder whose device names are already in the cohort from another folder
+raises FedError.
+'''
+
+import os
+import hashlib
+import shutil
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .errors import FedError
+from .io import csv_files, read_fed_csv, ReadResult, ReadFailure
+
+# result of export_folder function
+# cohort: name of the cohort, devices: device names written, rows: rows written, failures: list of ReadFailure
+ExportResult = namedtuple('ExportResult', ['cohort', 'devices', 'rows', 'failures'])
+
+COLUMNS = ('device', 'time', 'pellets', 'delays')
+
+# returns pyarrow, pyarrow.parquet and pyarrow.dataset modules, raises FedError if pyarrow is not installed
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.dataset
+    except ImportError:
+        raise FedError("The store needs pyarrow\n(pip install pyarrow)")
+    return pyarrow, pyarrow.parquet, pyarrow.dataset
+
+def _schema(pa):
+    return pa.schema([('device', pa.string()), ('time', pa.timestamp('s')), ('pellets', pa.int64()),
+                      ('delays', pa.int64())])
+
+# cohort and date folders, dates as text(YYYY-MM-DD) so they compare like dates
+def _partition_schema(pa):
+    return pa.schema([('cohort', pa.string()), ('date', pa.string())])
+
+# returns name of the files of a source folder: the same folder exported again replaces its own files only
+def _tag(folder):
+    return hashlib.blake2b(os.path.abspath(folder).encode(), digest_size=8).hexdigest()
+
+# returns set of device names in the files of a cohort folder, except the files of the given tag
+def _cohort_devices(pq, directory, tag):
+    devices = set()
+    if not os.path.isdir(directory):
+        return devices
+    for date in os.listdir(directory):
+        path = os.path.join(directory, date)
+        if not os.path.isdir(path):
+            continue
+        for el in os.listdir(path):
+            if el.endswith('.parquet') and not el.startswith('.') and el != tag + '.parquet':
+                devices.update(pq.read_table(os.path.join(path, el), columns=['device']).column('device')
+                               .unique().to_pylist())
+    return devices
+
+# returns names of the cohorts of a store
+def cohorts(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(el[len('cohort='):] for el in os.listdir(root) if el.startswith('cohort='))
+
+# removes a cohort from the store
+def remove_cohort(root, cohort):
+    shutil.rmtree(os.path.join(root, 'cohort=' + cohort), ignore_errors=True)
+
+# exports all csv files of a folder(all rows, also the ones with pellet count 0) into the store, returns ExportResult
+# cohort: default the name of the folder, workers: number of files read at the same time
+# files of an earlier export of the same folder are replaced, files that can not be read are left out(failures)
+# device names are <folder name>/<file name without .csv>, raises FedError if one of them is already in the cohort
+# from another folder(e.g. two folders with the same name), the store is not changed then
+def export_folder(folder, root, cohort=None, workers=None):
+    pa, pq, ds = _arrow()
+    name = os.path.basename(os.path.normpath(os.path.abspath(folder)))
+    cohort = cohort or name
+    if cohort == '' or os.sep in cohort or '=' in cohort:
+        raise FedError("Wrong cohort name: %s" % cohort)
+    try:
+        files = csv_files(folder)
+    except OSError:
+        raise FedError("No file was read")
+
+    def read(file):
+        try:
+            return read_fed_csv(os.path.join(folder, file)), None
+        except OSError as e:
+            return None, e.strerror or str(e)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(read, files))
+    devices, columns, failures = list(), list(), list()
+    for file, (fed, reason) in zip(files, parsed):
+        if reason is None and len(fed.times) == 0:
+            reason = "no rows"
+        if reason is not None:
+            failures.append(ReadFailure(file, reason))
+            continue
+        device = name + '/' + os.path.splitext(file)[0]
+        order = np.argsort(fed.times, kind='stable')
+        devices.append(device)
+        columns.append((np.full(len(order), device, dtype=object), fed.times[order], fed.pellets[order], fed.delays[order]))
+    tag = _tag(folder)
+    directory = os.path.join(root, 'cohort=' + cohort)
+    repeated = sorted(_cohort_devices(pq, directory, tag).intersection(devices))
+    if len(repeated) != 0:
+        raise FedError("Devices already in cohort %s from another folder:\n%s" % (cohort, "\n".join(repeated)))
+    # remove the files of the last export of this folder
+    if os.path.isdir(directory):
+        for el in os.listdir(directory):
+            old = os.path.join(directory, el, tag + '.parquet')
+            if os.path.exists(old):
+                os.remove(old)
+    rows = 0
+    if len(columns) != 0:
+        device, times, pellets, delays = (np.concatenate(el) for el in zip(*columns))
+        days = times.astype('datetime64[D]')
+        # one file per date, rows of a device stay together and sorted by time
+        for day in np.unique(days):
+            mine = days == day
+            table = pa.Table.from_arrays([pa.array(device[mine], pa.string()), pa.array(times[mine], pa.timestamp('s')),
+                                          pa.array(pellets[mine], pa.int64()), pa.array(delays[mine], pa.int64())],
+                                         schema=_schema(pa))
+            path = os.path.join(directory, 'date=%s' % day)
+            os.makedirs(path, exist_ok=True)
+            tmp = os.path.join(path, '.%s.%d.tmp' % (tag, os.getpid()))   # files starting with . are not read
+            pq.write_table(table, tmp, row_group_size=2**16)
+            os.replace(tmp, os.path.join(path, tag + '.parquet'))
+            rows += len(table)
+    return ExportResult(cohort, devices, rows, failures)
+
+# returns a pyarrow Table with the given columns of the rows of the store, only the files and row groups
+# that can have rows between start and end(any of them None for no limit) are read
+# cohorts, devices: lists of names(None for all), pellets_only: leave out rows where pellet count is 0
+def query(root, cohorts=None, devices=None, start=None, end=None, columns=COLUMNS, pellets_only=False):
+    pa, pq, ds = _arrow()
+    if not os.path.isdir(root):
+        raise FedError("No store in %s" % root)
+    dataset = ds.dataset(root, schema=pa.unify_schemas([_schema(pa), _partition_schema(pa)]), format='parquet',
+                         partitioning=ds.partitioning(_partition_schema(pa), flavor='hive'))
+    conditions = list()
+    if cohorts is not None:
+        conditions.append(ds.field('cohort').isin(list(cohorts)))
+    if devices is not None:
+        conditions.append(ds.field('device').isin(list(devices)))
+    if start is not None:
+        start = np.datetime64(start, 's')
+        conditions.append(ds.field('date') >= str(start.astype('datetime64[D]')))
+        conditions.append(ds.field('time') >= pa.scalar(start, pa.timestamp('s')))
+    if end is not None:
+        end = np.datetime64(end, 's')
+        conditions.append(ds.field('date') <= str(end.astype('datetime64[D]')))
+        conditions.append(ds.field('time') <= pa.scalar(end, pa.timestamp('s')))
+    if pellets_only:
+        conditions.append(ds.field('pellets') != 0)
+    condition = None
+    for el in conditions:
+        condition = el if condition is None else condition & el
+    return dataset.to_table(columns=list(columns), filter=condition)
+
+# returns ReadResult(files: device names, data: sorted datetime64[s] arrays of the pellets of each device, failures: [])
+# of a cohort between start and end, like read_all of the exported folder(devices ordered by name)
+# raises FedError if there is no pellet in the store for the cohort and time range
+def read_store(root, cohort, start=None, end=None, devices=None):
+    table = query(root, [cohort], devices, start, end, columns=('device', 'time'), pellets_only=True)
+    if table.num_rows == 0:
+        raise FedError("No data of %s in the store" % cohort)
+    # device names as indexes into the few distinct names, not as millions of strings
+    names = table.column('device').dictionary_encode().combine_chunks()
+    found, rank = np.unique(names.dictionary.to_numpy(zero_copy_only=False), return_inverse=True)
+    device = rank[names.indices.to_numpy()]
+    times = table.column('time').to_numpy().astype('datetime64[s]')
+    order = np.lexsort((times, device))
+    bounds = np.searchsorted(device[order], np.arange(len(found) + 1))
+    times = times[order]
+    return ReadResult(list(found), [times[bounds[i]:bounds[i+1]] for i in range(len(found))], [])
@@ -0,0 +1,119 @@
+'''
+Purpose: the meal statistics of meal_bars.py(pellets in meals, meal duration, pellets eaten during meals(%),
+meals per cycle, for nights and days, with std errors and ttest p values) for many meal criteria at once
+(every combination of meal intervals, meal sizes and pellet weights), without running the script for each one.
+The data is cut to full nights and days once, and the gaps between consecutive pellets of each mouse and
+the night/day cycle of every pellet are computed once. Meal intervals between the same two neighbouring gaps
+(of the sorted gaps) give the same meals and are segmented once, each meal size(minimum pellets) is a filter
+of the meals of an interval. Intervals are spread over threads, or processes.
+'''
+
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+from .times import interval_index, locate
+from .meals import gram2pellet, all_night_pellets, phase_meal_stats, meal_percent
+from .analysis import check_options, full_cycles, meal_bar_tests
+from .profiling import stage
+
+# result of one combination of meal criteria
+# night, day: dictionaries with the same statistics as analyze_meal_bars(result['night'], result['day'])
+# do_stats, p, table: as in analyze_meal_bars
+SweepRow = namedtuple('SweepRow', ['meal_interval', 'meal_size', 'pellet_weight', 'min_pellets', 'night', 'day',
+                                   'do_stats', 'p', 'table'])
+
+_NO_GAP = np.iinfo(np.int64).max    # before the first pellet of each mouse
+
+# pellets of all mice in one array: seconds since 1970, mouse index, gap to the previous pellet of the same mouse
+# and night/day cycle of each pellet(-1 outside), sorted distinct gaps
+_Pellets = namedtuple('_Pellets', ['seconds', 'mouse', 'gaps', 'night', 'day', 'nightsNo', 'daysNo', 'filesNo',
+                                   'levels'])
+
+def _pellets(data2plot, full_nights, full_days):
+    lengths = [len(el) for el in data2plot]
+    times = np.concatenate(data2plot) if sum(lengths) != 0 else np.zeros(0, dtype='datetime64[s]')
+    seconds = times.astype('datetime64[s]').astype(np.int64)
+    mouse = np.repeat(np.arange(len(data2plot)), lengths)
+    gaps = np.full(len(seconds), _NO_GAP)
+    gaps[1:] = np.where(mouse[1:] == mouse[:-1], np.diff(seconds), _NO_GAP)
+    return _Pellets(seconds, mouse, gaps, locate(interval_index(full_nights), times),
+                    locate(interval_index(full_days), times), len(full_nights), len(full_days), len(data2plot),
+                    np.unique(gaps))
+
+# returns a tuple of 1-D arrays(one value per mouse) of number of meals, pellets in meals and meal duration in
+# seconds of the meals of a phase, meals start at pellets `first`(with their pellets and durations), cycle: of each pellet
+def _phase_totals(pellets, first, size, duration, cycle):
+    counted = cycle[first] >= 0
+    mouse = pellets.mouse[first][counted]
+    return (np.bincount(mouse, minlength=pellets.filesNo),
+            np.bincount(mouse, weights=size[counted], minlength=pellets.filesNo),
+            np.bincount(mouse, weights=duration[counted], minlength=pellets.filesNo))
+
+# meal statistics of a phase like _meal_phase of analysis.py, from the per mouse totals
+def _phase(totals, intervalsNo, total_pellets):
+    phase = phase_meal_stats(totals[0], totals[1], totals[2], intervalsNo)
+    phase.update({'mouse_meals': totals[0], 'mouse_pellets': totals[1].astype(np.int64)})
+    phase.update(meal_percent(phase['meal_pellets'], phase['meal_pellets_err'], phase['meal_pellets_p'], total_pellets))
+    return phase
+
+# pellets of the workers(set once per process by _init)
+_shared = dict()
+
+def _init(pellets, totals):
+    _shared['pellets'] = pellets
+    _shared['totals'] = totals
+
+# segments the meals of one meal interval and returns a list of (night, day) statistics, one per minimum pellets
+def _sweep_interval(task):
+    interval, min_pellets = task
+    pellets, (night_pellets, day_pellets) = _shared['pellets'], _shared['totals']
+    first = np.flatnonzero(pellets.gaps > interval)
+    last = np.append(first[1:], len(pellets.gaps)) - 1
+    size = last - first + 1
+    duration = (pellets.seconds[last] - pellets.seconds[first]).astype(float)
+    results = list()
+    for el in min_pellets:
+        keep = size >= el
+        results.append((_phase(_phase_totals(pellets, first[keep], size[keep], duration[keep], pellets.night),
+                               pellets.nightsNo, night_pellets),
+                        _phase(_phase_totals(pellets, first[keep], size[keep], duration[keep], pellets.day),
+                               pellets.daysNo, day_pellets)))
+    return results
+
+# returns list of SweepRow, one for each combination of meal_intervals(seconds), meal_sizes(grams) and
+# pellet_weights(grams), in the order of itertools.product(meal_intervals, meal_sizes, pellet_weights)
+# workers: number of meal intervals segmented at the same time, processes: in processes instead of threads
+# raises FedError for wrong options(as the options window of meal_bars.py) or not enough data
+def sweep_meals(data, lights_out, lights_on, meal_intervals, meal_sizes, pellet_weights, workers=None, processes=False):
+    combinations = list(itertools.product(meal_intervals, meal_sizes, pellet_weights))
+    for interval, size, weight in combinations:
+        check_options(lights_out, lights_on, meal_interval=interval, meal_size=size, pellet_weight=weight)
+    data2plot, full_nights, full_days = full_cycles(data, lights_out, lights_on)
+    with stage('sweep_prepare') as s:
+        pellets = _pellets(data2plot, full_nights, full_days)
+        totals = (all_night_pellets(data2plot, full_nights), all_night_pellets(data2plot, full_days))
+        s.count(data2plot)
+    # intervals with the same number of distinct gaps not longer than them give the same meals
+    group = {el: int(np.searchsorted(pellets.levels, el, side='right')) for el in set(meal_intervals)}
+    min_pellets = sorted(set(gram2pellet(size, weight) for size in meal_sizes for weight in pellet_weights))
+    tasks = dict()
+    for el in sorted(group):
+        tasks.setdefault(group[el], el)
+    with stage('sweep_meals', rows=len(pellets.seconds) * len(tasks), mice=pellets.filesNo):
+        if workers == 1 or len(tasks) < 2:
+            _init(pellets, totals)
+            results = [_sweep_interval((el, min_pellets)) for el in tasks.values()]
+        elif processes:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(pellets, totals)) as executor:
+                results = list(executor.map(_sweep_interval, [(el, min_pellets) for el in tasks.values()]))
+        else:
+            _init(pellets, totals)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_sweep_interval, [(el, min_pellets) for el in tasks.values()]))
+    phases = {key: dict(zip(min_pellets, el)) for key, el in zip(tasks, results)}
+    chosen = [phases[group[interval]][gram2pellet(size, weight)] for interval, size, weight in combinations]
+    with stage('ttest'):
+        tests = meal_bar_tests(chosen)
+    return [SweepRow(interval, size, weight, gram2pellet(size, weight), night, day, do_stats, p, table)
+            for (interval, size, weight), (night, day), (do_stats, p, table) in zip(combinations, chosen, tests)]
@@ -0,0 +1,57 @@
+'''
+Purpose: seeded synthetic FED data, written as FED_DATA.csv files in the firmware format
+(Time,Pellet Count,Pellet Drop Delay), for benchmarks and tests without a real experiment.
+Mice eat in meals(bouts of pellets a few seconds apart) and meals start more often in the dark phase.
+'''
+
+import os
+import numpy as np
+from .io import format_fed_rows
+from .schedule import Schedule, window_of
+from .times import DARK
+
+DEFAULT_SCHEDULE = Schedule(15, 3)    # lights out at 3pm, lights on at 3am, like the scripts
+
+# returns a tuple of arrays of a single device: timestamps(sorted datetime64[s]), pellet counts and delays
+# rng: numpy Generator, start: time of the start of the recording, days: length of the recording
+# dark_meals, light_meals: meals per hour in each phase, meal_pellets: average pellets in a meal,
+# pellet_gap: average seconds between pellets of a meal
+# the default rates are high enough that every mouse eats soon after the start and shortly before the end of each
+# window, so the time all mice share in a window(eating_rate.py) is longer than a time bin
+def generate_device(rng, start, days, schedule=DEFAULT_SCHEDULE, dark_meals=2.5, light_meals=1.5, meal_pellets=12,
+                    pellet_gap=40):
+    start = np.datetime64(start, 's').astype(np.int64)
+    length = int(days * 86400)
+    # meal starts: Poisson process at the dark rate, thinned to the light rate in the light phase
+    top = max(dark_meals, light_meals) / 3600.0
+    candidates = start + np.cumsum(rng.exponential(1 / top, size=int(length * top * 1.2) + 10))
+    candidates = candidates[candidates < start + length].astype(np.int64)
+    phase = window_of(schedule, candidates)[0]
+    keep = rng.random(len(candidates)) < np.where(phase == DARK, dark_meals, light_meals) / 3600.0 / top
+    meal_starts = candidates[keep]
+    # pellets of each meal
+    sizes = 1 + rng.poisson(meal_pellets - 1, size=len(meal_starts))
+    gaps = rng.exponential(pellet_gap, size=int(sizes.sum())).astype(np.int64) + 1
+    first = np.cumsum(sizes) - sizes    # index of the first pellet of each meal
+    gaps[first] = 0
+    offsets = np.cumsum(gaps) - np.repeat(np.cumsum(gaps)[first], sizes)
+    times = np.sort(np.repeat(meal_starts, sizes) + offsets)
+    times = times[times < start + length]
+    delays = np.clip(np.diff(times, prepend=start), 1, 3600)
+    return times.astype('datetime64[s]'), np.arange(1, len(times) + 1), delays
+
+# writes `devices` csv files(FED0.csv, FED1.csv...) into a folder(made if needed) and returns their paths
+# each device starts at a random time during the first hours of `start` and records for `days` days
+# other keyword arguments are passed to generate_device
+def write_folder(path, devices=8, days=7, seed=0, start='2016-01-01T09:00:00', schedule=DEFAULT_SCHEDULE, **mouse):
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok=True)
+    paths = list()
+    for i in range(devices):
+        first = np.datetime64(start, 's') + np.timedelta64(int(rng.integers(0, 6 * 3600)), 's')
+        times, pellets, delays = generate_device(rng, first, days, schedule, **mouse)
+        filename = os.path.join(path, 'FED%d.csv' % i)
+        with open(filename, 'wb') as f:
+            f.write(format_fed_rows(times, pellets, delays, header=True))
+        paths.append(filename)
+    return paths
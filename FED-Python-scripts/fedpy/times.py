@@ -0,0 +1,175 @@
+'''
+Purpose: common time period of all files, nighttime/daytime intervals and
+extraction of timestamps between two dates. Timestamps are sorted datetime64[s]
+arrays (one per file), intervals are lists of (start, end) datetime64[s] tuples.
+'''
+
+from collections import namedtuple
+import numpy as np
+from .errors import FedError
+
+# 43200sec=12hours
+HALF_DAY = np.timedelta64(43200, 's')
+
+# timestamps handled in a single vectorized pass over several files(fill_bins, segment_meals), more files are
+# done in groups, so the temporary arrays do not grow with the length of the recording(e.g. memory-mapped data)
+CHUNK_ROWS = 2**22
+
+# phases of the light/dark schedule(schedule.window_of)
+LIGHT, DARK = 0, 1
+
+# sorted starts and ends(datetime64[s] arrays) of non overlapping intervals, built once by interval_index
+# and then used to label any number of timestamps
+IntervalIndex = namedtuple('IntervalIndex', ['starts', 'ends'])
+
+# returns the earliest common date and latest common date
+# we are interested only in the common time period
+# takes a list of arrays of timestamps as an argument (result of read_all function)
+# raises FedError if there is no file or a file has no timestamps
+def get_border_times(list_all):
+    if len(list_all) == 0 or any(len(el) == 0 for el in list_all):
+        raise FedError("Not enough data\nfor a common time period")
+    # the latest first timestamp is the earliest common date
+    earliest = max(el.min() for el in list_all)
+    # the earliest last timestamp is the latest common date
+    latest = min(el.max() for el in list_all)
+    return earliest, latest
+
+# returns list of (first, last) ranges of files(list_all[first:last]) with at most chunk_size timestamps together,
+# a longer file is a group of its own
+def file_groups(list_all, chunk_size=CHUNK_ROWS):
+    groups = list()
+    first, rows = 0, 0
+    for i, el in enumerate(list_all):
+        if i > first and rows + len(el) > chunk_size:
+            groups.append((first, i))
+            first, rows = i, 0
+        rows += len(el)
+    if first < len(list_all):
+        groups.append((first, len(list_all)))
+    return groups
+
+# returns start and end indexes of the windows in a sorted array of timestamps (both window ends included)
+# takes an array of timestamps and arrays of window starts and ends, found by binary search
+# note: the end index is the first occurrence of the last timestamp in the window + 1, like list.index
+# in the original scripts, so repeated timestamps at the end of a window are left out
+def window_indices(timestamps, starts, ends):
+    start_index = np.searchsorted(timestamps, starts, side='left')
+    end_index = np.searchsorted(timestamps, ends, side='right')
+    found = end_index > start_index
+    end_index[found] = np.searchsorted(timestamps, timestamps[end_index[found] - 1], side='left') + 1
+    end_index[~found] = start_index[~found]
+    return start_index, end_index
+
+# returns data from start to end date only (a list of arrays of timestamps)
+# takes as an argument a list of arrays of timestamps (result of read_all function)
+# and the earliest and latest common dates we want to plot (results of get_border_times function)
+# both dates are included, returned arrays are views of the given ones(no copy)
+def extract_times(list_all, start_date, end_date):
+    return extract_windows(list_all, [(start_date, end_date)])[0]
+
+# returns data of all windows at once: a list(one for each window) of lists of arrays(one for each file)
+# takes as an argument a list of arrays of timestamps and a list of (start, end) windows, e.g. all full nights
+# returned arrays are views of the given ones(no copy)
+def extract_windows(list_all, windows):
+    starts = np.array([el[0] for el in windows], dtype='datetime64[s]')
+    ends = np.array([el[1] for el in windows], dtype='datetime64[s]')
+    extracted = [list() for i in range(len(windows))]
+    for el in list_all:
+        start_index, end_index = window_indices(el, starts, ends)
+        for i in range(len(windows)):
+            extracted[i].append(el[start_index[i]:end_index[i]])
+    return extracted
+
+# returns list of start-end tuples representing given interval of nighttime hours
+# takes as an argument: a single array of timestamps(one sample file), start_hour=beginning of nighttime,
+# end_hour=end of nighttime(24hours:1-00), and start and end time of a whole plot(data from: get_border_times(list_all))
+def get_intervals(list_of_timestamps, start_hour, end_hour, earliest, latest):
+    interval = list()
+    # calendar days in the file
+    dates_from_file = np.unique(list_of_timestamps.astype('datetime64[D]')).astype('datetime64[s]')
+    start_offset = np.timedelta64(start_hour * 3600, 's')
+    end_offset = np.timedelta64(end_hour * 3600, 's')
+    if start_hour >= 12:    # nighttime ends the next day
+        for i in range(len(dates_from_file)):
+            night_start = dates_from_file[i] + start_offset
+            if (i+1) == len(dates_from_file):       # the last interval ends with the plot
+                if len(dates_from_file) == 1:
+                    interval.append((max(night_start, earliest), latest))
+                elif night_start <= latest:
+                    interval.append((night_start, latest))
+                break
+            night_end = dates_from_file[i+1] + end_offset
+            interval.append((max(night_start, earliest), min(night_end, latest)))
+    else:   # lights out hour before noon, nighttime ends the same day
+        for i in range(len(dates_from_file)):
+            night_start = dates_from_file[i] + start_offset
+            night_end = dates_from_file[i] + end_offset
+            if (i == len(dates_from_file) - 1) or i == 0:   # first and last interval are cut to the plot
+                interval.append((max(night_start, earliest), min(night_end, latest)))
+            else:
+                interval.append((night_start, night_end))
+    return interval
+
+# returns daytime intervals based on nights
+# it takes as arguments start and end time of a whole plot(data from: get_border_times(list_all))=earliest, latest
+# and nighttime intervals(result of get_intervals)
+def reverse_intervals(earliest, latest, interval):
+    daytime = list()
+    if len(interval) == 0:
+        return daytime
+    if earliest < interval[0][0]:
+        daytime.append((earliest, interval[0][0]))
+    for i in range(len(interval) - 1):
+        daytime.append((interval[i][1], interval[i+1][0]))
+    if interval[-1][1] < latest:
+        daytime.append((interval[-1][1], latest))
+    return daytime
+
+# look for full 12 hour periods
+# given list of intervals as parameter it returns only the ones that last full 12 hours
+def get_12h_intervals(interval):
+    return [el for el in interval if el[1] - el[0] == HALF_DAY]
+
+# returns full 12hour nights and days(all timestamps), where number of days = number of nights
+# takes as an argument list of all timestamps, list of nighttime intervals and a list of daytime intervals
+# note: the longer of the two interval lists is trimmed in place
+def get_days_and_nights(extracted_data, full_nights, full_days):
+    # make full nights equal full days
+    while (len(full_days) != len(full_nights)):
+        if len(full_days) > len(full_nights):
+            del full_days[-1]
+        else:
+            del full_nights[-1]
+    if len(full_nights) == 0:
+        raise FedError("Not enough data\nfor a full night and day")
+    start = min(full_nights[0][0], full_days[0][0])
+    end = max(full_nights[-1][1], full_days[-1][1])
+    return extract_times(extracted_data, start, end)
+
+# returns IntervalIndex of a list of (start, end) intervals(e.g. result of get_12h_intervals function)
+# the cycle number of an interval is its position in the sorted index
+def interval_index(intervals):
+    starts = np.array([el[0] for el in intervals], dtype='datetime64[s]')
+    ends = np.array([el[1] for el in intervals], dtype='datetime64[s]')
+    order = np.argsort(starts, kind='stable')
+    return IntervalIndex(starts[order], ends[order])
+
+# returns cycle number of each timestamp(-1 if it is not in any interval), in one binary search pass
+# takes IntervalIndex(result of interval_index function) and an array of timestamps, both interval ends are included
+# note: a timestamp on the edge shared by two intervals goes to the later one
+def locate(index, timestamps):
+    timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+    cycle = np.searchsorted(index.starts, timestamps, side='right') - 1
+    inside = cycle >= 0
+    inside[inside] = timestamps[inside] <= index.ends[cycle[inside]]
+    return np.where(inside, cycle, -1)
+
+# returns 2-D array of pellet counts (files x intervals), both interval ends included
+# takes a list of arrays of timestamps and a list of intervals, each file is counted with two binary searches
+def cycle_counts(list_all, intervals):
+    index = interval_index(intervals)
+    counts = np.zeros((len(list_all), len(intervals)), dtype=np.int64)
+    for i, el in enumerate(list_all):
+        counts[i] = (np.searchsorted(el, index.ends, side='right') - np.searchsorted(el, index.starts, side='left'))
+    return counts
@@ -0,0 +1,148 @@
+'''
+Purpose: asyncio service following many FED devices at once (csv files, or folders of csv files
+on SD cards and network shares). Every poll the new rows of all files are parsed in worker threads,
+so the event loop is never blocked, and the pellets go into per-device ring buffers and rolling bins.
+Eating rate and bin statistics of each device are recomputed from these bounded buffers only, meals are
+found as the pellets come by a MealDetector, so they do not need the buffers at all.
+simulate_device writes a growing csv file like FED does, to run the watcher without real devices.
+'''
+
+import os
+import asyncio
+import datetime as dt
+from collections import namedtuple
+import numpy as np
+from .io import csv_files, format_fed_rows
+from .live import FileTail, RollingBins, RingBuffer
+from .meals import MealDetector
+from .schedule import Schedule
+from .rate import get_rate
+
+# statistics of a single device, recomputed after each poll with new pellets
+# pellets: all pellets seen, last: newest pellet, rate: average pellets per bin over the rolling bins,
+# bins: counts of the rolling bins(oldest first), meals: number of finished meals, pellets_per_meal and
+# meal_duration(seconds): averages of these meals, dark_meals and light_meals: finished meals by phase
+DeviceStats = namedtuple('DeviceStats', ['pellets', 'last', 'rate', 'bins', 'meals', 'pellets_per_meal', 'meal_duration',
+                                         'dark_meals', 'light_meals'])
+
+# one followed csv file
+# detector: MealDetector of the device
+class Device:
+    def __init__(self, filename, bin, binsNo, capacity, detector):
+        self.filename = filename
+        self.tail = FileTail(filename)
+        self.buffer = RingBuffer(capacity)
+        self.bin = bin
+        self.binsNo = binsNo
+        self.bins = None    # RollingBins, made with the first pellet(bins start at its midnight)
+        self.detector = detector
+        self.stats = None
+
+    # adds new pellets(in file order) to the buffers
+    def add(self, timestamps):
+        if self.tail.resets != 0:   # the file was replaced, start again
+            self.tail.resets = 0
+            self.buffer = RingBuffer(len(self.buffer.buffer))
+            self.bins = None
+            self.detector = MealDetector(self.detector.interval, self.detector.min_pellets, self.detector.schedule)
+        if len(timestamps) == 0:
+            return False
+        timestamps = np.sort(timestamps, kind='stable')
+        if self.bins is None:
+            self.bins = RollingBins(1, timestamps[0].astype('datetime64[D]'), self.bin, self.binsNo)
+        self.buffer.add(timestamps)
+        self.bins.add(0, timestamps)
+        self.detector.add(timestamps)
+        return True
+
+    # returns DeviceStats of the buffers and of the meal detector
+    def compute(self):
+        times, counts = self.bins.window()
+        counts = counts[:, ~np.isnan(counts[0])]
+        meals, pellets, duration = self.detector.totals
+        dark, light = self.detector.phase_totals()
+        self.stats = DeviceStats(self.buffer.total, self.buffer.values()[-1],
+                                 get_rate(counts)[0] if counts.shape[1] != 0 else 0.0, counts[0],
+                                 int(meals), pellets/meals if meals != 0 else 0.0, duration/meals if meals != 0 else 0.0,
+                                 int(dark[0]), int(light[0]))
+        return self.stats
+
+# follows csv files and folders(every csv file in them, also files added later)
+# bin: time bin in seconds, window: seconds kept in the rolling bins, capacity: pellets kept per device,
+# meal_interval and min_pellets: meal criteria(see segment_meals), schedule: Schedule for the meal phases,
+# poll: seconds between polls, on_update: function called with the Device after its statistics changed
+# (e.g. to print or plot them), clock: function returning the time of the devices, an open meal is finished
+# when it is more than meal_interval after its last pellet(default: the computer clock)
+class Watcher:
+    def __init__(self, sources, bin=3600, window=86400, capacity=100000, meal_interval=1800, min_pellets=1,
+                 schedule=Schedule(15, 3), poll=1.0, on_update=None, clock=None):
+        self.sources = list(sources)
+        self.schedule = schedule
+        self.clock = clock if clock is not None else (lambda: np.datetime64(dt.datetime.now(), 's'))
+        self.bin = bin
+        self.binsNo = max(1, window // bin)
+        self.capacity = capacity
+        self.meal_interval = meal_interval
+        self.min_pellets = min_pellets
+        self.poll = poll
+        self.on_update = on_update
+        self.devices = dict()   # file path: Device, in the order they were found
+
+    # adds Device of every csv file that is not followed yet
+    def discover(self):
+        for source in self.sources:
+            if os.path.isdir(source):
+                try:
+                    files = [os.path.join(source, el) for el in csv_files(source)]
+                except OSError:     # e.g. a network share that is not mounted at the moment
+                    continue
+            else:
+                files = [source]
+            for el in files:
+                if el not in self.devices:
+                    detector = MealDetector(self.meal_interval, self.min_pellets, self.schedule)
+                    self.devices[el] = Device(el, self.bin, self.binsNo, self.capacity, detector)
+
+    # reads all devices once(in threads, at the same time), returns list of devices with new pellets
+    async def poll_once(self):
+        self.discover()
+        devices = list(self.devices.values())
+        new = await asyncio.gather(*(asyncio.to_thread(el.tail.read_pellets) for el in devices))
+        updated = list()
+        now = self.clock()
+        for device, timestamps in zip(devices, new):
+            added = device.add(timestamps)
+            if len(device.detector.flush(now)) != 0 or added:
+                device.compute()
+                updated.append(device)
+                if self.on_update is not None:
+                    self.on_update(device)
+        return updated
+
+    # polls until stop(asyncio.Event) is set, or forever
+    async def run(self, stop=None):
+        stop = stop if stop is not None else asyncio.Event()
+        while not stop.is_set():
+            await self.poll_once()
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll)
+            except asyncio.TimeoutError:
+                pass
+
+# writes a growing FED csv file, like a device during an experiment: meals(bursts of pellets) separated by longer gaps
+# speed: simulated seconds per real second, start: time of the first pellet(default: now), seed: random seed
+# pellets: number of pellets to write(None: until stop is set), stop: asyncio.Event
+async def simulate_device(filename, speed=600.0, start=None, seed=0, pellets=None, stop=None, meal_gap=60, break_gap=5400):
+    rng = np.random.default_rng(seed)
+    clock = np.datetime64(start if start is not None else dt.datetime.now(), 's')
+    with open(filename, 'wb') as f:
+        f.write(format_fed_rows([], [], [], header=True))
+    count = 0
+    while (pellets is None or count < pellets) and not (stop is not None and stop.is_set()):
+        # 1 of 15 pellets ends a meal
+        gap = rng.exponential(break_gap if rng.random() < 1/15 else meal_gap) + 1
+        await asyncio.sleep(gap / speed)
+        clock = clock + np.timedelta64(int(gap), 's')
+        count += 1
+        with open(filename, 'ab') as f:
+            f.write(format_fed_rows([clock], [count], [rng.integers(1, 90)]))
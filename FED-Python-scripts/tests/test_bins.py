@@ -0,0 +1,71 @@
+'''
+Purpose: timeline bins(bins.py, analyze_timeline) of devices that did not record during the same time.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import numpy as np
+import pytest
+from fedpy.analysis import analyze_timeline
+from fedpy.bins import fill_bins, mask_coverage, bin_summary, BinPyramid, get_number_of_bins
+
+HOUR = np.timedelta64(3600, 's')
+START = np.datetime64('2016-01-01T00:00:00')
+
+# a pellet every 10 minutes(+1 s, so none is on a bin edge) from `first` to `last` hour
+def _device(first, last):
+    return START + np.arange(first * 6, last * 6) * np.timedelta64(600, 's') + np.timedelta64(1, 's')
+
+@pytest.fixture
+def data():
+    # the first device records for 4 days, the second one only during the last 2 of them
+    return [_device(0, 96), _device(48, 96)]
+
+def test_common_period(data):
+    result = analyze_timeline(data, 3600, 19, 7)
+    assert result['start'] == data[1][0]
+    assert not np.isnan(result['bins']).any()
+    assert (result['covered'] == 2).all()
+    assert np.array_equal(result['avg'], result['bins'].mean(axis=0))
+    assert np.allclose(result['median'], np.median(result['bins'], axis=0))
+
+def test_partial_coverage(data):
+    result = analyze_timeline(data, 3600, 19, 7, common=False)
+    bins = result['bins']
+    assert result['start'] == data[0][0] and result['end'] == data[0][-1]
+    times = result['avg_times']
+    alone = times + HOUR < data[1][0]
+    # the second device is NaN before its recording and left out of the average there
+    assert np.isnan(bins[1, alone]).all() and not np.isnan(bins[0]).any()
+    assert (result['covered'][alone] == 1).all()
+    assert np.array_equal(result['avg'][alone], bins[0, alone])
+    assert np.isnan(result['std_err'][alone]).all()
+    both = times > data[1][0]
+    assert (result['covered'][both] == 2).all()
+    assert np.array_equal(result['avg'][both], bins[:, both].mean(axis=0))
+    assert not np.isnan(result['std_err'][both]).any()
+    assert result['do_std_err']
+    # without the mask the average of the first 2 days would be halved by the zeros of the second device
+    unmasked = fill_bins(bins.shape[1], result['plot_data'], result['start'], 3600)
+    assert unmasked[1, alone].sum() == 0 and (result['avg'][alone] > unmasked[:, alone].mean(axis=0)).all()
+
+def test_pyramid_coverage(data):
+    result = analyze_timeline(data, 1800, 19, 7, common=False)
+    pyramid = BinPyramid(result['plot_data'], result['start'], result['end'], counts=result['bins'], width=1800,
+                         coverage=data)
+    for width in pyramid.widths:
+        expected = mask_coverage(fill_bins(get_number_of_bins(result['end'], result['start'], width),
+                                           result['plot_data'], result['start'], width), data, result['start'], width)
+        assert np.array_equal(pyramid.levels[width], expected, equal_nan=True)
+
+def test_bin_summary_resamples(data):
+    result = analyze_timeline(data, 3600, 19, 7, common=False, resamples=200, seed=3)
+    again = analyze_timeline(data, 3600, 19, 7, common=False, resamples=200, seed=3)
+    assert np.array_equal(result['ci_low'], again['ci_low'], equal_nan=True)
+    covered = result['covered'] > 0
+    assert (result['ci_low'][covered] <= result['avg'][covered] + 1e-12).all()
+    assert (result['ci_high'][covered] >= result['avg'][covered] - 1e-12).all()
+    # a bin covered by one mouse has a single value to resample
+    alone = result['covered'] == 1
+    assert np.array_equal(result['ci_low'][alone], result['bins'][0, alone])
+    # without resamples there is no interval
+    assert np.isnan(bin_summary(result['bins'], resamples=0).ci_low).all()
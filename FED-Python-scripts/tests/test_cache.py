@@ -0,0 +1,59 @@
+'''
+Purpose: cache of parsed files(cache.py) in the cache folder of the user.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import os
+import numpy as np
+from fedpy import read_all
+from fedpy.cache import cache_dir, load_index
+from fedpy.synth import write_folder
+
+# nothing is written into the data folder, the cache is used by the next read
+def test_cache_outside_of_data_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv('FEDPY_CACHE', str(tmp_path / 'cache'))
+    folder = str(tmp_path / 'data')
+    write_folder(folder, devices=2, days=1, seed=0)
+    first = read_all(folder)
+    assert sorted(os.listdir(folder)) == ['FED0.csv', 'FED1.csv']
+    assert os.path.exists(os.path.join(cache_dir(folder), 'index.json'))
+    for old, new in zip(first, read_all(folder)):
+        assert np.array_equal(old, new)
+
+# a file edited without changing its size and modification time is parsed again
+def test_same_size_and_time(tmp_path, monkeypatch):
+    monkeypatch.setenv('FEDPY_CACHE', str(tmp_path / 'cache'))
+    folder = str(tmp_path / 'data')
+    filename = write_folder(folder, devices=1, days=1, seed=0)[0]
+    before = read_all(folder)[0]
+    stat = os.stat(filename)
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    # the first pellet one hour later(same number of bytes)
+    row = raw.index(b'\n') + 1
+    hour = raw.index(b' ', row) + 1
+    digit = raw[hour:hour + 2]
+    edited = raw[:hour] + b'%02d' % (int(digit) + 1) + raw[hour + 2:]
+    assert len(edited) == len(raw)
+    with open(filename, 'wb') as f:
+        f.write(edited)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    after = read_all(folder)[0]
+    assert not np.array_equal(after, before)
+    assert np.array_equal(after, read_all(folder, cache=False)[0])
+
+# a file touched(same content) keeps its memory-mapped pellet timestamps, also after a read without mmap
+def test_touched_file_keeps_pellets(tmp_path, monkeypatch):
+    monkeypatch.setenv('FEDPY_CACHE', str(tmp_path / 'cache'))
+    folder = str(tmp_path / 'data')
+    filename = write_folder(folder, devices=1, days=1, seed=0)[0]
+    first = read_all(folder, mmap=True)[0]
+    assert isinstance(first, np.memmap)
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert np.array_equal(read_all(folder)[0], first)
+    entry = load_index(cache_dir(folder))['FED0.csv']
+    assert entry['mtime'] == stat.st_mtime_ns + 10**9
+    assert entry['pellets_bytes'] > 0 and 'last' not in entry
+    mapped = read_all(folder, mmap=True)[0]
+    assert isinstance(mapped, np.memmap) and np.array_equal(mapped, first)
@@ -0,0 +1,65 @@
+'''
+Purpose: command line(python -m fedpy analyze) on short synthetic folders.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import os
+import pytest
+from fedpy import FedError
+from fedpy.analysis import check_options
+from fedpy.cli import main
+from fedpy.synth import write_folder
+
+# a folder of mice eating only at night(no meal of this seed runs into the day): no pellet and no time bin of
+# a day is shared by all mice
+@pytest.fixture
+def night(tmp_path):
+    folder = str(tmp_path / 'night')
+    write_folder(folder, devices=3, days=3, seed=0, dark_meals=1.0, light_meals=0)
+    return folder
+
+@pytest.fixture
+def good(tmp_path):
+    folder = str(tmp_path / 'good')
+    write_folder(folder, devices=3, days=3, seed=0)
+    return folder
+
+# a folder of the default synthetic data is analyzed with every time bin of the eating rate
+@pytest.mark.parametrize('bin', [900, 1800, 3600])
+def test_analyze_rate_default_folder(tmp_path, bin):
+    folder = str(tmp_path / 'default')
+    write_folder(folder)
+    out = str(tmp_path / 'out')
+    assert main(['analyze', 'rate', '--no-plot', '--no-cache', '--bin', str(bin), '--out', out, folder]) == 0
+    assert os.path.exists(os.path.join(out, 'default', 'rate.csv'))
+
+# a folder without enough data is reported, the other folders are still analyzed and the exit status is 1
+def test_analyze_rate_not_enough_data(tmp_path, capsys, night, good):
+    out = str(tmp_path / 'out')
+    status = main(['analyze', 'rate', '--no-plot', '--no-cache', '--out', out, night, good])
+    err = capsys.readouterr().err
+    assert status == 1
+    assert night + ': Not enough data' in err
+    assert '1 of 2 folders failed' in err
+    assert os.path.exists(os.path.join(out, 'good', 'rate.csv'))
+    assert not os.path.exists(os.path.join(out, 'night', 'rate.csv'))
+
+# a mouse eating only at night: mealbars reports the folder and goes on with the next one
+def test_analyze_mealbars_one_phase(tmp_path, capsys, night, good):
+    out = str(tmp_path / 'out')
+    status = main(['analyze', 'mealbars', '--no-plot', '--no-cache', '--out', out, night, good])
+    err = capsys.readouterr().err
+    assert status == 1
+    assert night + ': Not enough data' in err
+    assert os.path.exists(os.path.join(out, 'good', 'mealbars.csv'))
+    assert not os.path.exists(os.path.join(out, 'night', 'mealbars.csv'))
+
+# the same hour of lights out and lights on is a usage error(exit status 2) before any folder is read
+@pytest.mark.parametrize('analysis', ['timeline', 'rate', 'mealbars'])
+def test_same_lights_hours(tmp_path, capsys, analysis):
+    with pytest.raises(SystemExit) as e:
+        main(['analyze', analysis, '--no-plot', '--lights-out', '7', '--lights-on', '7', str(tmp_path / 'missing')])
+    assert e.value.code == 2
+    assert 'Lights out and lights on have to be different hours' in capsys.readouterr().err
+    with pytest.raises(FedError, match='Lights out and lights on'):
+        check_options(19, 19, bin=3600)
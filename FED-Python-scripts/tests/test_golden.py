@@ -0,0 +1,13 @@
+'''
+Purpose: the package against the original scripts(golden.py) on the synthetic folders of a seed.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+from fedpy import golden
+
+def test_golden(tmp_path, monkeypatch):
+    monkeypatch.setenv('FEDPY_CACHE', str(tmp_path / 'cache'))
+    checks = golden.run(seeds=(0,), directory=str(tmp_path), verbose=False)
+    assert len(checks) != 0 and any(el.equal for el in checks)
+    differ = [el for el in checks if el.equal is False]
+    assert differ == [], '\n'.join(golden.report(checks))
@@ -0,0 +1,161 @@
+'''
+Purpose: following csv files while they are written(live.py, watch.py and the live timeline of plots.py):
+rows appended in pieces with a half written last row, files replaced by shorter ones and new device files,
+the rolling bins against fill_bins of all rows.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import os
+import asyncio
+import numpy as np
+import pytest
+from fedpy.bins import fill_bins, get_averages2plot
+from fedpy.io import format_fed_rows, read_fed_csv
+from fedpy.live import FileTail, RollingBins, RingBuffer
+from fedpy.schedule import Schedule
+from fedpy.watch import Watcher
+
+START = np.datetime64('2016-01-01T06:00:00')
+
+# sorted random pellet times of a device over `hours` hours from START
+def _pellets(seed, hours=40, count=300):
+    rng = np.random.default_rng(seed)
+    return np.sort(START + rng.integers(0, hours * 3600, count).astype('timedelta64[s]'))
+
+def _rows(times, first=1):
+    return format_fed_rows(times, np.arange(first, first + len(times)), np.ones(len(times), dtype=int))
+
+def _append(filename, raw):
+    with open(filename, 'ab') as f:
+        f.write(raw)
+
+def _write(filename, raw):
+    with open(filename, 'wb') as f:
+        f.write(format_fed_rows([], [], [], header=True) + raw)
+
+# rows come only when complete, a shorter file is read again from its beginning
+def test_file_tail(tmp_path):
+    filename = str(tmp_path / 'FED0.csv')
+    times = _pellets(0, count=30)
+    tail = FileTail(filename)
+    assert len(tail.read_pellets()) == 0     # not there yet
+    raw = _rows(times)
+    _write(filename, raw[:100])
+    found = [tail.read_pellets()]
+    assert 0 < len(found[0]) < len(read_fed_csv(filename).times) + 1
+    assert np.array_equal(found[0], times[:len(found[0])])
+    # the rest of the half written row and more rows, in pieces of any size
+    for first in range(100, len(raw), 37):
+        _append(filename, raw[first:first + 37])
+        found.append(tail.read_pellets())
+    assert np.array_equal(np.concatenate(found), times)
+    assert tail.resets == 0
+    # a new experiment in the same file
+    _write(filename, _rows(times[:5]))
+    assert np.array_equal(tail.read_pellets(), times[:5])
+    assert tail.resets == 1
+    assert len(tail.read_pellets()) == 0
+
+# the window of the rolling bins is the same as the last bins of fill_bins of all pellets
+@pytest.mark.parametrize('interval, binsNo', [(3600, 24), (900, 10), (1800, 1000)])
+def test_rolling_bins(interval, binsNo):
+    data = [_pellets(seed) for seed in range(3)]
+    origin = START.astype('datetime64[D]')
+    bins = RollingBins(len(data), origin, interval, binsNo)
+    pieces = [np.array_split(el, 7) for el in data]
+    for step in range(7):
+        for i in range(len(data)):
+            bins.add(i, pieces[i][step])
+        times, counts = bins.window()
+        seen = [np.concatenate(el[:step + 1]) for el in pieces]
+        last = max(el.max() for el in seen)
+        ticks = bins.ticks(np.array([last]))[0]
+        expected = fill_bins(int(ticks), seen, origin, interval)
+        first = min(el.min() for el in seen)
+        start = bins.ticks(np.array([first]))[0]
+        # window ticks ticks-binsNo+1..ticks are bins ticks-binsNo..ticks-1 of fill_bins
+        shown = np.arange(ticks - binsNo + 1, ticks + 1)
+        assert len(times) == binsNo
+        assert np.array_equal(times, origin + (shown - 1) * np.timedelta64(interval, 's'))
+        assert np.isnan(counts[:, shown < start]).all()
+        inside = shown >= start
+        assert np.array_equal(counts[:, inside], expected[:, shown[inside] - 1])
+
+def test_ring_buffer():
+    times = _pellets(1, count=50)
+    buffer = RingBuffer(16)
+    for piece in np.array_split(times, 6):
+        buffer.add(piece)
+    buffer.add(times[:0])
+    assert buffer.total == 50 and len(buffer) == 16
+    assert np.array_equal(buffer.values(), times[-16:])
+    buffer.add(times)   # more than capacity at once
+    assert np.array_equal(buffer.values(), times[-16:])
+
+# a watcher follows the files of a folder, also files written later, and starts again with a replaced file
+def test_watcher(tmp_path):
+    folder = str(tmp_path / 'data')
+    os.mkdir(folder)
+    data = [_pellets(seed, hours=30) for seed in range(3)]
+    raws = [_rows(el) for el in data]
+    files = [os.path.join(folder, 'FED%d.csv' % i) for i in range(3)]
+    _write(files[0], raws[0][:1000])
+    _write(files[1], raws[1][:555])
+    updated = list()
+    watcher = Watcher([folder], bin=3600, window=86400, capacity=100, meal_interval=1800,
+                      schedule=Schedule(15, 3), on_update=updated.append, clock=lambda: START)
+    asyncio.run(watcher.poll_once())
+    assert list(watcher.devices) == files[:2] and len(updated) == 2
+    # the rest of the rows, and a new device
+    _append(files[0], raws[0][1000:])
+    _append(files[1], raws[1][555:])
+    _write(files[2], raws[2])
+    asyncio.run(watcher.poll_once())
+    assert list(watcher.devices) == files
+    for filename, times in zip(files, data):
+        device = watcher.devices[filename]
+        stats = device.stats
+        assert stats.pellets == len(times) and stats.last == times[-1]
+        assert np.array_equal(device.buffer.values(), times[-100:])
+        origin = times[0].astype('datetime64[D]')
+        ticks = int(device.bins.ticks(times[-1:])[0])
+        expected = fill_bins(ticks, [times], origin, 3600)[0]
+        start = int(device.bins.ticks(times[:1])[0])
+        assert np.array_equal(stats.bins, expected[max(start, ticks - 24 + 1) - 1:])
+    # nothing new: no update
+    updated.clear()
+    assert asyncio.run(watcher.poll_once()) == [] and updated == []
+    # a shorter file(new experiment) is counted from its beginning
+    _write(files[1], _rows(data[1][:10]))
+    asyncio.run(watcher.poll_once())
+    assert watcher.devices[files[1]].stats.pellets == 10
+    assert np.array_equal(watcher.devices[files[1]].buffer.values(), data[1][:10])
+
+# the live timeline shows the average of the same bins as fill_bins of the rows written so far
+def test_live_timeline(tmp_path):
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from fedpy.plots import live_timeline
+    data = [_pellets(seed, hours=20) for seed in range(3)]
+    raws = [_rows(el) for el in data]
+    files = [str(tmp_path / ('FED%d.csv' % i)) for i in range(3)]
+    for filename, raw in zip(files, raws):
+        _write(filename, raw[:len(raw) // 2 + 3])
+    fig = live_timeline(files, 3600, Schedule(15, 3), window=12 * 3600)
+    try:
+        for filename, raw in zip(files, raws):
+            _append(filename, raw[len(raw) // 2 + 3:])
+        fig.live_update()
+        origin = min(el[0] for el in data).astype('datetime64[D]')
+        last = max(el[-1] for el in data)
+        ticks = int((last - origin) / np.timedelta64(3600, 's'))
+        expected = fill_bins(ticks, data, origin, 3600)[:, -12:]
+        line = fig.axes[1].lines[0]
+        assert np.allclose(line.get_ydata(), get_averages2plot(expected, 12))
+        events = fig.axes[0].collections
+        for row, times in zip(events[:3], data):
+            assert len(row.get_positions()) == (times >= last - np.timedelta64(12 * 3600, 's')).sum()
+    finally:
+        fig.live_timer.stop()
+        plt.close(fig)
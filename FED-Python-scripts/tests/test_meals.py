@@ -0,0 +1,99 @@
+'''
+Purpose: grouped per phase and per cycle meal tables(meal_cycle_table, phase_meal_stats) against the per mouse
+lists of night_count and the meal_bars.py functions, on synthetic data and on pellets exactly on the window edges,
+and the streaming MealDetector against segment_meals and meal_cycle_table.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import numpy as np
+import pytest
+from fedpy import read_all
+from fedpy.analysis import full_cycles
+from fedpy.golden import write_edge_folder
+from fedpy.meals import (segment_meals, gram2pellet, night_count, meal_cycle_table, phase_meal_stats, MealDetector,
+                         get_avg_night_pellets_per_meal, all_night_meal_pellets_count, get_avg_night_meal_duration)
+from fedpy.schedule import Schedule, window_of
+from fedpy.synth import write_folder
+from fedpy.times import cycle_counts, DARK, LIGHT
+
+@pytest.fixture(params=['synth', 'edges'])
+def cycles(request, tmp_path):
+    folder = str(tmp_path / request.param)
+    if request.param == 'synth':
+        write_folder(folder, devices=4, days=4, seed=2)
+    else:
+        write_edge_folder(folder, seed=0)
+    return full_cycles(read_all(folder, cache=False), 15, 3)
+
+@pytest.mark.parametrize('interval, size', [(60, 0.02), (1800, 0.2), (3600, 1)])
+def test_meal_cycle_table(cycles, interval, size):
+    data2plot, full_nights, full_days = cycles
+    meals = segment_meals(data2plot, interval, gram2pellet(size, 0.02))
+    for intervals in (full_nights, full_days):
+        count, durations = night_count(meals, intervals, len(data2plot))
+        meal_no, pellets, duration = meal_cycle_table(meals, intervals, len(data2plot))
+        assert meal_no.shape == (len(data2plot), len(intervals))
+        assert np.array_equal(meal_no.sum(axis=1), [len(el) for el in count])
+        assert np.array_equal(pellets.sum(axis=1), [el.sum() for el in count])
+        assert np.array_equal(duration.sum(axis=1), [el.sum() for el in durations])
+        # each column is the meals starting in that interval(both ends included)
+        for i, (start, end) in enumerate(intervals):
+            inside = (meals['start'] >= start) & (meals['start'] <= end)
+            assert np.array_equal(meal_no[:, i], np.bincount(meals['mouse'][inside], minlength=len(data2plot)))
+        # the statistics of the bar charts are the same from the totals as from the lists
+        stats = phase_meal_stats(meal_no.sum(axis=1), pellets.sum(axis=1), duration.sum(axis=1), len(intervals))
+        pellets_per_meal, meals_per_cycle, meals_err, meals_p = get_avg_night_pellets_per_meal(count, intervals)
+        meal_pellets, meal_pellets_err, meal_pellets_p = all_night_meal_pellets_count(count, intervals)
+        avg_duration, duration_err, duration_p = get_avg_night_meal_duration(durations)
+        assert stats['pellets_per_meal'] == pellets_per_meal
+        assert stats['meals_per_cycle'] == meals_per_cycle
+        assert stats['meals_per_cycle_err'] == meals_err
+        assert np.array_equal(stats['meals_per_cycle_p'], meals_p)
+        assert stats['meal_pellets'] == meal_pellets
+        assert stats['meal_pellets_err'] == meal_pellets_err
+        assert np.array_equal(stats['meal_pellets_p'], meal_pellets_p)
+        assert stats['duration'] == avg_duration
+        assert stats['duration_err'] == duration_err
+        assert np.array_equal(stats['duration_p'], duration_p)
+
+def test_cycle_counts(cycles):
+    data2plot, full_nights, full_days = cycles
+    for intervals in (full_nights, full_days):
+        counts = cycle_counts(data2plot, intervals)
+        for i, (start, end) in enumerate(intervals):
+            assert np.array_equal(counts[:, i], [((el >= start) & (el <= end)).sum() for el in data2plot])
+
+# pellets fed one at a time give the same meals, cycle table and phase totals as segment_meals of all of them
+@pytest.mark.parametrize('interval, min_pellets', [(60, 1), (1800, 5)])
+def test_meal_detector(cycles, interval, min_pellets):
+    data2plot, full_nights, full_days = cycles
+    meals = segment_meals(data2plot, interval, min_pellets)
+    schedule = Schedule(15, 3)
+    for mouse, times in enumerate(data2plot):
+        detector = MealDetector(interval, min_pellets, schedule, mouse)
+        tables = [np.full((len(el), 3), np.nan) for el in (full_nights, full_days)]
+        found = list()
+        for el in times:
+            found.append(detector.add(el[np.newaxis]))
+            for table, intervals in zip(tables, (full_nights, full_days)):
+                rows = detector.cycle_table(intervals)
+                kept = ~np.isnan(rows[:, 0])
+                table[kept] = rows[kept]
+        found.append(detector.flush())
+        for table, intervals in zip(tables, (full_nights, full_days)):
+            rows = detector.cycle_table(intervals)
+            kept = ~np.isnan(rows[:, 0])
+            table[kept] = rows[kept]
+        # at most the last two windows with meals are kept
+        assert len(detector.windows) <= 2
+        found = np.concatenate(found)
+        assert np.array_equal(found, meals[meals['mouse'] == mouse])
+        for table, intervals in zip(tables, (full_nights, full_days)):
+            expected = np.stack([el[mouse] for el in meal_cycle_table(meals, intervals, len(data2plot))], axis=1)
+            assert np.array_equal(table, expected)
+        mine = found['start'].astype(np.int64)
+        phase = window_of(schedule, mine)[0]
+        duration = (found['end'] - found['start']).astype(np.int64)
+        for totals, which in zip(detector.phase_totals(), (DARK, LIGHT)):
+            inside = phase == which
+            assert np.array_equal(totals, [inside.sum(), found['pellets'][inside].sum(), duration[inside].sum()])
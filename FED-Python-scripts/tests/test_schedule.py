@@ -0,0 +1,26 @@
+'''
+Purpose: light/dark schedules(schedule.py) that follow a time zone.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import numpy as np
+import pytest
+from fedpy import FedError
+from fedpy.schedule import Schedule, full_windows
+
+START, END = np.datetime64('2016-03-10T00:00:00'), np.datetime64('2016-03-16T00:00:00')
+
+# a wrong time zone name is a FedError, not an exception of zoneinfo
+@pytest.mark.parametrize('tz', ['Nowhere/Atlantis', '../etc'])
+def test_unknown_time_zone(tz):
+    with pytest.raises(FedError, match='Unknown time zone'):
+        full_windows(Schedule(19, 7, tz), START, END)
+
+# the night of the change to daylight saving time(13 March 2016 in New York) lasts 11 hours, so it is not full
+def test_daylight_saving_time():
+    try:
+        nights = full_windows(Schedule(19, 7, 'America/New_York'), START, END)[0]
+    except FedError:
+        pytest.skip('no time zone data')
+    assert len(nights) == len(full_windows(Schedule(19, 7), START, END)[0]) - 1
+    assert (np.datetime64('2016-03-12T19:00:00'), np.datetime64('2016-03-13T07:00:00')) not in nights
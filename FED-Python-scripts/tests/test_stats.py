@@ -0,0 +1,109 @@
+'''
+Purpose: batched statistics(stats.py) against scipy.stats row by row, including rows with missing values and rows
+without variance, and the resampling tests: same results with any chunk size and number of processes, p values
+of the permutation test uniform when there is no difference.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import warnings
+import numpy as np
+import pytest
+from scipy import stats as sp
+from fedpy.stats import ttest, effect_size, permutation_test, bootstrap_ci
+
+# random rows with NaN padding(different numbers of values), and the corner cases at the end:
+# constant rows(same and different values of the groups), a row with one value and a row without values
+def _groups(seed, rows=40):
+    rng = np.random.default_rng(seed)
+    a = rng.normal(0, 1, (rows, 12))
+    b = rng.normal(0.5, 2, (rows, 10))
+    for row in range(rows):
+        a[row, rng.integers(2, 13):] = np.nan
+        b[row, rng.integers(2, 11):] = np.nan
+    a[-6:-3, :] = np.nan
+    b[-6:-3, :] = np.nan
+    a[-6, :4], b[-6, :4] = 3.0, 3.0
+    a[-5, :4], b[-5, :4] = 3.0, 1.0
+    a[-4, :4], b[-4, :3] = 3.0, rng.normal(size=3)
+    a[-3, 1:] = np.nan
+    a[-2, :] = np.nan
+    a[-1, 3:], b[-1, 3:] = np.nan, np.nan
+    return a, b
+
+def _valid(row):
+    return row[~np.isnan(row)]
+
+def _expected(test, *rows):
+    with warnings.catch_warnings(), np.errstate(all='ignore'):
+        warnings.simplefilter('ignore')
+        result = test(*rows)
+    return result.statistic, result.df, result.pvalue
+
+def _same(found, expected):
+    found, expected = np.asarray(found, dtype=float), np.asarray(expected, dtype=float)
+    assert np.array_equal(np.isnan(found), np.isnan(expected))
+    assert np.allclose(found, expected, rtol=1e-9, atol=0, equal_nan=True)
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('equal_var', [True, False])
+def test_ttest_ind(seed, equal_var):
+    a, b = _groups(seed)
+    found = ttest(a, b, equal_var=equal_var)
+    expected = np.array([_expected(lambda x, y: sp.ttest_ind(x, y, equal_var=equal_var), _valid(x), _valid(y))
+                         for x, y in zip(a, b)])
+    for i in range(3):
+        _same(found[i], expected[:, i])
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_ttest_rel(seed):
+    a, b = _groups(seed)
+    found = ttest(a, b, paired=True)
+    expected = []
+    for x, y in zip(a, b[:, :12] if b.shape[1] > 12 else np.pad(b, ((0, 0), (0, 2)), constant_values=np.nan)):
+        both = ~np.isnan(x) & ~np.isnan(y)
+        expected.append(_expected(sp.ttest_rel, x[both], y[both]))
+    expected = np.array(expected)
+    for i in range(3):
+        _same(found[i], expected[:, i])
+
+@pytest.mark.parametrize('paired', [False, True])
+def test_effect_size(paired):
+    a, b = _groups(2)
+    d, g = effect_size(a, b, paired=paired)
+    t, df, p = ttest(a, b, paired=paired)
+    with np.errstate(all='ignore'):
+        if paired:
+            n = (~np.isnan(a[:, :10]) & ~np.isnan(b)).sum(axis=1)
+            expected = t / np.sqrt(n)
+        else:
+            n_a, n_b = (~np.isnan(a)).sum(axis=1), (~np.isnan(b)).sum(axis=1)
+            expected = t * np.sqrt(1.0 / n_a + 1.0 / n_b)
+        finite = np.isfinite(t)
+        assert np.allclose(d[finite], expected[finite], rtol=1e-9, atol=0)
+        assert np.array_equal(np.isnan(d), np.isnan(t))
+        assert np.allclose(g[finite], d[finite] * (1 - 3 / (4 * df[finite] - 1)), rtol=1e-12, atol=0)
+
+# the results of a seed do not depend on how the resamples are split into chunks and processes
+@pytest.mark.parametrize('chunk_size, workers', [(1000, None), (50000, 2), (1, 3)])
+def test_resampling_determinism(chunk_size, workers):
+    a, b = _groups(3, rows=6)
+    calls = [lambda **k: permutation_test(a, b, 2000, seed=5, **k),
+             lambda **k: permutation_test(a, b, 2000, seed=5, paired=True, **k),
+             lambda **k: bootstrap_ci(a, b, 2000, seed=5, **k),
+             lambda **k: bootstrap_ci(a, b, 2000, seed=5, paired=True, **k),
+             lambda **k: bootstrap_ci(a, None, 2000, seed=5, **k)]
+    for call in calls:
+        expected = np.array(call())
+        found = np.array(call(chunk_size=chunk_size, workers=workers))
+        assert np.array_equal(found, expected, equal_nan=True)
+    assert not np.array_equal(permutation_test(a, b, 2000, seed=6), permutation_test(a, b, 2000, seed=5),
+                              equal_nan=True)
+
+# without a difference between the groups the p values are spread evenly between 0 and 1
+@pytest.mark.parametrize('paired', [False, True])
+def test_permutation_uniform(paired):
+    rng = np.random.default_rng(7)
+    a, b = rng.normal(size=(1000, 8)), rng.normal(size=(1000, 8))
+    p = permutation_test(a, b, 500, seed=1, paired=paired)
+    assert sp.kstest(p, 'uniform').pvalue > 0.001
+    assert abs((p <= 0.05).mean() - 0.05) < 0.025
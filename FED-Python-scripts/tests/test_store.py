@@ -0,0 +1,47 @@
+'''
+Purpose: Parquet store(store.py) with folders of files of the same name, as the firmware writes them(FED_DATA.csv).
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import os
+import shutil
+import numpy as np
+import pytest
+from fedpy import FedError, read_all
+from fedpy.synth import write_folder
+
+pytest.importorskip('pyarrow')
+from fedpy.store import export_folder, read_store
+
+# writes a folder with a single synthetic FED_DATA.csv file
+def _card(path, seed):
+    write_folder(path, devices=1, days=2, seed=seed)
+    shutil.move(os.path.join(path, 'FED0.csv'), os.path.join(path, 'FED_DATA.csv'))
+    return str(path)
+
+# every folder keeps its own device in the cohort
+def test_same_file_names(tmp_path):
+    first = _card(tmp_path / 'mouse1', 0)
+    second = _card(tmp_path / 'mouse2', 1)
+    root = str(tmp_path / 'archive')
+    assert export_folder(first, root, 'cohort').devices == ['mouse1/FED_DATA']
+    assert export_folder(second, root, 'cohort').devices == ['mouse2/FED_DATA']
+    result = read_store(root, 'cohort')
+    assert result.files == ['mouse1/FED_DATA', 'mouse2/FED_DATA']
+    for folder, times in zip((first, second), result.data):
+        assert np.array_equal(times, read_all(folder, cache=False)[0])
+    # exporting a folder again replaces its own rows only
+    export_folder(first, root, 'cohort')
+    assert read_store(root, 'cohort').files == ['mouse1/FED_DATA', 'mouse2/FED_DATA']
+
+# folders with the same name can not go into the same cohort
+def test_same_folder_names(tmp_path):
+    first = _card(tmp_path / 'a' / 'card', 0)
+    second = _card(tmp_path / 'b' / 'card', 1)
+    root = str(tmp_path / 'archive')
+    export_folder(first, root, 'cohort')
+    with pytest.raises(FedError):
+        export_folder(second, root, 'cohort')
+    result = read_store(root, 'cohort')
+    assert result.files == ['card/FED_DATA']
+    assert np.array_equal(result.data[0], read_all(first, cache=False)[0])
@@ -0,0 +1,53 @@
+'''
+Purpose: meal criteria sweep(sweep.py) against analyze_meal_bars at every point of the grid.
+Run from the FED-Python-scripts folder: python -m pytest tests
+'''
+
+import itertools
+import numpy as np
+import pytest
+from fedpy import FedError, read_all
+from fedpy.analysis import analyze_meal_bars
+from fedpy.sweep import sweep_meals
+from fedpy.synth import write_folder
+
+LIGHTS = (15, 3)
+INTERVALS = (60, 300, 1800, 3600)
+SIZES = (0.1, 0.3)
+WEIGHTS = (0.02, 0.05)
+
+def _same(a, b):
+    if isinstance(a, (list, tuple, np.ndarray)):
+        return len(a) == len(b) and np.allclose(np.asarray(a, dtype=float), np.asarray(b, dtype=float),
+                                                rtol=1e-12, atol=0)
+    return a == pytest.approx(b, rel=1e-12, abs=0)
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_sweep_equals_meal_bars(tmp_path, processes):
+    folder = str(tmp_path / 'data')
+    write_folder(folder, devices=4, days=4, seed=1)
+    data = read_all(folder, cache=False)
+    rows = sweep_meals(data, *LIGHTS, INTERVALS, SIZES, WEIGHTS, workers=2, processes=processes)
+    assert len(rows) == len(INTERVALS) * len(SIZES) * len(WEIGHTS)
+    for row, (interval, size, weight) in zip(rows, itertools.product(INTERVALS, SIZES, WEIGHTS)):
+        assert (row.meal_interval, row.meal_size, row.pellet_weight) == (interval, size, weight)
+        result = analyze_meal_bars(data, *LIGHTS, interval, size, weight)
+        for phase in ('night', 'day'):
+            expected = result[phase]
+            found = getattr(row, phase)
+            for key in found:
+                assert _same(found[key], expected[key]), (interval, size, weight, phase, key)
+        assert row.do_stats == result['do_stats']
+        assert set(row.p) == set(result['p'])
+        for key in row.p:
+            assert _same(row.p[key], result['p'][key])
+
+# a phase without pellets is a FedError as in analyze_meal_bars
+def test_sweep_one_phase(tmp_path):
+    folder = str(tmp_path / 'night')
+    write_folder(folder, devices=3, days=3, seed=0, dark_meals=1.0, light_meals=0)
+    data = read_all(folder, cache=False)
+    with pytest.raises(FedError, match='Not enough data'):
+        analyze_meal_bars(data, *LIGHTS, 1800, 0.1, 0.02)
+    with pytest.raises(FedError, match='Not enough data'):
+        sweep_meals(data, *LIGHTS, (600, 1800), (0.1,), (0.02,), workers=2)